@@ -2,3 +2,14 @@
 
 from . import controllers
 from . import models
+
+
+def _post_init_rebuild_aggregates(env):
+    """Backfill the daily aggregates and attendance years from existing records
+
+    KPI scores are computed when the module is installed, before the
+    attendance years exist, so they are recomputed afterwards.
+    """
+    env['hr.analytics.daily']._rebuild()
+    env['hr.analytics.attendance.year']._rebuild()
+    env['hr.employee'].with_context(active_test=False).search([])._recompute_kpi_score()
@@ -37,12 +37,18 @@ Features:
         'hr_attendance',
         'hr_holidays',
         'hr_contract',
+        'bus',
         'web'
     ],
+    'external_dependencies': {
+        'python': ['numpy'],
+    },
 
     # Data files
     'data': [
         'security/ir.model.access.csv',
+        'security/hr_analytics_security.xml',
+        'data/ir_cron.xml',
         'views/hr_dashboard_views.xml',
     ],
 
@@ -55,6 +61,8 @@ Features:
         ],
     },
 
+    'post_init_hook': '_post_init_rebuild_aggregates',
+
     'installable': True,
     'application': True,
     'auto_install': False,
@@ -0,0 +1,21 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmarks for the HR analytics entry points.
+
+Not loaded by the addon itself; run them from an Odoo shell::
+
+    $ odoo-bin shell -d <database>
+    >>> from odoo.addons.hr_analytics_dashboard.benchmarks import runner
+    >>> runner.run(env, sizes=(1000, 10000), output='/tmp/hr_analytics_benchmark.json')
+
+``runner`` generates seeded synthetic datasets (``data_generator``) inside
+a savepoint, measures wall time, SQL queries and peak memory of every
+entry point and writes a JSON report to compare across commits.
+``kpi_queries`` checks that KPI scoring runs a flat number of queries on
+the existing data. ``explain_queries`` compares the EXPLAIN ANALYZE plans
+of the attendance and leave queries before and after the analytics
+indexes and stored ``department_id`` columns.
+
+The ``hr_analytics_benchmark`` tests of the addon run ``runner`` and
+``kpi_queries`` over a generated dataset through the Odoo test framework.
+"""
@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+
+import logging
+import random
+from datetime import date, timedelta
+
+from odoo.tools import SQL
+
+_logger = logging.getLogger(__name__)
+
+# Context used for the ORM-created records: no chatter, no tracking
+FAST_CREATE_CONTEXT = {
+    'tracking_disable': True,
+    'mail_create_nolog': True,
+    'mail_notrack': True,
+    'leave_fast_create': True,
+    'leave_skip_state_check': True,
+}
+BATCH_SIZE = 1000
+
+
+def generate(env, employees=1000, departments=None, days=365, leaves_per_employee=4, seed=42):
+    """Create a reproducible synthetic HR dataset
+
+    Departments, employees, open contracts and validated single-day leaves
+    go through the ORM; a year of weekday check-ins (about 90% presence)
+    is inserted in SQL, then the daily aggregates and attendance years are
+    rebuilt and the KPI scores recomputed.
+
+    Args:
+        env: Odoo environment (superuser recommended)
+        employees (int): Number of employees
+        departments (int, optional): Defaults to one per 200 employees
+        days (int): Days of attendance history, ending today
+        leaves_per_employee (int): Maximum leaves per employee
+        seed (int): Random seed, same seed same dataset
+
+    Returns:
+        dict: volumes created and the covered date range
+    """
+    rng = random.Random(seed)
+    env = env(context=dict(env.context, **FAST_CREATE_CONTEXT))
+    company = env.company
+    date_to = date.today()
+    date_from = date_to - timedelta(days=days - 1)
+    departments = departments or max(employees // 200, 1)
+
+    department_records = env['hr.department'].create([
+        {'name': f'Benchmark Department {index:04d}', 'company_id': company.id}
+        for index in range(departments)
+    ])
+
+    employee_records = env['hr.employee']
+    for offset in range(0, employees, BATCH_SIZE):
+        employee_records |= env['hr.employee'].create([
+            {
+                'name': f'Benchmark Employee {index:06d}',
+                'department_id': rng.choice(department_records).id,
+                'company_id': company.id,
+            }
+            for index in range(offset, min(offset + BATCH_SIZE, employees))
+        ])
+
+    for offset in range(0, employees, BATCH_SIZE):
+        env['hr.contract'].create([
+            {
+                'name': f'Benchmark Contract {employee.id}',
+                'employee_id': employee.id,
+                'wage': rng.randrange(8, 80) * 1000000,
+                'date_start': date_from,
+                'state': 'open',
+            }
+            for employee in employee_records[offset:offset + BATCH_SIZE]
+        ])
+
+    leave_type = env['hr.leave.type'].create({
+        'name': 'Benchmark Leave',
+        'requires_allocation': 'no',
+        'company_id': company.id,
+    })
+    leave_vals = []
+    for employee in employee_records:
+        for offset in rng.sample(range(days), min(rng.randint(0, leaves_per_employee), days)):
+            day = date_from + timedelta(days=offset)
+            leave_vals.append({
+                'employee_id': employee.id,
+                'holiday_status_id': leave_type.id,
+                'request_date_from': day,
+                'request_date_to': day,
+            })
+    leaves = env['hr.leave']
+    for offset in range(0, len(leave_vals), BATCH_SIZE):
+        leaves |= env['hr.leave'].create(leave_vals[offset:offset + BATCH_SIZE])
+    leaves.write({'state': 'validate'})
+
+    env.flush_all()
+    env.cr.execute(SQL("SELECT setseed(%s)", (seed % 1000) / 1000))
+    env.cr.execute(SQL("""
+        INSERT INTO hr_attendance (
+            employee_id, department_id, check_in, check_out, worked_hours,
+            create_uid, write_uid, create_date, write_date
+        )
+        SELECT e.id, emp.department_id, shift.check_in, shift.check_in + shift.hours * interval '1 hour', shift.hours,
+               %(uid)s, %(uid)s, now() AT TIME ZONE 'UTC', now() AT TIME ZONE 'UTC'
+          FROM unnest(%(employee_ids)s::int[]) AS e(id)
+          JOIN hr_employee emp ON emp.id = e.id
+    CROSS JOIN generate_series(%(date_from)s::date, %(date_to)s::date, interval '1 day') AS d(day)
+    CROSS JOIN LATERAL (
+                SELECT d.day + interval '8 hours' + random() * interval '1 hour' AS check_in,
+                       7 + random() * 2.5 AS hours
+               ) shift
+         WHERE extract(isodow FROM d.day) < 6 AND random() < 0.9
+        """,
+        uid=env.uid,
+        employee_ids=employee_records.ids,
+        date_from=date_from,
+        date_to=date_to,
+    ))
+    attendances = env.cr.rowcount
+    env.invalidate_all()
+    env['hr.analytics.daily']._rebuild(date_from, date_to)
+    env['hr.analytics.attendance.year']._rebuild()
+    employee_records._recompute_kpi_score()
+    env.flush_all()
+
+    volumes = {
+        'departments': departments,
+        'employees': employees,
+        'contracts': employees,
+        'leaves': len(leave_vals),
+        'attendances': attendances,
+        'date_from': date_from.isoformat(),
+        'date_to': date_to.isoformat(),
+    }
+    _logger.info("Generated benchmark dataset: %s", volumes)
+    return volumes
@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+
+import logging
+from datetime import datetime, timedelta
+
+from odoo.tools import SQL
+
+_logger = logging.getLogger(__name__)
+
+DEFAULT_DAYS = 30
+
+# Models whose analytics indexes are dropped for the "before" plans
+INDEXED_MODELS = ('hr.attendance', 'hr.leave')
+
+
+def get_queries(env, days=DEFAULT_DAYS):
+    """Return the analytics access patterns to explain
+
+    Returns:
+        dict: {name: (before, after)} where ``before`` is the query shape
+            used before the stored attendance ``department_id`` (department
+            filters joining ``hr_employee``) and ``after`` the current one;
+            leaves are bucketed by the current department of their employee
+    """
+    date_to = datetime.now()
+    date_from = date_to - timedelta(days=days)
+    department_id = env['hr.department'].search([], limit=1).id
+    employee_ids = env['hr.employee'].search([('active', '=', True)], limit=100).ids
+
+    def attendance_by_department(join, department_expr):
+        return SQL(
+            """
+            SELECT a.check_in::date, SUM(a.worked_hours)
+              FROM hr_attendance a %s
+             WHERE %s = %s AND a.check_in >= %s AND a.check_in < %s AND a.worked_hours > 0
+          GROUP BY 1
+            """,
+            join, department_expr, department_id, date_from, date_to,
+        )
+
+    leaves_by_department = SQL(
+        """
+        SELECT l.request_date_from, COUNT(*)
+          FROM hr_leave l
+          JOIN hr_employee e ON e.id = l.employee_id
+         WHERE e.department_id = %s AND l.state = 'validate'
+           AND l.request_date_from >= %s AND l.request_date_from <= %s
+      GROUP BY 1
+        """,
+        department_id, date_from.date(), date_to.date(),
+    )
+
+    employee_hours = SQL(
+        """
+        SELECT a.employee_id, a.check_in::date, SUM(a.worked_hours)
+          FROM hr_attendance a
+         WHERE a.employee_id = ANY(%s) AND a.check_in >= %s AND a.worked_hours > 0
+      GROUP BY 1, 2
+        """,
+        employee_ids, date_from,
+    )
+    validated_leaves = SQL(
+        """
+        SELECT l.employee_id, COUNT(*)
+          FROM hr_leave l
+         WHERE l.state = 'validate' AND l.request_date_from >= %s AND l.request_date_from <= %s
+      GROUP BY 1
+        """,
+        date_from.date(), date_to.date(),
+    )
+    return {
+        'attendance_by_department': (
+            attendance_by_department(SQL("JOIN hr_employee e ON e.id = a.employee_id"), SQL("e.department_id")),
+            attendance_by_department(SQL(), SQL("a.department_id")),
+        ),
+        'leaves_by_department': (leaves_by_department, leaves_by_department),
+        'employee_hours': (employee_hours, employee_hours),
+        'validated_leaves': (validated_leaves, validated_leaves),
+    }
+
+
+def explain(cr, query):
+    """Run EXPLAIN ANALYZE on a query
+
+    Returns:
+        dict: planning and execution time in milliseconds, estimated total
+            cost and the indexes the plan scans
+    """
+    cr.execute(SQL("EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) %s", query))
+    [plan] = cr.fetchone()[0]
+    indexes = set()
+    nodes = [plan['Plan']]
+    while nodes:
+        node = nodes.pop()
+        if 'Index Name' in node:
+            indexes.add(node['Index Name'])
+        nodes.extend(node.get('Plans', ()))
+    return {
+        'planning_time_ms': plan.get('Planning Time'),
+        'execution_time_ms': plan.get('Execution Time'),
+        'total_cost': plan['Plan']['Total Cost'],
+        'indexes': sorted(indexes),
+    }
+
+
+def drop_analytics_indexes(env):
+    """Drop the indexes installed for the analytics queries (inside a savepoint)"""
+    for model in INDEXED_MODELS:
+        Model = env[model]
+        for suffix in Model._hr_analytics_indexes:
+            env.cr.execute(SQL("DROP INDEX IF EXISTS %s", SQL.identifier(f'{Model._table}_{suffix}')))
+
+
+def run(env, days=DEFAULT_DAYS):
+    """Compare the plans of the analytics queries before and after the indexes
+
+    The "before" plans run the former query shapes with the analytics
+    indexes dropped in a savepoint that is rolled back afterwards; run it on
+    a copy of the database, as dropping an index locks its table.
+
+    Returns:
+        dict: {name: {'before': explain(), 'after': explain()}}
+    """
+    env.flush_all()
+    queries = get_queries(env, days)
+    results = {name: {} for name in queries}
+
+    for name, (_before, after) in queries.items():
+        results[name]['after'] = explain(env.cr, after)
+
+    env.cr.execute(SQL("SAVEPOINT hr_analytics_explain"))
+    try:
+        drop_analytics_indexes(env)
+        for name, (before, _after) in queries.items():
+            results[name]['before'] = explain(env.cr, before)
+    finally:
+        env.cr.execute(SQL("ROLLBACK TO SAVEPOINT hr_analytics_explain"))
+
+    for name, result in results.items():
+        _logger.info(
+            "EXPLAIN %s: %.2f ms -> %.2f ms, cost %.1f -> %.1f, indexes %s",
+            name,
+            result['before']['execution_time_ms'], result['after']['execution_time_ms'],
+            result['before']['total_cost'], result['after']['total_cost'],
+            ', '.join(result['after']['indexes']) or '-',
+        )
+    return results
@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+
+import logging
+import time
+
+_logger = logging.getLogger(__name__)
+
+DEFAULT_SIZES = (10, 100, 1000, 8000)
+
+
+def compute_kpi_scores(employees):
+    """Run the KPI computation in cache only, without storing the scores"""
+    field = employees._fields['kpi_score']
+    with employees.env.protecting([field], employees):
+        employees._compute_kpi_score()
+
+
+def measure_kpi_computation(employees):
+    """Compute KPI scores for a recordset and measure the cost
+
+    Returns:
+        dict: headcount, SQL query count and wall time in milliseconds
+    """
+    employees.invalidate_recordset(['kpi_score'])
+    cr = employees.env.cr
+    queries_before = cr.sql_log_count
+    started = time.perf_counter()
+
+    compute_kpi_scores(employees)
+
+    return {
+        'employees': len(employees),
+        'queries': cr.sql_log_count - queries_before,
+        'wall_time_ms': round((time.perf_counter() - started) * 1000, 2),
+    }
+
+
+def run(env, sizes=DEFAULT_SIZES):
+    """Benchmark the KPI engine over growing slices of the active employees
+
+    The query count must stay flat whatever the headcount; a warning is
+    logged when it does not.
+
+    Returns:
+        list: one measurement dict per size
+    """
+    employees = env['hr.employee'].search([('active', '=', True)])
+    results = []
+    for size in sizes:
+        if size > len(employees):
+            _logger.info("KPI benchmark: skipping size %s (only %s employees)", size, len(employees))
+            continue
+        result = measure_kpi_computation(employees[:size])
+        _logger.info("KPI benchmark: %s", result)
+        results.append(result)
+
+    query_counts = {result['queries'] for result in results}
+    if len(query_counts) > 1:
+        _logger.warning("KPI benchmark: query count varies with headcount: %s", sorted(query_counts))
+    return results
@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+
+import json
+import logging
+import os
+import subprocess
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+from odoo.tools import SQL
+
+from ..controllers.controllers import HRAnalyticsController
+from ..tools.request_env import request_env
+from . import data_generator, kpi_queries
+
+_logger = logging.getLogger(__name__)
+
+DEFAULT_SIZES = (1000, 10000, 50000)
+# Employees shown on one page of a list view
+LIST_PAGE_SIZE = 500
+
+
+def measure(env, func):
+    """Run func once for wall time and query count, once more for peak memory
+
+    Caches are emptied before each run. Returns:
+        dict: wall_ms, queries and peak_kb
+    """
+    env.invalidate_all()
+    queries_before = env.cr.sql_log_count
+    started = time.perf_counter()
+    func()
+    wall_ms = (time.perf_counter() - started) * 1000
+    queries = env.cr.sql_log_count - queries_before
+
+    env.invalidate_all()
+    tracemalloc.start()
+    try:
+        func()
+        _current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {'wall_ms': round(wall_ms, 2), 'queries': queries, 'peak_kb': round(peak / 1024, 1)}
+
+
+def call_controller(env, method, **params):
+    """Call a dashboard controller method outside of an HTTP request"""
+    with request_env(env):
+        return getattr(HRAnalyticsController(), method)(**params)
+
+
+def get_entry_points(env, volumes):
+    """Return {name: callable} for every analytics entry point"""
+    start_date = (datetime.now().date() - timedelta(days=30)).isoformat()
+    end_date = datetime.now().date().isoformat()
+    employees = env['hr.employee'].search([('active', '=', True)])
+    page = employees[:LIST_PAGE_SIZE]
+    departments = env['hr.department'].search([])
+
+    def get_hr_data():
+        data = call_controller(env, 'get_hr_data', start_date=start_date, end_date=end_date)
+        if data.get('error'):
+            raise RuntimeError(data['message'])
+        return data
+
+    versions = get_hr_data()['versions']
+
+    def get_hr_data_not_modified():
+        call_controller(env, 'get_hr_data', start_date=start_date, end_date=end_date, versions=versions)
+
+    def employee_list_page():
+        page.mapped('department_turnover_rate')
+        page.mapped('current_salary')
+        page.mapped('total_leaves_ytd')
+        page.mapped('avg_daily_hours')
+
+    stats = env['hr.analytics.stats'].create([
+        {'name': f'Benchmark {dept.name}', 'department_id': dept.id}
+        for dept in departments
+    ] + [{'name': 'Benchmark company-wide'}])
+
+    return {
+        'get_hr_data': get_hr_data,
+        'get_hr_data_not_modified': get_hr_data_not_modified,
+        'kpi_scores': lambda: kpi_queries.compute_kpi_scores(employees),
+        'employee_list_page': employee_list_page,
+        'salary_aggregates': env['hr.contract']._get_salary_aggregates,
+        'stats_refresh': stats._refresh_stats,
+        'snapshot_capture': env['hr.analytics.snapshot']._cron_capture_snapshots,
+        'daily_rebuild': lambda: env['hr.analytics.daily']._rebuild(volumes['date_from'], volumes['date_to']),
+    }
+
+
+def run(env, sizes=DEFAULT_SIZES, seed=42, output='hr_analytics_benchmark.json'):
+    """Benchmark every analytics entry point over synthetic datasets
+
+    Each size is generated, measured and rolled back inside a savepoint, so
+    the database is left untouched. The dashboard result cache is disabled
+    for the duration of the run.
+
+    Args:
+        env: Odoo environment, e.g. ``env`` of ``odoo-bin shell``
+        sizes (tuple): Employee counts to benchmark
+        seed (int): Data generator seed
+        output (str, optional): Path of the JSON report
+
+    Returns:
+        dict: the report written to output
+    """
+    report = {
+        'commit': _get_commit(),
+        'started_at': datetime.now().isoformat(timespec='seconds'),
+        'seed': seed,
+        'results': {},
+    }
+    for size in sizes:
+        env.cr.execute(SQL("SAVEPOINT hr_analytics_benchmark"))
+        try:
+            env['ir.config_parameter'].sudo().set_param('hr_analytics_dashboard.cache_ttl', 0)
+            volumes = data_generator.generate(env, employees=size, seed=seed)
+            results = {
+                name: measure(env, func)
+                for name, func in get_entry_points(env, volumes).items()
+            }
+            report['results'][size] = {'volumes': volumes, 'entry_points': results}
+            _logger.info("HR Analytics benchmark, %s employees: %s", size, results)
+        finally:
+            env.invalidate_all()
+            env.cr.execute(SQL("ROLLBACK TO SAVEPOINT hr_analytics_benchmark"))
+            env.registry.clear_cache()
+
+    if output:
+        with open(output, 'w') as report_file:
+            json.dump(report, report_file, indent=2)
+        _logger.info("HR Analytics benchmark report written to %s", output)
+    return report
+
+
+def _get_commit():
+    """Current git commit of the module, when available"""
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+            text=True,
+            stderr=subprocess.DEVNULL,
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
@@ -1,12 +1,27 @@
 # -*- coding: utf-8 -*-
 
+import csv
+import hashlib
+import io
 import logging
+from contextlib import contextmanager
 from datetime import datetime, timedelta
-from collections import defaultdict
 
-from odoo import http
-from odoo.http import request
+from odoo import api, http
+from odoo.http import request, content_disposition
 from odoo.exceptions import ValidationError
+from odoo.tools import str2bool
+
+from ..models.hr_analytics_engine import METRICS
+from ..models.hr_analytics_export import EXPORT_DATASETS
+from ..models.hr_employee import DRILLDOWN_METRICS, DRILLDOWN_OPERATORS, DRILLDOWN_SORTS
+from ..models.hr_analytics_source_mixin import SECTION_MODELS
+from ..tools import analytics_math
+from ..tools.parallel import section_executor
+from ..tools.profiler import current_profile, profile_request, profile_task, profiled, step_stats
+from ..tools.replica import REPLICA_CONTEXT_KEY, replica_router
+from ..tools.request_env import request_env
+from ..tools.result_cache import dashboard_cache
 
 _logger = logging.getLogger(__name__)
 
@@ -17,45 +32,173 @@ class HRAnalyticsController(http.Controller):
     DEFAULT_DAYS_RANGE = 30
     KPI_LEAVE_PENALTY = 3  # Points deducted per leave day
     MAX_KPI_LEAVE_PENALTY = 30  # Maximum points deducted for leaves
+    DEFAULT_CACHE_TTL = 300  # Seconds a computed dashboard payload is reused
+    ASYNC_DAYS_RANGE = 180  # Longer date ranges are computed as background jobs
+    MAX_DAYS_RANGE = 3660  # Longest date range of a dashboard request
+    MAX_EXPORT_DAYS_RANGE = 365  # Longest date range of a streamed export
+
+    # Response sections and the source models they are computed from
+    SECTION_MODELS = SECTION_MODELS
+    # Response keys of each section
+    SECTION_KEYS = {
+        'metrics': ('total_employees', 'turnover_rate', 'avg_salary', 'salary_percentiles', 'kpi_average', 'avg_kpi'),
+        'kpi_distribution': ('kpi_distribution', 'kpi_statistics'),
+        'attendance_trends': ('attendance_trends', 'attendance_rolling', 'granularity'),
+        'leave_trends': ('leave_trends',),
+        'salary_distribution': ('salary_distribution',),
+    }
+    ROLLING_WINDOWS = (7, 30)  # Days of the rolling attendance averages
+    # Trend granularities, finest first, with their approximate length in days
+    GRANULARITIES = {'day': 1, 'week': 7, 'month': 30.44, 'quarter': 91.31}
+    MAX_TREND_POINTS = 90  # Trends are rolled up to a coarser granularity beyond
+    DEPARTMENTS_MAX_AGE = 300  # Seconds browsers reuse the department list without revalidating
+    DRILLDOWN_PAGE_SIZE = 50
+    RETENTION_MONTHS = 24  # Default horizon of the retention curves
+    MAX_RETENTION_MONTHS = 120
+    MAX_DRILLDOWN_PAGE_SIZE = 200
 
     @http.route("/hr_analytics/data", type="json", auth="user", methods=["POST"])
-    def get_hr_data(self, department_id=None, start_date=None, end_date=None, **_kwargs):
+    def get_hr_data(self, department_id=None, start_date=None, end_date=None, versions=None, debug=False,
+                    background=None, granularity=None, include_children=False, **_kwargs):
         """
         Get HR Analytics data with optional filters
 
+        Every response carries a version token per section. Clients send the
+        tokens back; sections whose token did not change are neither
+        recomputed nor resent, and ``not_modified`` is set when none did.
+
+        Requests over ``ASYNC_DAYS_RANGE`` days are queued as background
+        jobs: the response is the job status (``job_id``, ``state``) and the
+        data is fetched from ``/hr_analytics/job`` once done.
+
         Args:
             department_id (int, optional): Filter by department ID
             start_date (str, optional): Start date in YYYY-MM-DD format
             end_date (str, optional): End date in YYYY-MM-DD format
+            versions (dict, optional): Section version tokens of the client
+            debug (bool, optional): Add the per-step timings and query counts
+                of this request under ``debug`` (also on in debug mode)
+            background (bool, optional): Also compute a shorter request as
+                a background job; longer ones always are
+            granularity (str, optional): Finest trend bucket: day, week,
+                month or quarter. Trends are rolled up in the database to
+                a coarser one when they would exceed ``MAX_TREND_POINTS``
+                points; by default the finest one within that limit.
+            include_children (bool, optional): Include the sub-departments
+                of the department filter
 
         Returns:
-            dict: HR analytics data including metrics and trends
+            dict: HR analytics data including metrics and trends, and
+            ``can_view_profile_stats`` for the performance stats button
         """
         try:
-            # Validate and process parameters
-            department_id = self._validate_department_id(department_id)
-            start_date, end_date = self._validate_date_range(start_date, end_date)
-
-            _logger.info(f"HR Analytics request: dept={department_id}, dates={start_date} to {end_date}")
-
-            # Get base employee data
-            employees = self._get_filtered_employees(department_id)
+            with profile_request(request.env.cr) as profile:
+                # Clients may only opt in to the background job
+                data = self._get_hr_data(
+                    department_id, start_date, end_date, versions, background or None, granularity, include_children,
+                )
+                profile_data = profile.to_dict()
+
+            _logger.info(
+                "hr_analytics.request wall_ms=%.2f queries=%s",
+                profile_data['wall_ms'], profile_data['queries'],
+            )
+            if debug or request.session.debug:
+                data = {**data, 'debug': profile_data}
+            return {**data, 'can_view_profile_stats': self._can_view_profile_stats()}
 
-            # Calculate core metrics
-            metrics = self._calculate_core_metrics(employees, department_id)
+        except Exception as e:
+            _logger.error(f"Error in HR Analytics controller: {str(e)}")
+            return self._error_response(str(e))
 
-            # Calculate trend data
-            trends = self._calculate_trends(department_id, start_date, end_date)
+    def _get_hr_data(self, department_id, start_date, end_date, versions, background=None, granularity=None,
+                     include_children=False):
+        """Validate the filters and build the (partial) dashboard payload
 
-            # Combine all data
-            data = {**metrics, **trends}
+        Returns the status of a queued background job instead when
+        ``background`` is set, or left to None for a long date range.
+        """
+        # Validate and process parameters
+        department_id = self._validate_department_id(department_id)
+        include_children = bool(department_id) and str2bool(str(include_children or False), False)
+        department_ids = department_id and request.env['hr.department']._get_department_filter_ids(
+            department_id, include_children,
+        )
+        start_date, end_date = self._validate_date_range(start_date, end_date)
+        granularity = self._get_trend_granularity(granularity, start_date, end_date)
 
-            _logger.info(f"HR Analytics response: {len(employees)} employees, {len(data)} data points")
-            return data
+        _logger.info(
+            f"HR Analytics request: dept={department_id}, children={include_children}, "
+            f"dates={start_date} to {end_date}, granularity={granularity}"
+        )
 
-        except Exception as e:
-            _logger.error(f"Error in HR Analytics controller: {str(e)}")
-            return self._error_response(str(e))
+        cache_key = self._get_cache_key(department_ids, start_date, end_date, granularity)
+        primary_env = request.env
+        with self._analytics_env() as data_source:
+            # Only the sections whose data changed since the client's versions
+            current_versions = self._get_section_versions(cache_key)
+            client_versions = versions if isinstance(versions, dict) else {}
+            sections = [
+                section for section, version in current_versions.items()
+                if client_versions.get(section) != version
+            ]
+            if not sections:
+                _logger.info("HR Analytics response: not modified")
+                return {'not_modified': True, 'versions': current_versions, 'data_source': data_source}
+
+            # Serve identical requests from the result cache, for the current
+            # versions only: entries of another worker may predate a change
+            cache_ttl = self._get_cache_ttl()
+            data = None
+            if cache_ttl:
+                data = dashboard_cache.get(primary_env.cr.dbname, cache_key, cache_ttl, version=current_versions)
+                if data is not None:
+                    _logger.info("HR Analytics response served from cache")
+
+            if data is None and self._use_background_job(start_date, end_date, background):
+                job = primary_env['hr.analytics.job']._enqueue(
+                    department_id, start_date, end_date, granularity, include_children,
+                )
+                return job._to_dict()
+
+            if data is None:
+                # Identical requests in flight in any worker share one computation
+                flight_key = repr((cache_key, [(section, current_versions[section]) for section in sections]))
+                data, shared = primary_env['hr.analytics.flight']._run_once(
+                    flight_key,
+                    lambda: self._compute_sections(sections, department_ids, start_date, end_date, granularity),
+                    cache_ttl,
+                )
+                if shared:
+                    _logger.info("HR Analytics response shared with an identical request")
+                # Only complete payloads are reusable by other clients; replica
+                # data may predate the last cache invalidation
+                if cache_ttl and len(sections) == len(self.SECTION_MODELS) and data_source['source'] == 'primary':
+                    dashboard_cache.set(primary_env.cr.dbname, cache_key, data, version=current_versions)
+
+        data = {**self._select_sections(data, sections), 'versions': current_versions, 'data_source': data_source}
+
+        _logger.info(f"HR Analytics response: sections {', '.join(sections)} from the {data_source['source']}")
+        return data
+
+    @contextmanager
+    def _analytics_env(self):
+        """Run the reads of ``request.env`` in the block on the analytics replica
+
+        Falls back to the primary when no replica is configured, or when it
+        is unreachable or lags more than the ``hr_analytics_dashboard.
+        replica_max_lag`` system parameter (seconds).
+
+        Yields:
+            dict: source ('replica' or 'primary') and lag_seconds of the data
+        """
+        primary_env = request.env
+        with replica_router.env(primary_env, replica_router.get_max_lag(primary_env)) as (env, data_source):
+            if env is primary_env:
+                yield data_source
+                return
+            with request_env(env), profile_task(env.cr, current_profile()):
+                yield data_source
 
     def _validate_department_id(self, department_id):
         """Validate and convert department_id parameter"""
@@ -64,14 +207,15 @@ class HRAnalyticsController(http.Controller):
 
         try:
             dept_id = int(department_id)
-            # Verify department exists
-            if not request.env['hr.department'].browse(dept_id).exists():
-                raise ValidationError(f"Department {dept_id} does not exist")
-            return dept_id
         except (ValueError, TypeError):
             raise ValidationError(f"Invalid department_id: {department_id}")
+        # Verify department exists, from the cached department index
+        _version, departments = request.env['hr.department']._get_visible_department_index()
+        if dept_id not in departments:
+            raise ValidationError(f"Department {dept_id} does not exist")
+        return dept_id
 
-    def _validate_date_range(self, start_date, end_date):
+    def _validate_date_range(self, start_date, end_date, max_days=None):
         """Validate and convert date range parameters"""
         try:
             if not start_date or not end_date:
@@ -86,175 +230,334 @@ class HRAnalyticsController(http.Controller):
                 raise ValidationError("Start date cannot be after end date")
 
             # Limit range to prevent performance issues
-            if (end_date - start_date).days > 365:
-                raise ValidationError("Date range cannot exceed 365 days")
+            max_days = max_days or self.MAX_DAYS_RANGE
+            if (end_date - start_date).days > max_days:
+                raise ValidationError(f"Date range cannot exceed {max_days} days")
 
             return start_date, end_date
 
         except ValueError as e:
             raise ValidationError(f"Invalid date format. Use YYYY-MM-DD: {str(e)}")
 
-    def _get_filtered_employees(self, department_id):
-        """Get employees filtered by department"""
-        domain = [("active", "=", True)]
-        if department_id:
-            domain.append(('department_id', '=', department_id))
+    def _get_trend_granularity(self, granularity, start_date, end_date):
+        """Return the trend granularity of the request
 
-        return request.env['hr.employee'].search(domain)
+        The requested one (the finest by default) is coarsened until the
+        range fits in ``MAX_TREND_POINTS`` buckets, or up to quarters.
+        """
+        if granularity and granularity not in self.GRANULARITIES:
+            raise ValidationError(f"Invalid granularity: {granularity}")
+        names = list(self.GRANULARITIES)
+        days = (end_date - start_date).days + 1
+        for name in names[names.index(granularity or names[0]):]:
+            if days / self.GRANULARITIES[name] <= self.MAX_TREND_POINTS:
+                return name
+        return names[-1]
+
+    def _use_background_job(self, start_date, end_date, background):
+        """Whether to queue the request as a background job
+
+        Args:
+            background (bool): True to queue the request, None to queue it
+                over ``ASYNC_DAYS_RANGE`` days, False to compute it in place
+                (only for the background jobs themselves)
+        """
+        if background is None:
+            return (end_date - start_date).days > self.ASYNC_DAYS_RANGE
+        return bool(background)
+
+    def _compute_sections(self, sections, department_ids, start_date, end_date, granularity='day'):
+        """Compute the requested response sections
+
+        The independent parts run concurrently, each on its own cursor, when
+        the ``hr_analytics_dashboard.parallel_sections`` system parameter is
+        set; serially otherwise.
+        """
+        tasks = self._get_section_tasks(sections, department_ids, start_date, end_date, granularity)
+        if self._use_parallel_sections():
+            parts = section_executor.run(request.env, tasks)
+        else:
+            parts = {name: task() for name, task in tasks.items()}
+
+        data = {}
+        salary_stats = parts.get('salary_aggregates')
+        if 'kpi_metrics' in parts:
+            data.update(self._calculate_core_metrics(parts['turnover_rate'], salary_stats, parts['kpi_metrics']))
+        if 'attendance_trends' in parts:
+            data.update(parts['attendance_trends'])
+            data['granularity'] = granularity
+        if 'salary_distribution' in sections:
+            data['salary_distribution'] = self._get_salary_distribution(salary_stats)
+        if 'leave_trends' in parts:
+            data['leave_trends'] = parts['leave_trends']
+        return data
+
+    def _get_section_tasks(self, sections, department_ids, start_date, end_date, granularity='day'):
+        """Return {name: callable} for the independent parts of the sections
+
+        Each part reads different tables and only depends on the filters, so
+        they can run in any order or concurrently.
+        """
+        sections = set(sections)
+        tasks = {}
+        if {'metrics', 'kpi_distribution', 'salary_distribution'} & sections:
+            # Aggregate open contract wages once for metrics and trends
+            tasks['salary_aggregates'] = lambda: self._get_salary_aggregates(department_ids)
+        if {'metrics', 'kpi_distribution'} & sections:
+            tasks['turnover_rate'] = lambda: self._calculate_turnover_rate(department_ids, start_date, end_date)
+            tasks['kpi_metrics'] = lambda: self._calculate_kpi_metrics(self._get_filtered_employees(department_ids))
+        if 'attendance_trends' in sections:
+            tasks['attendance_trends'] = lambda: self._get_attendance_trends(
+                department_ids, start_date, end_date, granularity
+            )
+        if 'leave_trends' in sections:
+            # Leave trends stay monthly, the granularity only applies to attendance
+            tasks['leave_trends'] = lambda: self._get_leave_trends(department_ids, start_date, end_date)
+        return tasks
+
+    def _use_parallel_sections(self):
+        """Whether to compute the section parts concurrently
+
+        Never on the replica: the section cursors are opened on the primary.
+        """
+        if request.env.context.get(REPLICA_CONTEXT_KEY):
+            return False
+        return str2bool(request.env['ir.config_parameter'].sudo().get_param(
+            'hr_analytics_dashboard.parallel_sections', 'False'
+        ), False)
+
+    def _select_sections(self, data, sections):
+        """Keep only the keys of the given sections"""
+        keys = set()
+        for section in sections:
+            keys.update(self.SECTION_KEYS[section])
+        return {key: value for key, value in data.items() if key in keys}
+
+    @profiled('section_versions', rows=None)
+    def _get_section_versions(self, cache_key):
+        """Build the version token of every response section
+
+        Tokens hash the filters and access fingerprint, the current day
+        (rolling KPI windows) and the change marks of the section's models.
+        """
+        marks = request.env['hr.analytics.engine']._get_data_marks()
+        today = datetime.now().date().isoformat()
+        versions = {}
+        for section, model_names in self.SECTION_MODELS.items():
+            token = repr((cache_key, today, marks['unlink'], [marks[name] for name in model_names]))
+            versions[section] = hashlib.sha1(token.encode()).hexdigest()[:16]
+        return versions
+
+    def _get_cache_ttl(self):
+        """Get the result cache TTL in seconds (0 disables the cache)"""
+        ttl = request.env['ir.config_parameter'].sudo().get_param(
+            'hr_analytics_dashboard.cache_ttl', self.DEFAULT_CACHE_TTL
+        )
+        try:
+            return max(int(ttl), 0)
+        except (ValueError, TypeError):
+            return self.DEFAULT_CACHE_TTL
+
+    def _get_cache_key(self, department_ids, start_date, end_date, granularity='day'):
+        """Build the result cache key for the current user and filters
 
-    def _calculate_core_metrics(self, employees, department_id):
-        """Calculate core HR metrics"""
-        total_employees = len(employees)
+        Users sharing the same groups and allowed companies see the same
+        records, so they share cache entries. Users outside HR may be
+        restricted by per-user record rules and get their own entries.
+        """
+        env = request.env
+        user = env.user
+        access_fingerprint = (
+            tuple(sorted(user.groups_id.ids)),
+            None if user.has_group('hr.group_hr_user') else user.id,
+        )
+        return (
+            env.company.id,
+            tuple(sorted(env.companies.ids)),
+            tuple(department_ids or ()),
+            start_date.isoformat(),
+            end_date.isoformat(),
+            granularity,
+            access_fingerprint,
+        )
 
-        # Turnover rate
-        turnover_rate = self._calculate_turnover_rate(department_id)
+    @profiled('filtered_employees')
+    def _get_filtered_employees(self, department_ids):
+        """Get employees filtered by departments"""
+        domain = [("active", "=", True)]
+        if department_ids:
+            domain.append(('department_id', 'in', department_ids))
+
+        return request.env['hr.employee'].search(domain)
 
+    def _calculate_core_metrics(self, turnover_rate, salary_stats, kpi_metrics):
+        """Assemble the core HR metrics from the turnover, salary and KPI parts"""
         # Average salary
-        avg_salary = self._calculate_average_salary(department_id)
+        avg_salary = self._calculate_average_salary(salary_stats)
 
-        # KPI average
-        kpi_average, kpi_distribution = self._calculate_kpi_metrics(employees)
+        kpi_average, kpi_distribution, kpi_statistics = kpi_metrics
+        # One KPI score per active employee of the filter
+        total_employees = kpi_statistics['count']
 
         return {
             'total_employees': total_employees,
             'turnover_rate': round(turnover_rate, 2),
             'avg_salary': round(avg_salary, 2),
+            'salary_percentiles': {
+                key: round(value, 2) for key, value in salary_stats['percentiles'].items()
+            },
             'kpi_average': round(kpi_average, 2),
             'avg_kpi': round(kpi_average, 2),  # Backward compatibility
             'kpi_distribution': kpi_distribution,
+            'kpi_statistics': kpi_statistics,
         }
 
-    def _calculate_turnover_rate(self, department_id):
-        """Calculate turnover rate for department or company"""
-        domain = []
-        if department_id:
-            domain.append(('department_id', '=', department_id))
+    @profiled('turnover_rate', rows=None)
+    def _calculate_turnover_rate(self, department_ids, start_date, end_date):
+        """Calculate the turnover rate of the period for departments or company"""
+        turnover = request.env['hr.analytics.cohort']._get_turnover(start_date, end_date, department_ids)
+        return turnover['turnover_rate']
 
-        total_all = request.env['hr.employee'].search_count(domain)
-        inactive_count = request.env['hr.employee'].search_count(
-            domain + [('active', '=', False)]
-        )
-
-        return (inactive_count / total_all * 100) if total_all > 0 else 0.0
-
-    def _calculate_average_salary(self, department_id):
-        """Calculate average salary from active contracts"""
-        contract_domain = [('state', '=', 'open')]
-        if department_id:
-            contract_domain.append(('employee_id.department_id', '=', department_id))
+    @profiled('salary_aggregates', rows=lambda result: len(result['departments']))
+    def _get_salary_aggregates(self, department_ids):
+        """Aggregate the open contract wages of the filter"""
+        domain = [('employee_id.department_id', 'in', department_ids)] if department_ids else None
+        return request.env['hr.contract']._get_salary_aggregates(domain=domain)
 
-        contracts = request.env['hr.contract'].search(contract_domain)
-        wages = [contract.wage for contract in contracts if contract.wage]
-
-        return sum(wages) / len(wages) if wages else 0.0
+    def _calculate_average_salary(self, salary_stats):
+        """Get average salary from the open contract aggregates"""
+        return salary_stats['avg']
 
+    @profiled('kpi_metrics', rows=lambda result: result[2]['count'])
     def _calculate_kpi_metrics(self, employees):
-        """Calculate KPI metrics for employees"""
-        kpi_scores = []
+        """Calculate KPI metrics for employees
 
-        for emp in employees:
-            # Force computation of KPI score
-            emp._compute_kpi_score()
-            kpi_scores.append(emp.kpi_score)
+        Returns:
+            tuple: (average, distribution by 10-point range, statistics with
+                std, min, max and percentiles)
+        """
+        # Stored scores: a single read of the column for the whole recordset
+        kpi_scores = employees.mapped('kpi_score')
 
-        kpi_average = sum(kpi_scores) / len(kpi_scores) if kpi_scores else 0.0
+        kpi_statistics = analytics_math.describe(kpi_scores)
+        kpi_average = kpi_statistics['mean']
 
         # KPI distribution
-        kpi_hist = defaultdict(int)
-        for score in kpi_scores:
-            bucket = int(score // 10) * 10
-            kpi_hist[bucket] += 1
-
         kpi_distribution = [
             {"score_range": f"{bucket}-{bucket+9}", "count": count}
-            for bucket, count in sorted(kpi_hist.items())
+            for bucket, count in analytics_math.histogram(kpi_scores, bin_width=10)
         ]
 
-        return kpi_average, kpi_distribution
-
-    def _calculate_trends(self, department_id, start_date, end_date):
-        """Calculate trend data for charts"""
-        return {
-            'attendance_trends': self._get_attendance_trends(department_id, start_date, end_date),
-            'salary_distribution': self._get_salary_distribution(department_id),
-            'leave_trends': self._get_leave_trends(department_id, start_date, end_date),
-        }
+        kpi_statistics = {key: round(value, 2) for key, value in kpi_statistics.items()}
+        return kpi_average, kpi_distribution, kpi_statistics
 
-    def _get_attendance_trends(self, department_id, start_date, end_date):
-        """Get attendance trends by day"""
-        att_domain = [
-            ('check_in', '>=', start_date),
-            ('check_in', '<=', end_date),
-            ('worked_hours', '>', 0)
+    def _get_daily_aggregate_domain(self, department_ids, start_date, end_date):
+        """Build the hr.analytics.daily domain for the requested filters"""
+        domain = [
+            ('date', '>=', start_date),
+            ('date', '<=', end_date),
         ]
-        if department_id:
-            att_domain.append(('employee_id.department_id', '=', department_id))
+        if department_ids:
+            domain.append(('department_id', 'in', department_ids))
+        return domain
 
-        attendances = request.env['hr.attendance'].search(att_domain)
+    @profiled('attendance_trends', rows=lambda result: len(result['attendance_trends']))
+    def _get_attendance_trends(self, department_ids, start_date, end_date, granularity='day'):
+        """Get attendance trends by day, week, month or quarter from the daily aggregates
 
-        # Group by day
-        att_by_day = defaultdict(list)
-        for att in attendances:
-            day = att.check_in.date().isoformat()
-            att_by_day[day].append(att.worked_hours)
+        Buckets are rolled up in the database. At day granularity, the days
+        preceding the range are fetched as well so that rolling averages are
+        complete from the first day shown; coarser buckets have none.
 
-        # Calculate average hours per day
-        attendance_trends = [
-            {
-                "date": day,
-                "worked_hours": round(sum(hours) / len(hours), 2) if hours else 0
+        Returns:
+            dict: attendance_trends (average hours per attendance of each
+                bucket, dated by its first day) and attendance_rolling
+                (trailing 7/30-day averages)
+        """
+        if granularity != 'day':
+            groups = request.env['hr.analytics.daily']._read_group(
+                self._get_daily_aggregate_domain(department_ids, start_date, end_date)
+                + [('attendance_count', '>', 0)],
+                groupby=[f'date:{granularity}'],
+                aggregates=['worked_hours:sum', 'attendance_count:sum'],
+            )
+            groups.sort()
+            means = analytics_math.ratios(
+                [hours for _period, hours, _count in groups],
+                [count for _period, _hours, count in groups],
+            )
+            return {
+                'attendance_trends': [
+                    {"date": period.strftime('%Y-%m-%d'), "worked_hours": round(float(mean), 2)}
+                    for (period, _hours, _count), mean in zip(groups, means)
+                ],
+                'attendance_rolling': [],
             }
-            for day, hours in sorted(att_by_day.items())
-        ]
-
-        return attendance_trends
 
-    def _get_salary_distribution(self, department_id):
-        """Get salary distribution by department"""
-        contract_domain = [('state', '=', 'open')]
-
-        # If filtering by specific department, only show that department
-        if department_id:
-            contract_domain.append(('employee_id.department_id', '=', department_id))
+        history_start = start_date - timedelta(days=max(self.ROLLING_WINDOWS) - 1)
+        domain = self._get_daily_aggregate_domain(department_ids, history_start, end_date)
+        groups = request.env['hr.analytics.daily']._read_group(
+            domain + [('attendance_count', '>', 0)],
+            groupby=['date:day'],
+            aggregates=['worked_hours:sum', 'attendance_count:sum'],
+        )
 
-        contracts = request.env['hr.contract'].search(contract_domain)
+        # Flat columns, then vectorized daily and rolling averages
+        days = [day.toordinal() for day, _hours, _count in groups]
+        hours = [hours for _day, hours, _count in groups]
+        counts = [count for _day, _hours, count in groups]
+        daily_means = analytics_math.ratios(hours, counts)
+        days, rolling = analytics_math.rolling_means(days, hours, counts, self.ROLLING_WINDOWS)
+
+        attendance_trends = []
+        attendance_rolling = []
+        first_day = start_date.toordinal()
+        for index in sorted(range(len(days)), key=lambda i: days[i]):
+            if days[index] < first_day:
+                continue
+            day = datetime.fromordinal(int(days[index])).strftime('%Y-%m-%d')
+            attendance_trends.append({"date": day, "worked_hours": round(float(daily_means[index]), 2)})
+            attendance_rolling.append({
+                "date": day,
+                **{f"avg_{window}d": round(float(rolling[window][index]), 2) for window in self.ROLLING_WINDOWS},
+            })
 
-        salary_by_dept = defaultdict(float)
-        for contract in contracts:
-            if contract.employee_id and contract.employee_id.department_id:
-                dept_name = contract.employee_id.department_id.name
-                salary_by_dept[dept_name] += contract.wage or 0
+        return {
+            'attendance_trends': attendance_trends,
+            'attendance_rolling': attendance_rolling,
+        }
 
+    @profiled('salary_distribution')
+    def _get_salary_distribution(self, salary_stats):
+        """Get salary distribution by department from the open contract aggregates"""
         salary_distribution = [
-            {"department": dept, "total_salary": round(total, 2)}
-            for dept, total in salary_by_dept.items()
+            {"department": dept['department'], "total_salary": round(dept['total'], 2)}
+            for dept in salary_stats['departments']
         ]
 
         return salary_distribution
 
-    def _get_leave_trends(self, department_id, start_date, end_date):
-        """Get leave trends by month"""
-        leave_domain = [
-            ('state', '=', 'validate'),
-            ('request_date_from', '>=', start_date),
-            ('request_date_from', '<=', end_date)
-        ]
-        if department_id:
-            leave_domain.append(('employee_id.department_id', '=', department_id))
+    @profiled('leave_trends')
+    def _get_leave_trends(self, department_ids, start_date, end_date, granularity='month'):
+        """Get leave trends by day, week, month or quarter from the daily aggregates
 
-        leaves = request.env['hr.leave'].search(leave_domain)
+        Buckets are rolled up in the database and dated by their first day;
+        every bucket also keeps the ``month`` key of its first day.
+        """
+        domain = self._get_daily_aggregate_domain(department_ids, start_date, end_date)
+        groups = request.env['hr.analytics.daily']._read_group(
+            domain + [('leave_count', '>', 0)],
+            groupby=[f'date:{granularity}'],
+            aggregates=['leave_count:sum'],
+        )
 
-        # Group by month
-        leave_by_month = defaultdict(int)
-        for leave in leaves:
-            if leave.request_date_from:
-                month = leave.request_date_from.strftime('%Y-%m')
-                leave_by_month[month] += 1
-
-        leave_trends = [
-            {"month": month, "count": count}
-            for month, count in sorted(leave_by_month.items())
-        ]
+        leave_trends = []
+        for period, count in sorted(groups):
+            leave_trends.append({
+                "month": period.strftime('%Y-%m'),
+                "date": period.strftime('%Y-%m-%d'),
+                "count": count,
+            })
 
         return leave_trends
 
@@ -266,23 +569,432 @@ class HRAnalyticsController(http.Controller):
             'total_employees': 0,
             'turnover_rate': 0,
             'avg_salary': 0,
+            'salary_percentiles': {},
             'kpi_average': 0,
             'avg_kpi': 0,
             'attendance_trends': [],
             'salary_distribution': [],
             'leave_trends': [],
             'kpi_distribution': [],
+            'kpi_statistics': {},
+            'attendance_rolling': [],
         }
 
-    @http.route("/hr_analytics/departments", type="json", auth="user", methods=["GET"])
-    def get_departments(self):
-        """Get list of departments for filter dropdown"""
+    @http.route("/hr_analytics/snapshots", type="json", auth="user", methods=["POST"])
+    def get_snapshots(self, department_id=None, start_date=None, end_date=None, **_kwargs):
+        """
+        Get the latest analytics snapshot and the snapshot history
+
+        Args:
+            department_id (int, optional): Filter by department ID
+            start_date (str, optional): Start date in YYYY-MM-DD format
+            end_date (str, optional): End date in YYYY-MM-DD format
+
+        Returns:
+            dict: latest snapshot values and chronological history
+        """
+        try:
+            department_id = self._validate_department_id(department_id)
+            start_date, end_date = self._validate_date_range(start_date, end_date)
+
+            Snapshot = request.env['hr.analytics.snapshot']
+            return {
+                'latest': Snapshot._get_latest(department_id),
+                'history': Snapshot._get_history(department_id, start_date, end_date),
+            }
+        except Exception as e:
+            _logger.error(f"Error getting HR Analytics snapshots: {str(e)}")
+            return {'error': True, 'message': str(e), 'latest': {}, 'history': []}
+
+    @http.route("/hr_analytics/compare", type="json", auth="user", methods=["POST"])
+    def get_comparison(self, department_ids=None, company_ids=None, start_date=None, end_date=None, **_kwargs):
+        """
+        Compare core metrics and monthly trends of departments and companies
+
+        All rows are computed together by a constant number of grouped
+        queries. The response is columnar: the row descriptors and every
+        metric are lists aligned on the rows.
+
+        Args:
+            department_ids (list, optional): Department IDs, all departments
+                of the companies when empty
+            company_ids (list, optional): Company IDs among the allowed
+                companies, all allowed companies when empty
+            start_date (str, optional): Start date in YYYY-MM-DD format
+            end_date (str, optional): End date in YYYY-MM-DD format
+
+        Returns:
+            dict: rows ({'kind', 'id', 'name'}: lists), metrics ({metric:
+                list}), months and trends ({'avg_hours', 'attendances',
+                'leaves'}: one list of monthly values per row)
+        """
         try:
-            departments = request.env['hr.department'].search([])
+            company_ids = self._validate_company_ids(company_ids)
+            department_ids = self._validate_department_ids(department_ids, company_ids)
+            start_date, end_date = self._validate_date_range(start_date, end_date)
+
+            _logger.info(
+                f"HR Analytics comparison: {len(department_ids)} departments, companies={company_ids}, "
+                f"dates={start_date} to {end_date}"
+            )
+            with self._analytics_env() as data_source:
+                engine = request.env['hr.analytics.engine']
+                metrics = engine._compute_comparison_metrics(department_ids, company_ids, start_date, end_date)
+                trends = engine._get_comparison_trends(start_date, end_date, company_ids)
+                return {**self._build_comparison(metrics, trends), 'data_source': data_source}
+
+        except Exception as e:
+            _logger.error(f"Error in HR Analytics comparison: {str(e)}")
+            return {
+                'error': True,
+                'message': str(e),
+                'rows': {'kind': [], 'id': [], 'name': []},
+                'metrics': {},
+                'months': [],
+                'trends': {},
+            }
+
+    def _validate_company_ids(self, company_ids):
+        """Validate company ids against the allowed companies"""
+        allowed_ids = request.env.companies.ids
+        if not company_ids:
+            return allowed_ids
+        try:
+            company_ids = [int(company_id) for company_id in company_ids]
+        except (ValueError, TypeError):
+            raise ValidationError(f"Invalid company_ids: {company_ids}")
+        if not set(company_ids) <= set(allowed_ids):
+            raise ValidationError("Companies must be among the allowed companies")
+        return company_ids
+
+    def _validate_department_ids(self, department_ids, company_ids):
+        """Validate department ids, defaulting to all departments of the companies"""
+        _version, departments = request.env['hr.department']._get_visible_department_index()
+        if not department_ids:
             return [
-                {'id': dept.id, 'name': dept.name}
-                for dept in departments
+                department['id'] for department in departments.values()
+                if department['active'] and (not department['company_id'] or department['company_id'] in company_ids)
             ]
+        try:
+            department_ids = [int(department_id) for department_id in department_ids]
+        except (ValueError, TypeError):
+            raise ValidationError(f"Invalid department_ids: {department_ids}")
+        missing_ids = set(department_ids) - set(departments)
+        if missing_ids:
+            raise ValidationError(f"Departments {sorted(missing_ids)} do not exist")
+        return department_ids
+
+    def _build_comparison(self, metrics, trends):
+        """Lay the engine results out in columns aligned on the rows"""
+        keys = list(metrics)
+        names = {}
+        for kind, model in (('company', 'res.company'), ('department', 'hr.department')):
+            records = request.env[model].browse([record_id for key_kind, record_id in keys if key_kind == kind])
+            names[kind] = {record.id: record.name for record in records}
+        months = sorted({month for key in keys for month in trends.get(key, {})})
+
+        trend_columns = {'avg_hours': [], 'attendances': [], 'leaves': []}
+        for key in keys:
+            key_trends = trends.get(key, {})
+            monthly = [key_trends.get(month, (0.0, 0, 0)) for month in months]
+            trend_columns['avg_hours'].append([
+                round(hours / attendances, 2) if attendances else 0.0
+                for hours, attendances, _leaves in monthly
+            ])
+            trend_columns['attendances'].append([attendances for _hours, attendances, _leaves in monthly])
+            trend_columns['leaves'].append([leaves for _hours, _attendances, leaves in monthly])
+
+        return {
+            'rows': {
+                'kind': [kind for kind, _id in keys],
+                'id': [record_id for _kind, record_id in keys],
+                'name': [names[kind].get(record_id, '') for kind, record_id in keys],
+            },
+            'metrics': {
+                name: [round(metrics[key][name], 2) for key in keys]
+                for name in METRICS
+            },
+            'months': [month.strftime('%Y-%m') for month in months],
+            'trends': trend_columns,
+        }
+
+    @http.route("/hr_analytics/cohorts", type="json", auth="user", methods=["POST"])
+    def get_cohorts(self, department_id=None, include_children=False, start_date=None, end_date=None,
+                    months=None, **_kwargs):
+        """
+        Get hire and departure figures, retention and tenure of a period
+
+        Answered from the in-memory cohort index, without scanning
+        employees. Employees are counted in their department on the day
+        considered: at hire for the retention cohort, on the end date for
+        the tenure distribution.
+
+        Args:
+            department_id (int, optional): Filter by department ID
+            include_children (bool, optional): Include the sub-departments
+            start_date (str, optional): Start date in YYYY-MM-DD format
+            end_date (str, optional): End date in YYYY-MM-DD format
+            months (int, optional): Retention horizon in months, up to
+                ``MAX_RETENTION_MONTHS``
+
+        Returns:
+            dict: turnover (headcount_start, headcount_end, hires,
+                departures, turnover_rate), retention of the employees hired
+                in the period ([{'month', 'eligible', 'retained',
+                'retention_rate'}]) and tenure on the end date ([{'tenure',
+                'count'}])
+        """
+        try:
+            department_id = self._validate_department_id(department_id)
+            start_date, end_date = self._validate_date_range(start_date, end_date)
+            try:
+                months = min(int(months or self.RETENTION_MONTHS), self.MAX_RETENTION_MONTHS)
+            except (ValueError, TypeError):
+                raise ValidationError(f"Invalid months: {months}")
+            if months < 1:
+                raise ValidationError(f"Invalid months: {months}")
+            department_ids = department_id and request.env['hr.department']._get_department_filter_ids(
+                department_id, str2bool(str(include_children or False), False),
+            )
+
+            with self._analytics_env() as data_source:
+                Cohort = request.env['hr.analytics.cohort']
+                turnover = Cohort._get_turnover(start_date, end_date, department_ids)
+                return {
+                    'turnover': {**turnover, 'turnover_rate': round(turnover['turnover_rate'], 2)},
+                    'retention': Cohort._get_retention_curve(start_date, end_date, months, department_ids),
+                    'tenure': Cohort._get_tenure_distribution(end_date, department_ids),
+                    'data_source': data_source,
+                }
+
+        except Exception as e:
+            _logger.error(f"Error getting HR Analytics cohorts: {str(e)}")
+            return {'error': True, 'message': str(e), 'turnover': {}, 'retention': [], 'tenure': []}
+
+    @http.route("/hr_analytics/employees", type="json", auth="user", methods=["POST"])
+    def get_employee_rows(self, department_id=None, include_children=False, sort='kpi_score', order='asc',
+                          filters=None, after=None, limit=None, **_kwargs):
+        """
+        Get one page of per-employee analytics rows for the drill-down
+
+        Pages are keyset-paginated: pass the ``next_cursor`` of a response
+        as ``after`` to get the following page, at the same cost whatever
+        its position.
+
+        Args:
+            department_id (int, optional): Filter by department ID
+            include_children (bool, optional): Include the sub-departments
+            sort (str, optional): name, kpi_score, current_salary,
+                total_leaves_ytd or avg_daily_hours
+            order (str, optional): asc or desc
+            filters (list, optional): [metric, operator, value] triplets on
+                the metrics, e.g. ``[["kpi_score", "<", 50]]``
+            after (list, optional): ``next_cursor`` of the previous page
+            limit (int, optional): Page size, up to ``MAX_DRILLDOWN_PAGE_SIZE``
+
+        Returns:
+            dict: rows ([{'id', 'name', 'department_id', 'department',
+                'kpi_score', 'current_salary', 'total_leaves_ytd',
+                'avg_daily_hours'}]) and next_cursor (None on the last page)
+        """
+        try:
+            department_id = self._validate_department_id(department_id)
+            if sort not in DRILLDOWN_SORTS:
+                raise ValidationError(f"Invalid sort: {sort}")
+            if order not in ('asc', 'desc'):
+                raise ValidationError(f"Invalid order: {order}")
+            filters = self._validate_drilldown_filters(filters)
+            after = self._validate_drilldown_cursor(after, sort)
+            try:
+                limit = min(int(limit or self.DRILLDOWN_PAGE_SIZE), self.MAX_DRILLDOWN_PAGE_SIZE)
+            except (ValueError, TypeError):
+                raise ValidationError(f"Invalid limit: {limit}")
+            if limit < 1:
+                raise ValidationError(f"Invalid limit: {limit}")
+
+            domain = [("active", "=", True)]
+            if department_id:
+                department_ids = request.env['hr.department']._get_department_filter_ids(
+                    department_id, str2bool(str(include_children or False), False),
+                )
+                domain.append(('department_id', 'in', department_ids))
+
+            with profile_request(request.env.cr) as profile:
+                with self._analytics_env() as data_source:
+                    page = request.env['hr.employee']._get_analytics_page(
+                        domain, sort, order == 'desc', filters, after, limit,
+                    )
+                profile_data = profile.to_dict()
+            _logger.info(
+                "hr_analytics.employees sort=%s %s rows=%s wall_ms=%.2f queries=%s",
+                sort, order, len(page['rows']), profile_data['wall_ms'], profile_data['queries'],
+            )
+            return {**page, 'data_source': data_source}
+
+        except Exception as e:
+            _logger.error(f"Error getting HR Analytics employee rows: {str(e)}")
+            return {'error': True, 'message': str(e), 'rows': [], 'next_cursor': None}
+
+    def _validate_drilldown_filters(self, filters):
+        """Validate [metric, operator, value] filters of the drill-down"""
+        validated = []
+        for item in filters or []:
+            try:
+                metric, operator, value = item
+                value = float(value)
+            except (ValueError, TypeError):
+                raise ValidationError(f"Invalid filter: {item}")
+            if metric not in DRILLDOWN_METRICS or operator not in DRILLDOWN_OPERATORS:
+                raise ValidationError(f"Invalid filter: {item}")
+            validated.append((metric, operator, value))
+        return validated
+
+    def _validate_drilldown_cursor(self, after, sort):
+        """Validate a [sort value, employee id] cursor of the drill-down"""
+        if not after:
+            return None
+        try:
+            value, employee_id = after
+            value = str(value) if sort == 'name' else float(value)
+            return value, int(employee_id)
+        except (ValueError, TypeError):
+            raise ValidationError(f"Invalid cursor: {after}")
+
+    @http.route("/hr_analytics/job", type="json", auth="user", methods=["POST"])
+    def get_job(self, job_id, **_kwargs):
+        """
+        Get the status of a background dashboard job
+
+        Args:
+            job_id (int): Job id returned by ``/hr_analytics/data``
+
+        Returns:
+            dict: job_id and state (queued, running, done or failed), with
+                the dashboard data under ``data`` once done
+        """
+        try:
+            job = request.env['hr.analytics.job'].browse(int(job_id)).exists()
+            if not job:
+                raise ValidationError(f"Job {job_id} does not exist")
+            return job._to_dict()
         except Exception as e:
-            _logger.error(f"Error getting departments: {str(e)}")
-            return []
+            _logger.error(f"Error getting HR Analytics job: {str(e)}")
+            return {'error': True, 'message': str(e), 'job_id': job_id, 'state': 'failed'}
+
+    @http.route("/hr_analytics/export/<string:dataset>", type="http", auth="user", methods=["GET"])
+    def export_data(self, dataset, department_id=None, start_date=None, end_date=None, **_kwargs):
+        """
+        Stream an analytics dataset as CSV
+
+        Rows are produced in batches from a dedicated cursor while the
+        response is being sent, so memory stays flat and the first bytes go
+        out immediately whatever the dataset size.
+
+        Args:
+            dataset (str): employees, attendance (per employee and day) or
+                daily (per department and day)
+            department_id (int, optional): Filter by department ID
+            start_date (str, optional): Start date in YYYY-MM-DD format
+            end_date (str, optional): End date in YYYY-MM-DD format
+
+        Returns:
+            Response: streamed text/csv attachment
+        """
+        try:
+            if dataset not in EXPORT_DATASETS:
+                raise ValidationError(f"Unknown dataset: {dataset}")
+            department_id = self._validate_department_id(department_id)
+            start_date, end_date = self._validate_date_range(start_date, end_date, self.MAX_EXPORT_DAYS_RANGE)
+        except ValidationError as e:
+            return request.make_response(str(e), status=400)
+
+        _logger.info(f"HR Analytics export: {dataset}, dept={department_id}, dates={start_date} to {end_date}")
+        filename = f"hr_analytics_{dataset}_{start_date}_{end_date}.csv"
+        rows = self._stream_csv(
+            request.env.registry, request.env.uid, dict(request.env.context),
+            dataset, department_id, start_date, end_date,
+        )
+        return request.make_response(rows, headers=[
+            ('Content-Type', 'text/csv; charset=utf-8'),
+            ('Content-Disposition', content_disposition(filename)),
+        ])
+
+    def _stream_csv(self, registry, uid, context, dataset, department_id, start_date, end_date):
+        """Generate the CSV export chunk by chunk
+
+        The request cursor is closed once the controller returns, so rows
+        are read from a cursor owned by the generator, as the same user.
+        """
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(EXPORT_DATASETS[dataset])
+        yield buffer.getvalue().encode()
+
+        with registry.cursor() as cr:
+            env = api.Environment(cr, uid, context)
+            batches = env['hr.analytics.export']._iter_batches(dataset, department_id, start_date, end_date)
+            for rows in batches:
+                buffer.seek(0)
+                buffer.truncate()
+                writer.writerows(rows)
+                yield buffer.getvalue().encode()
+
+    @http.route("/hr_analytics/profile_stats", type="json", auth="user", methods=["POST"])
+    def get_profile_stats(self, **_kwargs):
+        """
+        Get rolling p50/p95 wall times and query counts per dashboard step
+
+        Figures cover the last requests served by the answering worker.
+        Restricted to administrators and HR managers.
+
+        Returns:
+            dict: {step: {count, p50_ms, p95_ms, max_ms, avg_queries}}
+        """
+        if not self._can_view_profile_stats():
+            return {'error': True, 'message': "Access denied"}
+        return step_stats.summary(request.env.cr.dbname)
+
+    def _can_view_profile_stats(self):
+        """Whether the current user may see the per-step performance stats"""
+        user = request.env.user
+        return user.has_group('base.group_system') or user.has_group('hr.group_hr_manager')
+
+    @http.route("/hr_analytics/departments", type="http", auth="user", methods=["GET"])
+    def get_departments(self, **_kwargs):
+        """
+        Get the department tree for the filter dropdown
+
+        Served from the cached department index as JSON, with an ETag
+        changing with the departments and the allowed companies: browsers
+        revalidate it with ``If-None-Match`` and get an empty 304 response
+        while nothing changed.
+
+        Returns:
+            Response: JSON list of the active departments ({'id', 'name',
+                'complete_name', 'parent_id', 'company_id', 'child_ids'}),
+                ordered by complete name
+        """
+        version, departments = request.env['hr.department']._get_visible_department_index()
+        etag = hashlib.sha1(
+            f"{version}:{sorted(request.env.companies.ids)}".encode()
+        ).hexdigest()[:16]
+        headers = [
+            ('Cache-Control', f'private, max-age={self.DEPARTMENTS_MAX_AGE}'),
+            ('ETag', f'"{etag}"'),
+        ]
+        if request.httprequest.if_none_match.contains(etag):
+            return request.make_response('', headers=headers, status=304)
+
+        active_ids = {department_id for department_id, department in departments.items() if department['active']}
+        return request.make_json_response([
+            {
+                'id': department['id'],
+                'name': department['name'],
+                'complete_name': department['complete_name'],
+                'parent_id': department['parent_id'] if department['parent_id'] in active_ids else False,
+                'company_id': department['company_id'],
+                'child_ids': [child_id for child_id in department['child_ids'] if child_id in active_ids],
+            }
+            for department in departments.values()
+            if department['active']
+        ], headers=headers)
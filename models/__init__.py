@@ -1,4 +1,18 @@
 # -*- coding: utf-8 -*-
 
+from . import hr_analytics_source_mixin
+from . import hr_department
 from . import hr_employee
+from . import hr_contract
+from . import hr_leave
+from . import hr_attendance
 from . import hr_analytics_stats
+from . import hr_analytics_daily
+from . import hr_analytics_attendance_year
+from . import hr_analytics_engine
+from . import hr_analytics_cohort
+from . import hr_analytics_snapshot
+from . import hr_analytics_export
+from . import hr_analytics_job
+from . import hr_analytics_flight
+from . import ir_websocket
@@ -0,0 +1,212 @@
+# -*- coding: utf-8 -*-
+
+import logging
+from array import array
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+
+from odoo import models, fields, api
+from odoo.tools import SQL, create_unique_index, index_exists, split_every
+
+_logger = logging.getLogger(__name__)
+
+# Days of the largest year, the length of the bitsets and hour arrays
+YEAR_DAYS = 366
+# Packed float64 hours of one row
+HOURS_SIZE = 8 * YEAR_DAYS
+
+
+class HRAnalyticsAttendanceYear(models.Model):
+    """Compact per-employee, per-year index of attendance days
+
+    Each row holds, for one employee and one year, a bitset of the days with
+    an attendance (``days``, bit ``n`` for the day ``n`` of the year counted
+    from 0, little-endian) and the worked hours of each day as packed
+    float64 values (``hours``). Distinct attendance days and daily averages
+    of any date range are then popcounts and array slices instead of loads
+    of attendance records. Days are UTC check-in dates, as in the grouped
+    attendance queries; ``_get_window_stats`` completes the whole days with
+    an exact query on the partial first day of a window.
+
+    Rows are maintained by the attendance hooks and can be rebuilt with
+    ``_rebuild``. The bitset and hours columns are raw ``bytea`` managed
+    with SQL only.
+    """
+    _name = "hr.analytics.attendance.year"
+    _description = "HR Analytics Attendance Year"
+    _order = "year desc"
+    _log_access = False
+
+    # (employee_id, year) rows read, deleted and inserted per statement
+    BATCH_SIZE = 200
+
+    employee_id = fields.Many2one("hr.employee", string="Employee", required=True, readonly=True, ondelete='cascade')
+    year = fields.Integer(string="Year", required=True, readonly=True)
+
+    def init(self):
+        self.env.cr.execute(SQL(
+            """
+            ALTER TABLE hr_analytics_attendance_year
+                ADD COLUMN IF NOT EXISTS days bytea,
+                ADD COLUMN IF NOT EXISTS hours bytea
+            """
+        ))
+        if not index_exists(self.env.cr, 'hr_analytics_attendance_year_uniq'):
+            create_unique_index(
+                self.env.cr, 'hr_analytics_attendance_year_uniq', self._table, ['employee_id', 'year'],
+            )
+
+    @api.model
+    def _rebuild(self):
+        """Recompute the rows of every employee and year with attendances
+
+        Existing rows are refreshed along, so that the rows left without
+        attendances are removed batch by batch as well.
+        """
+        _logger.info("Rebuilding HR analytics attendance years")
+        self.env['hr.attendance'].flush_model()
+        self.env.cr.execute(SQL("""
+            SELECT DISTINCT employee_id, EXTRACT(YEAR FROM check_in)::int
+              FROM hr_attendance
+             WHERE check_in IS NOT NULL
+             UNION
+            SELECT employee_id, year
+              FROM hr_analytics_attendance_year
+        """))
+        self._refresh_cells(self.env.cr.fetchall())
+        return True
+
+    @api.model
+    def _refresh_cells(self, cells):
+        """Recompute the rows of the given (employee_id, year) cells
+
+        Cells are processed ``BATCH_SIZE`` at a time, so that every statement
+        reads and writes a bounded number of rows. Cells left without
+        attendances are removed.
+        """
+        cells = sorted({(employee_id, year) for employee_id, year in cells if employee_id and year})
+        if not cells:
+            return
+        self.env['hr.attendance'].flush_model()
+        for batch in split_every(self.BATCH_SIZE, cells, set):
+            self._refresh_batch(batch)
+        self.invalidate_model()
+
+    @api.model
+    def _refresh_batch(self, cells):
+        """Recompute the rows of a set of at most ``BATCH_SIZE`` cells"""
+        employee_ids = sorted({employee_id for employee_id, _year in cells})
+        years = sorted({year for _employee_id, year in cells})
+        self.env.cr.execute(SQL(
+            """
+            SELECT employee_id, check_in::date, SUM(GREATEST(worked_hours, 0))
+              FROM hr_attendance
+             WHERE employee_id = ANY(%s) AND check_in >= %s AND check_in < %s
+          GROUP BY 1, 2
+            """,
+            employee_ids, date(years[0], 1, 1), date(years[-1] + 1, 1, 1),
+        ))
+        rows = defaultdict(lambda: [0, array('d', bytes(HOURS_SIZE))])
+        for employee_id, day, worked_hours in self.env.cr.fetchall():
+            if (employee_id, day.year) not in cells:
+                continue
+            row = rows[(employee_id, day.year)]
+            day_index = day.timetuple().tm_yday - 1
+            row[0] |= 1 << day_index
+            row[1][day_index] = worked_hours or 0.0
+
+        self.env.cr.execute(SQL(
+            "DELETE FROM hr_analytics_attendance_year WHERE (employee_id, year) IN %s",
+            tuple(cells),
+        ))
+        if rows:
+            self.env.cr.execute(SQL(
+                "INSERT INTO hr_analytics_attendance_year (employee_id, year, days, hours) VALUES %s",
+                SQL(", ").join(
+                    SQL("(%s, %s, %s, %s)", employee_id, year,
+                        days.to_bytes(YEAR_DAYS // 8 + 1, 'little'), hours.tobytes())
+                    for (employee_id, year), (days, hours) in rows.items()
+                ),
+            ))
+
+    @api.model
+    def _get_day_stats(self, employee_ids, date_from, date_to):
+        """Attendance days and worked hours of employees between two dates
+
+        Args:
+            employee_ids (list): Employee ids
+            date_from (date): First day, included
+            date_to (date): Last day, included
+
+        Returns:
+            dict: {employee_id: (attendance_days, worked_days, worked_hours)}
+                where worked days are the days with positive worked hours
+        """
+        if not employee_ids or date_from > date_to:
+            return {}
+        self.env.cr.execute(SQL(
+            """
+            SELECT employee_id, year, days, hours
+              FROM hr_analytics_attendance_year
+             WHERE employee_id = ANY(%s) AND year BETWEEN %s AND %s
+            """,
+            list(employee_ids), date_from.year, date_to.year,
+        ))
+        stats = defaultdict(lambda: (0, 0, 0.0))
+        for employee_id, year, days, hours in self.env.cr.fetchall():
+            first = (date_from - date(year, 1, 1)).days if year == date_from.year else 0
+            last = (date_to - date(year, 1, 1)).days if year == date_to.year else YEAR_DAYS - 1
+            mask = ((1 << (last - first + 1)) - 1) << first
+            daily_hours = array('d')
+            daily_hours.frombytes(bytes(hours))
+            window = [value for value in daily_hours[first:last + 1] if value > 0]
+            attendance_days, worked_days, worked_hours = stats[employee_id]
+            stats[employee_id] = (
+                attendance_days + (int.from_bytes(bytes(days), 'little') & mask).bit_count(),
+                worked_days + len(window),
+                worked_hours + sum(window),
+            )
+        return dict(stats)
+
+    @api.model
+    def _get_window_stats(self, employee_ids, date_from):
+        """Attendance days and worked hours of employees since a datetime
+
+        Same figures as grouping the attendances with ``check_in >=
+        date_from`` by UTC check-in day: the whole days after the one of
+        ``date_from`` are read from the rows, the attendances of that first,
+        partial day are aggregated by an exact query on the check-in index.
+
+        Args:
+            employee_ids (list): Employee ids
+            date_from (datetime|date): Start of the window, included; a date
+                starts the window at midnight
+
+        Returns:
+            dict: {employee_id: (attendance_days, worked_days, worked_hours)}
+        """
+        if not employee_ids:
+            return {}
+        if not isinstance(date_from, datetime):
+            return self._get_day_stats(employee_ids, date_from, date.max)
+        first_day = date_from.date()
+        next_day = first_day + timedelta(days=1)
+        stats = defaultdict(lambda: (0, 0, 0.0), self._get_day_stats(employee_ids, next_day, date.max))
+        self.env['hr.attendance'].flush_model(['employee_id', 'check_in', 'worked_hours'])
+        self.env.cr.execute(SQL(
+            """
+            SELECT employee_id, SUM(worked_hours) FILTER (WHERE worked_hours > 0)
+              FROM hr_attendance
+             WHERE employee_id = ANY(%s) AND check_in >= %s AND check_in < %s
+          GROUP BY employee_id
+            """,
+            list(employee_ids), date_from, next_day,
+        ))
+        for employee_id, worked_hours in self.env.cr.fetchall():
+            attendance_days, worked_days, hours = stats[employee_id]
+            stats[employee_id] = (
+                attendance_days + 1,
+                worked_days + (1 if worked_hours else 0),
+                hours + (worked_hours or 0.0),
+            )
+        return dict(stats)
@@ -0,0 +1,221 @@
+# -*- coding: utf-8 -*-
+
+import logging
+from collections import defaultdict
+from datetime import timedelta
+
+from odoo import models, fields, api
+from odoo.tools import SQL
+
+from .hr_analytics_source_mixin import UNLINK_COUNTER
+from ..tools.cohort_index import NO_DEPARTMENT, TENURE_BUCKETS, CohortIndex, cohort_indexes
+from ..tools.replica import REPLICA_CONTEXT_KEY
+
+_logger = logging.getLogger(__name__)
+
+
+class HRAnalyticsCohort(models.AbstractModel):
+    """Hire, departure and retention figures from the in-memory cohort index
+
+    The index holds one compact entry per employee (hire day, last day of
+    employment, company and department history), built once per worker and
+    database from employees and their contracts. Every call compares the
+    change marks of both tables with the ones of the index: only employees
+    written since are reloaded, deletions rebuild it.
+
+    Hire day is the start of the first running or closed contract (the
+    creation date without contract), the department history follows the
+    contracts with the current department of the employee from the last
+    one on. The last day of archived employees is their departure date,
+    else the end of their last contract, else their archiving date.
+    """
+    _name = "hr.analytics.cohort"
+    _description = "HR Analytics Cohort Engine"
+
+    # Rows written in this margin before the marks of the index are reloaded
+    # again, for transactions committed after a later one
+    REFRESH_OVERLAP = timedelta(hours=1)
+
+    @api.model
+    def _get_index(self):
+        """Return the up to date cohort index of the database (shared, read only)"""
+        marks = self._get_marks()
+        # The replica has its own index, its marks lagging the primary ones
+        key = f'{self.env.cr.dbname}:replica' if self.env.context.get(REPLICA_CONTEXT_KEY) else self.env.cr.dbname
+        with cohort_indexes.lock(key):
+            index, index_marks = cohort_indexes.get(key)
+            if index is not None and index_marks == marks:
+                return index
+            written = index_marks and [index_marks[model] for model in ('hr.employee', 'hr.contract') if index_marks[model]]
+            # Marks moving backwards come from an index built on rolled back changes
+            rolled_back = index_marks and any(
+                index_marks[model] and (not marks[model] or marks[model] < index_marks[model])
+                for model in ('hr.employee', 'hr.contract')
+            )
+            # Counters moving alone come from a transaction committed after a
+            # later one, whose rows may predate the refresh overlap
+            late_commit = index_marks and index_marks['versions'] != marks['versions'] and all(
+                index_marks[model] == marks[model] for model in ('hr.employee', 'hr.contract')
+            )
+            if (index is None or index_marks['unlink'] != marks['unlink'] or not written
+                    or rolled_back or late_commit):
+                index = self._build_index(CohortIndex())
+                _logger.info("HR Analytics cohort index built: %s employees", len(index))
+            else:
+                index = self._build_index(index.copy(), min(written) - self.REFRESH_OVERLAP)
+            cohort_indexes.set(key, index, marks)
+        return index
+
+    @api.model
+    def _get_marks(self):
+        """Max ``write_date`` of employees and contracts, plus the change counters
+
+        The write dates select the employees to reload; the committed
+        change counters also tell about the transactions committed after
+        a later one, whose write dates do not move the marks.
+        """
+        self.env['hr.employee'].flush_model()
+        self.env['hr.contract'].flush_model()
+        self.env.cr.execute(SQL("""
+            SELECT (SELECT MAX(write_date) FROM hr_employee),
+                   (SELECT MAX(write_date) FROM hr_contract)
+        """))
+        employee_mark, contract_mark = self.env.cr.fetchone()
+        versions = self.env['hr.analytics.source.mixin']._hr_analytics_get_data_versions()
+        return {
+            'hr.employee': employee_mark,
+            'hr.contract': contract_mark,
+            'versions': (versions.get('hr.employee', 0), versions.get('hr.contract', 0)),
+            'unlink': versions.get(UNLINK_COUNTER, 0),
+        }
+
+    @api.model
+    def _build_index(self, index, since=None):
+        """Load the employees into the index, only the ones changed since ``since`` if given"""
+        where = SQL("TRUE")
+        if since:
+            where = SQL(
+                "e.write_date >= %s OR e.id IN (SELECT employee_id FROM hr_contract WHERE write_date >= %s)",
+                since, since,
+            )
+        self.env.cr.execute(SQL(
+            """
+            SELECT e.id, e.company_id, e.department_id, e.active, e.departure_date,
+                   e.create_date::date, e.write_date::date
+              FROM hr_employee e
+             WHERE %s
+            """,
+            where,
+        ))
+        employees = self.env.cr.fetchall()
+        if not employees:
+            return index
+
+        self.env.cr.execute(SQL(
+            """
+            SELECT employee_id, date_start, date_end, department_id
+              FROM hr_contract
+             WHERE employee_id = ANY(%s) AND state IN ('open', 'close') AND date_start IS NOT NULL
+          ORDER BY employee_id, date_start, id
+            """,
+            [row[0] for row in employees],
+        ))
+        contracts = defaultdict(list)
+        for employee_id, date_start, date_end, department_id in self.env.cr.fetchall():
+            contracts[employee_id].append((date_start, date_end, department_id))
+
+        for employee_id, company_id, department_id, active, departure_date, created, written in employees:
+            employee_contracts = contracts.get(employee_id, [])
+            hire = employee_contracts[0][0] if employee_contracts else created
+            history = [(date_start, contract_department_id) for date_start, _end, contract_department_id in employee_contracts]
+            if history:
+                history[-1] = (history[-1][0], department_id)
+            else:
+                history = [(hire, department_id)]
+            departure = None
+            if not active:
+                last_contract_end = employee_contracts and employee_contracts[-1][1]
+                departure = departure_date or last_contract_end or written
+            index.set_employee(employee_id, hire, departure, company_id, history)
+        return index
+
+    @api.model
+    def _get_turnover(self, date_from, date_to, department_ids=None):
+        """Hires, departures and turnover of a period for the allowed companies
+
+        Turnover is the number of departures over the average of the
+        headcounts on the first and last days, in percent.
+
+        Args:
+            department_ids (list, optional): Restrict to these departments
+
+        Returns:
+            dict: headcount_start, headcount_end, hires, departures and
+                turnover_rate
+        """
+        counts = self._get_index().period_counts(date_from, date_to, self.env.companies.ids)
+        totals = [0, 0, 0, 0]
+        for department_id, department_counts in counts.items():
+            if department_ids is None or department_id in department_ids:
+                totals = [total + count for total, count in zip(totals, department_counts)]
+        return self._turnover_dict(totals)
+
+    @api.model
+    def _get_department_turnover_rates(self, date_from, date_to):
+        """Return {department_id: turnover rate} of a period, for all departments"""
+        counts = self._get_index().period_counts(date_from, date_to, self.env.companies.ids)
+        return {
+            department_id: self._turnover_dict(department_counts)['turnover_rate']
+            for department_id, department_counts in counts.items()
+            if department_id != NO_DEPARTMENT
+        }
+
+    @api.model
+    def _turnover_dict(self, counts):
+        headcount_start, headcount_end, hires, departures = counts
+        average_headcount = (headcount_start + headcount_end) / 2
+        return {
+            'headcount_start': headcount_start,
+            'headcount_end': headcount_end,
+            'hires': hires,
+            'departures': departures,
+            'turnover_rate': departures / average_headcount * 100 if average_headcount else 0.0,
+        }
+
+    @api.model
+    def _get_retention_curve(self, cohort_from, cohort_to, months, department_ids=None):
+        """Monthly retention of the employees hired between two dates
+
+        Returns:
+            list: [{'month', 'eligible', 'retained', 'retention_rate'}] for
+                months 0 to ``months`` after hire, month ``k`` only counting
+                the employees hired at least ``k`` months ago
+        """
+        curve = self._get_index().retention_curve(
+            cohort_from, cohort_to, months, fields.Date.context_today(self),
+            set(department_ids) if department_ids is not None else None, self.env.companies.ids,
+        )
+        return [
+            {
+                'month': month,
+                'eligible': eligible,
+                'retained': retained,
+                'retention_rate': round(retained / eligible * 100, 2) if eligible else 0.0,
+            }
+            for month, (eligible, retained) in enumerate(curve)
+        ]
+
+    @api.model
+    def _get_tenure_distribution(self, day, department_ids=None):
+        """Employees employed on ``day`` per tenure bucket
+
+        Returns:
+            list: [{'tenure', 'count'}] per bucket of ``TENURE_BUCKETS``
+        """
+        counts = self._get_index().tenure_distribution(
+            day, set(department_ids) if department_ids is not None else None, self.env.companies.ids,
+        )
+        return [
+            {'tenure': label, 'count': count}
+            for (label, _lower, _upper), count in zip(TENURE_BUCKETS, counts)
+        ]
@@ -0,0 +1,283 @@
+# -*- coding: utf-8 -*-
+
+import hashlib
+import logging
+from datetime import timedelta
+
+from odoo import models, fields, api, SUPERUSER_ID
+from odoo.tools import SQL, create_unique_index, index_exists
+
+_logger = logging.getLogger(__name__)
+
+# Advisory lock held by the transaction processing the refresh queue
+QUEUE_LOCK_ID = int.from_bytes(hashlib.sha1(b'hr_analytics_daily_queue').digest()[:8], 'big', signed=True)
+
+
+class HRAnalyticsDaily(models.Model):
+    """Materialized per-day, per-department attendance and leave aggregates
+
+    Rows are maintained incrementally and can be rebuilt for any period
+    with ``_rebuild``. The attendance, leave and employee hooks only append
+    the cells they affect to the ``hr_analytics_daily_queue`` table: the
+    cells are refreshed after commit, outside of the writing transaction,
+    so concurrent check-ins never wait for each other on a shared row.
+    Rows are written with SQL only, hence no access log columns.
+    """
+    _name = "hr.analytics.daily"
+    _description = "HR Analytics Daily Aggregate"
+    _order = "date desc"
+    _log_access = False
+
+    # Queued cells refreshed per transaction by _process_queue
+    QUEUE_BATCH_SIZE = 1000
+
+    date = fields.Date(string="Date", required=True, index=True, readonly=True)
+    company_id = fields.Many2one("res.company", string="Company", readonly=True)
+    department_id = fields.Many2one("hr.department", string="Department", readonly=True)
+    attendance_count = fields.Integer(
+        string="Attendances",
+        readonly=True,
+        help="Attendances checked in that day with worked hours"
+    )
+    worked_hours = fields.Float(string="Worked Hours", readonly=True)
+    employee_count = fields.Integer(
+        string="Employees Present",
+        readonly=True,
+        help="Distinct employees with worked hours that day"
+    )
+    leave_count = fields.Integer(
+        string="Leaves Started",
+        readonly=True,
+        help="Validated leaves starting that day"
+    )
+
+    def init(self):
+        self.env.cr.execute(SQL("""
+            CREATE TABLE IF NOT EXISTS hr_analytics_daily_queue (
+                id serial PRIMARY KEY,
+                date date NOT NULL,
+                department_id integer NOT NULL
+            )
+        """))
+        if not index_exists(self.env.cr, 'hr_analytics_daily_cell_uniq'):
+            create_unique_index(
+                self.env.cr, 'hr_analytics_daily_cell_uniq', self._table,
+                ['date', 'COALESCE(company_id, 0)', 'COALESCE(department_id, 0)'],
+            )
+
+    @api.model
+    def _rebuild(self, date_from=None, date_to=None):
+        """Recompute all aggregates, optionally limited to a date range (backfills)"""
+        _logger.info("Rebuilding HR analytics daily aggregates from %s to %s", date_from, date_to)
+        self._refresh(date_from=date_from, date_to=date_to)
+        return True
+
+    @api.model
+    def _queue_cells(self, cells):
+        """Queue the given (date, department_id) cells for a refresh after commit
+
+        The cells of the transaction are refreshed once it is committed, in
+        a separate transaction; cells left over (refresh failed or the
+        worker stopped) are refreshed by the "HR Analytics: Refresh Daily
+        Aggregates" scheduled action.
+        """
+        cells = sorted({(day, department_id or 0) for day, department_id in cells if day})
+        if not cells:
+            return
+        self.env.cr.execute(SQL(
+            """
+            INSERT INTO hr_analytics_daily_queue (date, department_id)
+            SELECT * FROM unnest(%s::date[], %s::int[])
+            """,
+            [day for day, _department_id in cells], [department_id for _day, department_id in cells],
+        ))
+        postcommit = self.env.cr.postcommit
+        if not postcommit.data.get('hr_analytics.daily_queue'):
+            postcommit.data['hr_analytics.daily_queue'] = True
+            registry = self.env.registry
+
+            def process_queue():
+                try:
+                    with registry.cursor() as cr:
+                        api.Environment(cr, SUPERUSER_ID, {})['hr.analytics.daily']._process_queue()
+                except Exception:
+                    _logger.exception("HR Analytics daily aggregates not refreshed, left to the scheduled action")
+            postcommit.add(process_queue)
+
+    @api.model
+    def _process_queue(self):
+        """Refresh the queued cells, committing after each batch
+
+        Only one transaction processes the queue at a time; when another
+        one does, the scheduled action is triggered for the cells it may
+        have missed.
+
+        Returns:
+            bool: whether the queue was emptied
+        """
+        while True:
+            count = self._process_queue_batch()
+            if count is None:
+                self.env.cr.rollback()
+                self.env.ref('hr_analytics_dashboard.ir_cron_hr_analytics_daily_queue')._trigger(
+                    fields.Datetime.now() + timedelta(minutes=1),
+                )
+                self.env.cr.commit()
+                return False
+            self.env.cr.commit()
+            if not count:
+                return True
+
+    @api.model
+    def _process_queue_batch(self):
+        """Refresh up to ``QUEUE_BATCH_SIZE`` queued cells in the current transaction
+
+        Returns:
+            int: number of cells refreshed, None when the queue is being
+                processed by another transaction
+        """
+        # First statement of the transaction: the cells refreshed by the
+        # previous holder of the lock are visible to the snapshot
+        self.env.cr.execute(SQL("SELECT pg_try_advisory_xact_lock(%s)", QUEUE_LOCK_ID))
+        if not self.env.cr.fetchone()[0]:
+            return None
+        self.env.cr.execute(SQL(
+            """
+            DELETE FROM hr_analytics_daily_queue
+             WHERE id IN (SELECT id FROM hr_analytics_daily_queue ORDER BY id LIMIT %s)
+         RETURNING date, department_id
+            """,
+            self.QUEUE_BATCH_SIZE,
+        ))
+        cells = set(self.env.cr.fetchall())
+        self._refresh_cells(cells)
+        return len(cells)
+
+    @api.model
+    def _cron_process_queue(self):
+        """Refresh the cells left in the queue"""
+        self._process_queue()
+
+    @api.model
+    def _refresh_cells(self, cells):
+        """Recompute the aggregates of the given (date, department_id) cells
+
+        Cells whose source rows are gone are removed.
+        """
+        cells = {(day, department_id or 0) for day, department_id in cells if day}
+        if not cells:
+            return
+        self._refresh(
+            days=sorted({day for day, _department_id in cells}),
+            department_ids=sorted({department_id for _day, department_id in cells}),
+        )
+
+    @api.model
+    def _refresh(self, date_from=None, date_to=None, days=None, department_ids=None):
+        """Replace the aggregate rows matching the given scope with fresh ones
+
+        The scope is expressed on the raw date (or check-in timestamp) and
+        department columns, as half-open day ranges and plain equalities,
+        so that refreshing a few cells is a few index range scans.
+        """
+        for model in ('hr.attendance', 'hr.leave', 'hr.employee'):
+            self.env[model].flush_model()
+        date_from, date_to = fields.Date.to_date(date_from), fields.Date.to_date(date_to)
+
+        def scope(date_expr, department_expr):
+            conditions = [SQL("TRUE")]
+            if date_from:
+                conditions.append(SQL("%s >= %s", date_expr, date_from))
+            if date_to:
+                conditions.append(SQL("%s < %s", date_expr, date_to + timedelta(days=1)))
+            if days is not None:
+                conditions.append(SQL("(%s)", SQL(" OR ").join(
+                    SQL("(%s >= %s AND %s < %s)", date_expr, first, date_expr, last + timedelta(days=1))
+                    for first, last in self._get_day_ranges(days)
+                ) or SQL("FALSE")))
+            if department_ids is not None:
+                department_conditions = []
+                ids = sorted(department_id for department_id in department_ids if department_id)
+                if ids:
+                    department_conditions.append(SQL("%s = ANY(%s)", department_expr, ids))
+                if 0 in department_ids:
+                    department_conditions.append(SQL("%s IS NULL", department_expr))
+                conditions.append(SQL("(%s)", SQL(" OR ").join(department_conditions) or SQL("FALSE")))
+            return SQL(" AND ").join(conditions)
+
+        self.env.cr.execute(SQL(
+            "DELETE FROM hr_analytics_daily WHERE %s",
+            scope(SQL("date"), SQL("department_id")),
+        ))
+        self.env.cr.execute(SQL("""
+            INSERT INTO hr_analytics_daily (
+                date, company_id, department_id,
+                attendance_count, worked_hours, employee_count, leave_count
+            )
+            SELECT day, company_id, department_id,
+                   SUM(attendance_count), SUM(worked_hours), SUM(employee_count), SUM(leave_count)
+              FROM (
+                    SELECT a.check_in::date AS day, e.company_id, a.department_id,
+                           COUNT(*) AS attendance_count,
+                           SUM(a.worked_hours) AS worked_hours,
+                           COUNT(DISTINCT a.employee_id) AS employee_count,
+                           0 AS leave_count
+                      FROM hr_attendance a
+                      JOIN hr_employee e ON e.id = a.employee_id
+                     WHERE a.worked_hours > 0 AND %s
+                  GROUP BY 1, 2, 3
+                 UNION ALL
+                    SELECT l.request_date_from, e.company_id, e.department_id,
+                           0, 0, 0, COUNT(*)
+                      FROM hr_leave l
+                      JOIN hr_employee e ON e.id = l.employee_id
+                     WHERE l.state = 'validate' AND %s
+                  GROUP BY 1, 2, 3
+                   ) cells
+          GROUP BY day, company_id, department_id
+            ON CONFLICT (date, COALESCE(company_id, 0), COALESCE(department_id, 0))
+            DO UPDATE SET attendance_count = EXCLUDED.attendance_count,
+                          worked_hours = EXCLUDED.worked_hours,
+                          employee_count = EXCLUDED.employee_count,
+                          leave_count = EXCLUDED.leave_count
+            """,
+            scope(SQL("a.check_in"), SQL("a.department_id")),
+            scope(SQL("l.request_date_from"), SQL("e.department_id")),
+        ))
+        self.invalidate_model()
+
+    @api.model
+    def _get_day_ranges(self, days):
+        """Merge days into (first, last) ranges of consecutive days"""
+        ranges = []
+        for day in sorted(set(days)):
+            if ranges and day - ranges[-1][1] == timedelta(days=1):
+                ranges[-1][1] = day
+            else:
+                ranges.append([day, day])
+        return [tuple(day_range) for day_range in ranges]
+
+    @api.model
+    def _refresh_employees(self, employees, department_ids):
+        """Queue every cell the employees' attendances and leaves fall in
+
+        Used when employees move between departments or companies, with the
+        departments they left and joined.
+        """
+        if not employees:
+            return
+        for model in ('hr.attendance', 'hr.leave'):
+            self.env[model].flush_model()
+        self.env.cr.execute(SQL("""
+            SELECT check_in::date FROM hr_attendance WHERE employee_id = ANY(%s)
+             UNION
+            SELECT request_date_from FROM hr_leave WHERE employee_id = ANY(%s)
+            """,
+            employees.ids, employees.ids,
+        ))
+        days = [row[0] for row in self.env.cr.fetchall() if row[0]]
+        self._queue_cells(
+            (day, department_id)
+            for day in days
+            for department_id in {department_id or 0 for department_id in department_ids}
+        )
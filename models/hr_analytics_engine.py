@@ -0,0 +1,334 @@
+# -*- coding: utf-8 -*-
+
+from collections import defaultdict
+
+from odoo import models, api
+
+from .hr_analytics_source_mixin import UNLINK_COUNTER
+
+# Key of the company-wide figures in the engine results
+COMPANY_WIDE = False
+
+# Metrics computed for every key, in reporting order
+METRICS = (
+    'total_employees',
+    'total_inactive_employees',
+    'turnover_rate',
+    'avg_salary',
+    'total_salary_cost',
+    'total_leaves',
+    'avg_leaves_per_employee',
+    'total_worked_hours',
+    'avg_daily_hours',
+    'avg_kpi_score',
+)
+
+# Models whose changes affect the analytics figures
+SOURCE_MODELS = ('hr.employee', 'hr.contract', 'hr.leave', 'hr.attendance', 'hr.department')
+
+
+class HRAnalyticsEngine(models.AbstractModel):
+    """Batched metric computation for many departments at once
+
+    Every metric family is answered by a constant number of grouped queries,
+    whatever the number of departments. Results are keyed by department id,
+    with ``COMPANY_WIDE`` holding the figures over all departments.
+    """
+    _name = "hr.analytics.engine"
+    _description = "HR Analytics Engine"
+
+    @api.model
+    def _compute_department_metrics(self, department_ids, date_from, date_to, company=None):
+        """Compute all analytics metrics for the departments and company-wide
+
+        Args:
+            department_ids (list): Department ids to report on
+            date_from (date): Start of the leave and attendance window
+            date_to (date): End of the leave and attendance window
+            company (res.company, optional): Restrict to one company
+
+        Returns:
+            dict: {department_id or COMPANY_WIDE: {metric: value}}
+        """
+        keys = [COMPANY_WIDE] + list(department_ids)
+        employee_stats = self._get_employee_metrics(company)
+        salary_stats = self._get_salary_metrics(company)
+        leave_stats = self._get_leave_metrics(date_from, date_to, company)
+        attendance_stats = self._get_attendance_metrics(date_from, date_to, company)
+        kpi_stats = self._get_kpi_metrics(department_ids, company)
+
+        return {
+            key: self._build_metrics(key, employee_stats, salary_stats, leave_stats, attendance_stats, kpi_stats)
+            for key in keys
+        }
+
+    @api.model
+    def _compute_comparison_metrics(self, department_ids, company_ids, date_from, date_to):
+        """Compute all analytics metrics for many departments and companies
+
+        Departments and companies are answered together by a constant
+        number of grouped queries: one over employees, one over contracts
+        and four over the daily aggregates, whatever the number of rows.
+
+        Args:
+            department_ids (list): Department ids to report on
+            company_ids (list): Company ids to report on, the data is
+                restricted to them
+            date_from (date): Start of the leave and attendance window
+            date_to (date): End of the leave and attendance window
+
+        Returns:
+            dict: {('company', id) or ('department', id): {metric: value}}
+        """
+        keys = [('company', company_id) for company_id in company_ids]
+        keys += [('department', department_id) for department_id in department_ids]
+        employee_stats, kpi_stats = self._get_comparison_employee_metrics(company_ids)
+        salary_stats = self._get_comparison_salary_metrics(company_ids)
+        leave_stats, attendance_stats = self._get_comparison_daily_metrics(date_from, date_to, company_ids)
+        return {
+            key: self._build_metrics(key, employee_stats, salary_stats, leave_stats, attendance_stats, kpi_stats)
+            for key in keys
+        }
+
+    @api.model
+    def _build_metrics(self, key, employee_stats, salary_stats, leave_stats, attendance_stats, kpi_stats):
+        """Derive the metrics of one key from the grouped figures"""
+        active, inactive = employee_stats.get(key, (0, 0))
+        total = active + inactive
+        total_leaves = leave_stats.get(key, 0)
+        worked_hours, worked_days = attendance_stats.get(key, (0.0, 0))
+        return {
+            'total_employees': active,
+            'total_inactive_employees': inactive,
+            'turnover_rate': (inactive / total * 100) if total > 0 else 0.0,
+            **salary_stats.get(key, {'avg_salary': 0.0, 'total_salary_cost': 0.0}),
+            'total_leaves': total_leaves,
+            'avg_leaves_per_employee': total_leaves / active if active > 0 else 0.0,
+            'total_worked_hours': worked_hours,
+            'avg_daily_hours': worked_hours / worked_days if worked_days > 0 else 0.0,
+            'avg_kpi_score': kpi_stats.get(key, 0.0),
+        }
+
+    @api.model
+    def _get_data_marks(self):
+        """Return a change mark per source model, plus the unlink version
+
+        Marks are the committed change counters of the source models, read
+        in a single query; they move once the transactions creating,
+        writing or deleting records are committed.
+
+        Returns:
+            dict: {model_name: mark, 'unlink': version}
+        """
+        versions = self.env['hr.analytics.source.mixin']._hr_analytics_get_data_versions()
+        marks = {model: versions.get(model, 0) for model in SOURCE_MODELS}
+        marks['unlink'] = versions.get(UNLINK_COUNTER, 0)
+        return marks
+
+    @api.model
+    def _company_domain(self, company, field='company_id'):
+        return [(field, '=', company.id)] if company else []
+
+    @api.model
+    def _get_employee_metrics(self, company=None):
+        """Return {key: (active_count, inactive_count)}"""
+        groups = self.env['hr.employee'].with_context(active_test=False)._read_group(
+            self._company_domain(company),
+            groupby=['department_id', 'active'],
+            aggregates=['__count'],
+        )
+        counts = defaultdict(lambda: [0, 0])
+        for department, active, count in groups:
+            for key in (department.id, COMPANY_WIDE) if department else (COMPANY_WIDE,):
+                counts[key][0 if active else 1] += count
+        return {key: tuple(value) for key, value in counts.items()}
+
+    @api.model
+    def _get_salary_metrics(self, company=None, include_zero_wages=False):
+        """Return {key: {'avg_salary', 'total_salary_cost'}} for open contracts
+
+        Averages ignore the contracts without wage unless ``include_zero_wages``.
+        """
+        aggregates = self.env['hr.contract']._get_salary_aggregates(
+            domain=self._company_domain(company),
+            include_zero_wages=include_zero_wages,
+        )
+        salary_stats = {
+            COMPANY_WIDE: {'avg_salary': aggregates['avg'], 'total_salary_cost': aggregates['total']},
+        }
+        for dept in aggregates['departments']:
+            salary_stats[dept['department_id']] = {
+                'avg_salary': dept['avg'],
+                'total_salary_cost': dept['total'],
+            }
+        return salary_stats
+
+    @api.model
+    def _get_daily_domain(self, date_from, date_to, company=None):
+        return [
+            ('date', '>=', date_from),
+            ('date', '<=', date_to),
+        ] + self._company_domain(company)
+
+    @api.model
+    def _get_leave_metrics(self, date_from, date_to, company=None):
+        """Return {key: validated leaves started in the window}"""
+        groups = self.env['hr.analytics.daily']._read_group(
+            self._get_daily_domain(date_from, date_to, company) + [('leave_count', '>', 0)],
+            groupby=['department_id'],
+            aggregates=['leave_count:sum'],
+        )
+        leave_stats = {COMPANY_WIDE: 0}
+        for department, count in groups:
+            if department:
+                leave_stats[department.id] = count
+            leave_stats[COMPANY_WIDE] += count
+        return leave_stats
+
+    @api.model
+    def _get_attendance_metrics(self, date_from, date_to, company=None):
+        """Return {key: (worked_hours, distinct_days_with_attendance)}"""
+        Daily = self.env['hr.analytics.daily']
+        domain = self._get_daily_domain(date_from, date_to, company) + [('attendance_count', '>', 0)]
+        groups = Daily._read_group(
+            domain,
+            groupby=['department_id'],
+            aggregates=['worked_hours:sum', 'date:count_distinct'],
+        )
+        attendance_stats = {
+            department.id: (hours, days)
+            for department, hours, days in groups
+            if department
+        }
+        # Distinct days do not add up across departments
+        [(hours, days)] = Daily._read_group(
+            domain,
+            aggregates=['worked_hours:sum', 'date:count_distinct'],
+        )
+        attendance_stats[COMPANY_WIDE] = (hours or 0.0, days or 0)
+        return attendance_stats
+
+    @api.model
+    def _get_kpi_metrics(self, department_ids, company=None, company_wide=True):
+        """Return {key: average KPI score of active employees}
+
+        Scores are stored, so this is one grouped aggregate. Only the given
+        departments are read when the company-wide average is not needed.
+        """
+        domain = [('active', '=', True)] + self._company_domain(company)
+        if not company_wide:
+            domain.append(('department_id', 'in', list(department_ids)))
+        groups = self.env['hr.employee']._read_group(
+            domain, groupby=['department_id'], aggregates=['kpi_score:sum', '__count'],
+        )
+
+        kpi_stats = {}
+        wanted = set(department_ids)
+        total_score = total_count = 0
+        for department, score_sum, count in groups:
+            total_score += score_sum or 0.0
+            total_count += count
+            if department.id in wanted and count:
+                kpi_stats[department.id] = (score_sum or 0.0) / count
+        if company_wide and total_count:
+            kpi_stats[COMPANY_WIDE] = total_score / total_count
+        return kpi_stats
+
+    @api.model
+    def _get_comparison_employee_metrics(self, company_ids):
+        """Return ({key: (active, inactive)}, {key: average KPI score})
+
+        Keys are ('company', id) and ('department', id), from one pass.
+        """
+        groups = self.env['hr.employee'].with_context(active_test=False)._read_group(
+            [('company_id', 'in', company_ids)],
+            groupby=['company_id', 'department_id', 'active'],
+            aggregates=['__count', 'kpi_score:sum'],
+        )
+        counts = defaultdict(lambda: [0, 0])
+        kpi_sums = defaultdict(float)
+        for company, department, active, count, kpi_sum in groups:
+            keys = [('company', company.id)]
+            if department:
+                keys.append(('department', department.id))
+            for key in keys:
+                counts[key][0 if active else 1] += count
+                if active:
+                    kpi_sums[key] += kpi_sum or 0.0
+        employee_stats = {key: tuple(value) for key, value in counts.items()}
+        kpi_stats = {key: kpi_sums[key] / active for key, (active, _inactive) in employee_stats.items() if active}
+        return employee_stats, kpi_stats
+
+    @api.model
+    def _get_comparison_salary_metrics(self, company_ids):
+        """Return {key: {'avg_salary', 'total_salary_cost'}} for open contracts"""
+        totals = self.env['hr.contract']._get_salary_totals([('company_id', 'in', company_ids)])
+        salary_stats = {}
+        for kind, kind_totals in (('company', totals['companies']), ('department', totals['departments'])):
+            for record_id, (total, avg) in kind_totals.items():
+                salary_stats[(kind, record_id)] = {'avg_salary': avg, 'total_salary_cost': total}
+        return salary_stats
+
+    @api.model
+    def _get_comparison_daily_metrics(self, date_from, date_to, company_ids):
+        """Return ({key: leaves}, {key: (worked_hours, distinct_days)})
+
+        Distinct days do not add up across departments, so companies and
+        departments are grouped separately.
+        """
+        Daily = self.env['hr.analytics.daily']
+        domain = [
+            ('date', '>=', date_from),
+            ('date', '<=', date_to),
+            ('company_id', 'in', company_ids),
+        ]
+        leave_stats = {}
+        attendance_stats = {}
+        for kind, groupby in (('company', 'company_id'), ('department', 'department_id')):
+            groups = Daily._read_group(
+                domain + [('leave_count', '>', 0)],
+                groupby=[groupby],
+                aggregates=['leave_count:sum'],
+            )
+            leave_stats.update({(kind, record.id): count for record, count in groups if record})
+            groups = Daily._read_group(
+                domain + [('attendance_count', '>', 0)],
+                groupby=[groupby],
+                aggregates=['worked_hours:sum', 'date:count_distinct'],
+            )
+            attendance_stats.update({(kind, record.id): (hours, days) for record, hours, days in groups if record})
+        return leave_stats, attendance_stats
+
+    @api.model
+    def _get_comparison_trends(self, date_from, date_to, company_ids):
+        """Return monthly worked hours, attendances and leaves per key
+
+        Sums add up, so one pass grouped by company, department and month
+        answers both levels.
+
+        Returns:
+            dict: {key: {month (date): (worked_hours, attendance_count, leave_count)}}
+        """
+        groups = self.env['hr.analytics.daily']._read_group(
+            [
+                ('date', '>=', date_from),
+                ('date', '<=', date_to),
+                ('company_id', 'in', company_ids),
+            ],
+            groupby=['company_id', 'department_id', 'date:month'],
+            aggregates=['worked_hours:sum', 'attendance_count:sum', 'leave_count:sum'],
+        )
+        trends = defaultdict(lambda: defaultdict(lambda: [0.0, 0, 0]))
+        for company, department, month, hours, attendances, leaves in groups:
+            keys = [('company', company.id)]
+            if department:
+                keys.append(('department', department.id))
+            for key in keys:
+                totals = trends[key][month]
+                totals[0] += hours or 0.0
+                totals[1] += attendances or 0
+                totals[2] += leaves or 0
+        return {
+            key: {month: tuple(totals) for month, totals in months.items()}
+            for key, months in trends.items()
+        }
@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+
+from datetime import timedelta
+
+from odoo import models, api
+from odoo.tools import SQL
+
+# Column headers of each exportable dataset
+EXPORT_DATASETS = {
+    'employees': (
+        'employee_id', 'employee', 'department_id', 'department',
+        'kpi_score', 'current_salary', 'total_leaves_ytd', 'avg_daily_hours',
+    ),
+    'attendance': (
+        'employee_id', 'employee', 'date', 'attendance_count', 'worked_hours',
+    ),
+    'daily': (
+        'date', 'company_id', 'department_id', 'department',
+        'attendance_count', 'worked_hours', 'employee_count', 'leave_count',
+    ),
+}
+
+
+class HRAnalyticsExport(models.AbstractModel):
+    """Row producers for the streaming analytics export
+
+    Each dataset is produced as successive batches of rows so that exports
+    run in constant memory: employees are paged by id and analytics are
+    computed per page, SQL datasets are read through a server-side cursor.
+    """
+    _name = "hr.analytics.export"
+    _description = "HR Analytics Export"
+
+    BATCH_SIZE = 2000
+
+    @api.model
+    def _iter_batches(self, dataset, department_id=None, date_from=None, date_to=None):
+        """Yield lists of rows of the dataset, in EXPORT_DATASETS column order"""
+        if dataset == 'employees':
+            return self._iter_employee_batches(department_id)
+        if dataset == 'attendance':
+            return self._iter_attendance_batches(department_id, date_from, date_to)
+        if dataset == 'daily':
+            return self._iter_daily_batches(department_id, date_from, date_to)
+        raise ValueError(f"Unknown export dataset: {dataset}")
+
+    @api.model
+    def _iter_employee_batches(self, department_id=None):
+        """Per-employee analytics, computed one page of employees at a time"""
+        domain = [('active', '=', True)]
+        if department_id:
+            domain.append(('department_id', '=', department_id))
+        last_id = 0
+        while True:
+            employees = self.env['hr.employee'].search(
+                domain + [('id', '>', last_id)], order='id', limit=self.BATCH_SIZE
+            )
+            if not employees:
+                return
+            yield [
+                (
+                    employee.id,
+                    employee.name,
+                    employee.department_id.id or '',
+                    employee.department_id.name or '',
+                    round(employee.kpi_score, 2),
+                    round(employee.current_salary, 2),
+                    employee.total_leaves_ytd,
+                    round(employee.avg_daily_hours, 2),
+                )
+                for employee in employees
+            ]
+            last_id = employees[-1].id
+            # Keep the memory flat across pages
+            self.env.invalidate_all()
+
+    @api.model
+    def _iter_attendance_batches(self, department_id=None, date_from=None, date_to=None):
+        """Per-employee, per-day attendance totals"""
+        domain = [('worked_hours', '>', 0)]
+        if date_from:
+            domain.append(('check_in', '>=', date_from))
+        if date_to:
+            domain.append(('check_in', '<', date_to + timedelta(days=1)))
+        if department_id:
+            domain.append(('department_id', '=', department_id))
+
+        query = self.env['hr.attendance']._search(domain)
+        employee_alias = query.make_alias(query.table, 'employee_id')
+        query.add_join('JOIN', employee_alias, 'hr_employee', SQL(
+            "%s = %s",
+            SQL.identifier(query.table, 'employee_id'),
+            SQL.identifier(employee_alias, 'id'),
+        ))
+        employee_id = SQL.identifier(query.table, 'employee_id')
+        day = SQL("%s::date", SQL.identifier(query.table, 'check_in'))
+        query.groupby = SQL("%s, %s, %s", employee_id, SQL.identifier(employee_alias, 'name'), day)
+        query.order = SQL("%s, %s", employee_id, day)
+        yield from self._iter_cursor(query.select(
+            employee_id,
+            SQL.identifier(employee_alias, 'name'),
+            day,
+            SQL("COUNT(*)"),
+            SQL("ROUND(SUM(%s)::numeric, 2)", SQL.identifier(query.table, 'worked_hours')),
+        ))
+
+    @api.model
+    def _iter_daily_batches(self, department_id=None, date_from=None, date_to=None):
+        """Per-day, per-department aggregates"""
+        domain = []
+        if date_from:
+            domain.append(('date', '>=', date_from))
+        if date_to:
+            domain.append(('date', '<=', date_to))
+        if department_id:
+            domain.append(('department_id', '=', department_id))
+
+        department_names = {
+            dept['id']: dept['name']
+            for dept in self.env['hr.department'].with_context(active_test=False).search_read([], ['name'])
+        }
+        query = self.env['hr.analytics.daily']._search(domain, order='date, company_id, department_id')
+        columns = (
+            'date', 'company_id', 'department_id',
+            'attendance_count', 'worked_hours', 'employee_count', 'leave_count',
+        )
+        select = query.select(*(SQL.identifier(query.table, column) for column in columns))
+        for rows in self._iter_cursor(select):
+            yield [
+                (day, company_id or '', dept_id or '', department_names.get(dept_id, ''),
+                 attendance_count, round(worked_hours, 2), employee_count, leave_count)
+                for day, company_id, dept_id, attendance_count, worked_hours, employee_count, leave_count in rows
+            ]
+
+    @api.model
+    def _iter_cursor(self, query):
+        """Yield the rows of a query in batches through a server-side cursor"""
+        cr = self.env.cr
+        cr.execute(SQL("DECLARE hr_analytics_export NO SCROLL CURSOR FOR %s", query))
+        try:
+            while True:
+                cr.execute(SQL("FETCH %s FROM hr_analytics_export", self.BATCH_SIZE))
+                rows = cr.fetchall()
+                if not rows:
+                    return
+                yield rows
+        finally:
+            cr.execute(SQL("CLOSE hr_analytics_export"))
@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+
+import hashlib
+import logging
+import threading
+from datetime import timedelta
+
+from psycopg2 import errors
+from psycopg2.pool import PoolError
+
+from odoo import models, fields, api
+from odoo.tools import SQL, config
+
+_logger = logging.getLogger(__name__)
+
+# Budget of flight cursors of the worker process, see _acquire_cursor
+_cursors_lock = threading.Lock()
+_cursors = None
+
+
+class HRAnalyticsFlight(models.Model):
+    """Dashboard result shared with the identical requests computed meanwhile
+
+    The first request of a key computes it while holding a transaction-level
+    advisory lock on a separate cursor, then stores the result here and
+    commits, which releases the lock. Identical requests arriving meanwhile,
+    in any worker process, wait for that lock and read the stored result
+    instead of computing it again; after ``WAIT_TIMEOUT`` seconds, or when
+    the first request failed, they compute it themselves. A request getting
+    the lock always computes its result: stored results are only read by
+    the requests that waited for it and expire after ``WAIT_TIMEOUT``
+    seconds at most, never outliving the dashboard cache TTL; a TTL of 0
+    disables the sharing along with the cache.
+
+    Each request in flight holds a second connection while computing or
+    waiting: at most an eighth of the worker's connection pool
+    (``db_maxconn``) is used this way, requests beyond that compute their
+    result directly on their own cursor.
+    """
+    _name = "hr.analytics.flight"
+    _description = "HR Analytics Shared Result"
+    _log_access = False
+
+    # Seconds identical requests wait for the request computing their result,
+    # also the longest a stored result can be read by them
+    WAIT_TIMEOUT = 5
+
+    key = fields.Char(string="Key", required=True, index=True)
+    result = fields.Json(string="Result")
+    expires_at = fields.Datetime(string="Expires At", required=True, index=True)
+
+    @api.model
+    def _run_once(self, key, compute, ttl):
+        """Return ``compute()``, computed once for the identical calls in flight
+
+        Args:
+            key (str): Identifies identical computations, including the
+                access rights and data versions they depend on
+            compute (callable): Computes the JSON-serializable result on the
+                cursor of the caller
+            ttl (int): Seconds the result may be reused, the dashboard cache
+                TTL; 0 computes every call
+
+        Returns:
+            tuple: (result, shared) where shared tells whether the result
+                was computed by another request
+        """
+        digest = hashlib.sha1(key.encode()).digest()
+        lock_id = int.from_bytes(digest[:8], 'big', signed=True)
+        key = digest.hex()
+        if not ttl:
+            return compute(), False
+        if not self._acquire_cursor():
+            _logger.info("HR Analytics shared results: cursor budget exhausted, computing %s", key)
+            return compute(), False
+        try:
+            return self._run_on_cursor(key, lock_id, compute, min(ttl, self.WAIT_TIMEOUT))
+        finally:
+            self._release_cursor()
+
+    @api.model
+    def _run_on_cursor(self, key, lock_id, compute, lifetime):
+        try:
+            cr = self.env.registry.cursor()
+        except PoolError:
+            return compute(), False
+
+        with cr:
+            flights = self.with_env(self.env(cr=cr, su=True))
+            cr.execute(SQL("SELECT pg_try_advisory_xact_lock(%s)", lock_id))
+            if cr.fetchone()[0]:
+                # Nobody computes this key: compute it, for the requests that
+                # start waiting meanwhile
+                result = compute()
+                flights._store_result(key, result, lifetime)
+                return result, False
+
+            cr.rollback()
+            try:
+                cr.execute(SQL("SET LOCAL lock_timeout = %s", f'{self.WAIT_TIMEOUT * 1000}ms'))
+                cr.execute(SQL("SELECT pg_advisory_xact_lock_shared(%s)", lock_id), log_exceptions=False)
+            except errors.LockNotAvailable:
+                cr.rollback()
+                result = None
+                _logger.info("HR Analytics shared result %s not ready in %ss, computing it", key, self.WAIT_TIMEOUT)
+            else:
+                # Read the stored result in a new snapshot
+                cr.commit()
+                result = flights._get_result(key)
+                if result is None:
+                    _logger.info("HR Analytics shared result %s failed, computing it", key)
+
+        if result is None:
+            return compute(), False
+        return result, True
+
+    @api.model
+    def _acquire_cursor(self):
+        """Reserve a flight cursor of the worker's budget without waiting"""
+        global _cursors
+        with _cursors_lock:
+            if _cursors is None:
+                _cursors = max(int(config['db_maxconn']) // 8, 1)
+            if not _cursors:
+                return False
+            _cursors -= 1
+            return True
+
+    @api.model
+    def _release_cursor(self):
+        global _cursors
+        with _cursors_lock:
+            _cursors += 1
+
+    def _get_result(self, key):
+        flight = self.search([('key', '=', key), ('expires_at', '>', fields.Datetime.now())], limit=1)
+        return flight.result if flight else None
+
+    def _store_result(self, key, result, lifetime):
+        """Store a result for the requests waiting for it, ``lifetime`` seconds"""
+        self.search([('key', '=', key)]).unlink()
+        self.create({
+            'key': key,
+            'result': result,
+            'expires_at': fields.Datetime.now() + timedelta(seconds=lifetime),
+        })
+
+    @api.autovacuum
+    def _gc_results(self):
+        """Delete the expired shared results"""
+        self.search([('expires_at', '<=', fields.Datetime.now())]).unlink()
@@ -0,0 +1,181 @@
+# -*- coding: utf-8 -*-
+
+import logging
+from datetime import timedelta
+
+from odoo import models, fields, api
+from odoo.tools import SQL
+
+from ..tools.request_env import request_env
+
+_logger = logging.getLogger(__name__)
+
+JOB_NOTIFICATION_TYPE = "hr_analytics_dashboard/job"
+
+
+class HRAnalyticsJob(models.Model):
+    """Dashboard request computed in the background
+
+    Long dashboard requests are queued as jobs instead of holding an HTTP
+    worker. A scheduled action computes them one by one in its own
+    transaction, stores the response and notifies the requesting user on
+    the bus; clients can also poll ``/hr_analytics/job``.
+    """
+    _name = "hr.analytics.job"
+    _description = "HR Analytics Background Job"
+    _order = "id desc"
+
+    # Jobs processed per scheduled action run before it triggers itself again
+    BATCH_SIZE = 10
+    # Hours after which finished jobs are deleted and running ones given up
+    RETENTION_HOURS = 24
+
+    state = fields.Selection(
+        [
+            ('queued', 'Queued'),
+            ('running', 'Running'),
+            ('done', 'Done'),
+            ('failed', 'Failed'),
+        ],
+        string="State",
+        required=True,
+        default='queued',
+        index=True
+    )
+    user_id = fields.Many2one("res.users", string="User", required=True, readonly=True, ondelete='cascade')
+    department_id = fields.Many2one("hr.department", string="Department", readonly=True, ondelete='cascade')
+    start_date = fields.Date(string="Start Date", required=True, readonly=True)
+    end_date = fields.Date(string="End Date", required=True, readonly=True)
+    granularity = fields.Char(string="Trend Granularity", readonly=True)
+    include_children = fields.Boolean(string="Include Sub-departments", readonly=True)
+    request_context = fields.Json(string="Request Context", readonly=True, help="Companies, language and timezone of the request")
+    result = fields.Json(string="Result", readonly=True)
+    error = fields.Text(string="Error", readonly=True)
+    started_at = fields.Datetime(string="Started At", readonly=True)
+    finished_at = fields.Datetime(string="Finished At", readonly=True)
+
+    @api.model
+    def _enqueue(self, department_id, start_date, end_date, granularity=None, include_children=False):
+        """Queue a dashboard computation for the current user
+
+        An identical job of the user still queued or running is reused, so
+        clients re-sending the request do not pile up work.
+
+        Returns:
+            hr.analytics.job: the queued or running job
+        """
+        job = self.sudo().search([
+            ('user_id', '=', self.env.uid),
+            ('department_id', '=', department_id or False),
+            ('start_date', '=', start_date),
+            ('end_date', '=', end_date),
+            ('granularity', '=', granularity or False),
+            ('include_children', '=', include_children),
+            ('state', 'in', ('queued', 'running')),
+        ], limit=1)
+        if job:
+            return job
+        job = self.sudo().create({
+            'user_id': self.env.uid,
+            'department_id': department_id or False,
+            'start_date': start_date,
+            'end_date': end_date,
+            'granularity': granularity or False,
+            'include_children': include_children,
+            'request_context': {
+                key: self.env.context[key]
+                for key in ('allowed_company_ids', 'lang', 'tz')
+                if key in self.env.context
+            },
+        })
+        self.env.ref('hr_analytics_dashboard.ir_cron_hr_analytics_jobs').sudo()._trigger()
+        _logger.info("HR Analytics job %s queued: dept=%s, dates=%s to %s", job.id, department_id, start_date, end_date)
+        return job
+
+    def _to_dict(self):
+        """Status of the job, with the dashboard response once done"""
+        self.ensure_one()
+        status = {'job_id': self.id, 'state': self.state}
+        if self.state == 'done':
+            status['data'] = self.result
+        elif self.state == 'failed':
+            status['message'] = self.error
+        return status
+
+    @api.model
+    def _cron_run_jobs(self):
+        """Compute the queued jobs, each in its own transaction"""
+        for _index in range(self.BATCH_SIZE):
+            job = self._acquire_next()
+            if not job:
+                return
+            job._run()
+        if self.search_count([('state', '=', 'queued')], limit=1):
+            self.env.ref('hr_analytics_dashboard.ir_cron_hr_analytics_jobs')._trigger()
+
+    @api.model
+    def _acquire_next(self):
+        """Mark the oldest queued job as running and commit
+
+        Rows locked by a concurrent run are skipped.
+        """
+        self.env.cr.execute(SQL("""
+            SELECT id FROM hr_analytics_job
+             WHERE state = 'queued'
+          ORDER BY id
+             LIMIT 1
+               FOR UPDATE SKIP LOCKED
+        """))
+        row = self.env.cr.fetchone()
+        if not row:
+            return self.browse()
+        job = self.browse(row[0])
+        job.write({'state': 'running', 'started_at': fields.Datetime.now()})
+        self.env.cr.commit()
+        return job
+
+    def _run(self):
+        """Compute the dashboard response as the requesting user and commit"""
+        self.ensure_one()
+        try:
+            env = self.env(user=self.user_id.id, context=dict(self.request_context or {}))
+            result = self._compute_dashboard(env)
+            self.write({'state': 'done', 'result': result, 'finished_at': fields.Datetime.now()})
+        except Exception as e:
+            self.env.cr.rollback()
+            _logger.exception("HR Analytics job %s failed", self.id)
+            self.write({'state': 'failed', 'error': str(e), 'finished_at': fields.Datetime.now()})
+        self._notify_user()
+        self.env.cr.commit()
+
+    def _compute_dashboard(self, env):
+        """Build the dashboard response with the HTTP controller helpers"""
+        from ..controllers.controllers import HRAnalyticsController
+
+        with request_env(env):
+            return HRAnalyticsController()._get_hr_data(
+                self.department_id.id,
+                fields.Date.to_string(self.start_date),
+                fields.Date.to_string(self.end_date),
+                versions=None,
+                background=False,
+                granularity=self.granularity or None,
+                include_children=self.include_children,
+            )
+
+    def _notify_user(self):
+        self.env['bus.bus']._sendone(self.user_id.partner_id, JOB_NOTIFICATION_TYPE, {
+            'job_id': self.id,
+            'state': self.state,
+        })
+
+    @api.autovacuum
+    def _gc_jobs(self):
+        """Delete old finished jobs and give up on the ones stuck running"""
+        limit = fields.Datetime.now() - timedelta(hours=self.RETENTION_HOURS)
+        self.search([('state', '=', 'running'), ('started_at', '<', limit)]).write({
+            'state': 'failed',
+            'error': "Job interrupted",
+            'finished_at': fields.Datetime.now(),
+        })
+        self.search([('state', 'in', ('done', 'failed')), ('finished_at', '<', limit)]).unlink()
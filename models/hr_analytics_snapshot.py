@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+
+import logging
+from datetime import timedelta
+
+from odoo import models, fields, api, _
+from odoo.exceptions import UserError
+
+from .hr_analytics_engine import COMPANY_WIDE, METRICS
+
+_logger = logging.getLogger(__name__)
+
+# Metrics copied from the engine results into every snapshot row
+SNAPSHOT_METRICS = METRICS
+
+
+class HRAnalyticsSnapshot(models.Model):
+    """Immutable point-in-time analytics figures
+
+    Rows are captured for every department and company-wide by a scheduled
+    action; the dashboard reads the latest one and the history as time series
+    without recomputing anything.
+    """
+    _name = "hr.analytics.snapshot"
+    _description = "HR Analytics Snapshot"
+    _order = "snapshot_date desc, id desc"
+
+    # Days covered by the leave and attendance figures of a snapshot
+    WINDOW_DAYS = 30
+
+    snapshot_date = fields.Datetime(
+        string="Snapshot Date",
+        required=True,
+        readonly=True,
+        index=True,
+        default=fields.Datetime.now
+    )
+    company_id = fields.Many2one("res.company", string="Company", readonly=True, index=True)
+    department_id = fields.Many2one(
+        "hr.department",
+        string="Department",
+        readonly=True,
+        index=True,
+        help="Empty for company-wide figures"
+    )
+    date_from = fields.Date(string="Date From", readonly=True)
+    date_to = fields.Date(string="Date To", readonly=True)
+
+    total_employees = fields.Integer(string="Total Active Employees", readonly=True)
+    total_inactive_employees = fields.Integer(string="Total Inactive Employees", readonly=True)
+    turnover_rate = fields.Float(string="Turnover Rate (%)", readonly=True)
+    avg_salary = fields.Float(string="Average Salary", readonly=True)
+    total_salary_cost = fields.Float(string="Total Salary Cost", readonly=True)
+    total_leaves = fields.Integer(string="Total Leaves (Period)", readonly=True)
+    avg_leaves_per_employee = fields.Float(string="Average Leaves per Employee", readonly=True)
+    total_worked_hours = fields.Float(string="Total Worked Hours (Period)", readonly=True)
+    avg_daily_hours = fields.Float(string="Average Daily Hours", readonly=True)
+    avg_kpi_score = fields.Float(string="Average KPI Score", readonly=True)
+
+    def write(self, vals):
+        raise UserError(_("Analytics snapshots cannot be modified."))
+
+    @api.model
+    def _cron_capture_snapshots(self):
+        """Capture one snapshot row per department and company-wide, per company"""
+        snapshot_date = fields.Datetime.now()
+        date_to = snapshot_date.date()
+        date_from = date_to - timedelta(days=self.WINDOW_DAYS)
+        engine = self.env['hr.analytics.engine']
+
+        vals_list = []
+        for company in self.env['res.company'].search([]):
+            departments = self.env['hr.department'].search([('company_id', 'in', [company.id, False])])
+            metrics = engine._compute_department_metrics(departments.ids, date_from, date_to, company)
+            for key, values in metrics.items():
+                vals_list.append({
+                    'snapshot_date': snapshot_date,
+                    'company_id': company.id,
+                    'department_id': key if key != COMPANY_WIDE else False,
+                    'date_from': date_from,
+                    'date_to': date_to,
+                    **{name: values[name] for name in SNAPSHOT_METRICS},
+                })
+        self.create(vals_list)
+        _logger.info("Captured %s HR analytics snapshots", len(vals_list))
+
+        # Keep the stored statistics reports in line with the source data
+        self.env['hr.analytics.stats'].search([])._refresh_stats()
+        return True
+
+    @api.model
+    def _get_snapshot_domain(self, department_id=None):
+        return [
+            ('department_id', '=', department_id or False),
+            ('company_id', '=', self.env.company.id),
+        ]
+
+    @api.model
+    def _get_latest(self, department_id=None):
+        """Return the most recent snapshot values, or an empty dict"""
+        snapshot = self.search(self._get_snapshot_domain(department_id), limit=1)
+        if not snapshot:
+            return {}
+        return snapshot._to_dict()
+
+    @api.model
+    def _get_history(self, department_id=None, date_from=None, date_to=None):
+        """Return the snapshots of a period as a chronological list of dicts"""
+        domain = self._get_snapshot_domain(department_id)
+        if date_from:
+            domain.append(('snapshot_date', '>=', date_from))
+        if date_to:
+            domain.append(('snapshot_date', '<', date_to + timedelta(days=1)))
+        return [snapshot._to_dict() for snapshot in self.search(domain, order='snapshot_date asc')]
+
+    def _to_dict(self):
+        self.ensure_one()
+        return {
+            'snapshot_date': fields.Datetime.to_string(self.snapshot_date),
+            **{name: self[name] for name in SNAPSHOT_METRICS},
+        }
@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+
+from odoo import models, api
+from odoo.tools import SQL, create_index, index_exists
+
+from ..tools.live_updates import send_live_updates
+from ..tools.result_cache import dashboard_cache
+
+# Committed change counters: one row per source model, bumped after each
+# transaction changing its records, plus UNLINK_COUNTER for deletions
+DATA_VERSION_TABLE = "hr_analytics_data_version"
+UNLINK_COUNTER = "unlink"
+
+# Dashboard response sections and the source models they are computed from
+SECTION_MODELS = {
+    'metrics': ('hr.employee', 'hr.contract', 'hr.leave', 'hr.attendance'),
+    'kpi_distribution': ('hr.employee', 'hr.leave', 'hr.attendance'),
+    'attendance_trends': ('hr.employee', 'hr.attendance'),
+    'leave_trends': ('hr.employee', 'hr.leave'),
+    'salary_distribution': ('hr.employee', 'hr.contract', 'hr.department'),
+}
+
+
+class HRAnalyticsSourceMixin(models.AbstractModel):
+    """Mixin for the models the analytics dashboard reads from
+
+    Any create, write or unlink invalidates the cached dashboard results of
+    the worker once the transaction is committed and sends a live update for
+    the affected departments with the transaction. Changes are detectable by
+    every worker through the change counters of ``DATA_VERSION_TABLE``,
+    bumped after commit: unlike ``write_date``, which is the start time of
+    the writing transaction, a counter only moves once the changes are
+    visible.
+    """
+    _name = "hr.analytics.source.mixin"
+    _description = "HR Analytics Source Mixin"
+
+    # Extra indexes matching the analytics queries on the model, created at
+    # install: {name suffix: (expressions, partial index predicate)}
+    _hr_analytics_indexes = {}
+
+    def init(self):
+        super().init()
+        self.env.cr.execute(SQL(
+            "CREATE TABLE IF NOT EXISTS %s (name varchar PRIMARY KEY, version bigint NOT NULL)",
+            SQL.identifier(DATA_VERSION_TABLE),
+        ))
+        if self._abstract:
+            return
+        for suffix, (expressions, where) in self._hr_analytics_indexes.items():
+            index_name = f'{self._table}_{suffix}'
+            if not index_exists(self.env.cr, index_name):
+                create_index(self.env.cr, index_name, self._table, expressions, where=where)
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        records = super().create(vals_list)
+        records._hr_analytics_notify_change()
+        return records
+
+    def write(self, vals):
+        result = super().write(vals)
+        self._hr_analytics_notify_change()
+        return result
+
+    def unlink(self):
+        self._hr_analytics_notify_change(unlink=True)
+        return super().unlink()
+
+    def _hr_analytics_notify_change(self, unlink=False):
+        """Invalidate cached dashboard results after commit (once per transaction)
+
+        The affected departments are collected over the transaction and sent
+        on the bus just before commit, so the notification is delivered with
+        the changes. The change counters of the model, and of deletions, are
+        bumped after commit.
+        """
+        postcommit = self.env.cr.postcommit
+        dbname = self.env.cr.dbname
+        if not postcommit.data.get('hr_analytics.cache_invalidation'):
+            postcommit.data['hr_analytics.cache_invalidation'] = True
+            postcommit.add(lambda: dashboard_cache.invalidate(dbname))
+
+        precommit = self.env.cr.precommit
+        if 'hr_analytics.live_updates' not in precommit.data:
+            changes = precommit.data['hr_analytics.live_updates'] = {}
+            env = self.env
+            precommit.add(lambda: send_live_updates(env, changes))
+        changes = precommit.data['hr_analytics.live_updates']
+        sections = {section for section, model_names in SECTION_MODELS.items() if self._name in model_names}
+        for employee in self._hr_analytics_get_employees():
+            department_ids, company_sections = changes.setdefault(employee.company_id.id, (set(), set()))
+            department_ids.add(employee.department_id.id)
+            company_sections.update(sections)
+        self._hr_analytics_register_change(self._name, unlink=unlink)
+
+    @api.model
+    def _hr_analytics_register_change(self, model_name, unlink=False):
+        """Bump the change counter of a model once the transaction is committed
+
+        Counters of all the models changed by the transaction are bumped
+        together, in a separate cursor, so that a new value is only visible
+        with the changes it stands for, however long the transaction ran.
+        """
+        postcommit = self.env.cr.postcommit
+        names = postcommit.data.get('hr_analytics.changed_models')
+        if names is None:
+            names = postcommit.data['hr_analytics.changed_models'] = set()
+            registry = self.env.registry
+
+            def bump_data_versions():
+                with registry.cursor() as cr:
+                    # Concurrent bumps wait for each other instead of failing
+                    cr.execute(SQL("SET TRANSACTION ISOLATION LEVEL READ COMMITTED"))
+                    cr.execute(SQL(
+                        """
+                        INSERT INTO %s (name, version)
+                        SELECT name, 1 FROM unnest(%s::varchar[]) AS name
+                        ON CONFLICT (name) DO UPDATE SET version = %s.version + 1
+                        """,
+                        SQL.identifier(DATA_VERSION_TABLE), sorted(names), SQL.identifier(DATA_VERSION_TABLE),
+                    ))
+            postcommit.add(bump_data_versions)
+        names.add(model_name)
+        if unlink:
+            names.add(UNLINK_COUNTER)
+
+    @api.model
+    def _hr_analytics_get_data_versions(self):
+        """Return {model name or UNLINK_COUNTER: committed change count}"""
+        self.env.cr.execute(SQL("SELECT name, version FROM %s", SQL.identifier(DATA_VERSION_TABLE)))
+        return dict(self.env.cr.fetchall())
+
+    def _hr_analytics_get_employees(self):
+        """Return the employees whose figures these records affect"""
+        records = self.sudo()
+        if self._name == 'hr.employee':
+            return records
+        return records.employee_id
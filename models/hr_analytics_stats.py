@@ -2,6 +2,10 @@
 
 from odoo import models, fields, api
 from datetime import datetime, timedelta
+from collections import defaultdict
+
+from .hr_analytics_engine import COMPANY_WIDE
+from ..tools.replica import replica_router
 
 
 class HRAnalyticsStats(models.Model):
@@ -92,24 +96,38 @@ class HRAnalyticsStats(models.Model):
         store=True
     )
 
+    refresh_pending = fields.Boolean(
+        string="Refresh Pending",
+        readonly=True,
+        help="Refresh requested, done shortly by the \"HR Analytics: Refresh Statistics\" scheduled action"
+    )
+
+    def _get_metric_key(self):
+        """Key of the record in the hr.analytics.engine results"""
+        self.ensure_one()
+        return self.department_id.id or COMPANY_WIDE
+
+    def _get_engine(self):
+        """Metric engine, reading from the analytics replica while refreshing"""
+        return replica_router.analytics_env(self.env)['hr.analytics.engine']
+
+    def _group_by_window(self):
+        """Group the records by (date_from, date_to) window
+
+        Returns:
+            dict: {(date_from, date_to): recordset}
+        """
+        windows = defaultdict(lambda: self.browse())
+        for record in self:
+            windows[(record.date_from, record.date_to)] |= record
+        return windows
+
     @api.depends('department_id')
     def _compute_employee_stats(self):
         """Compute employee-related statistics"""
+        employee_stats = self._get_engine()._get_employee_metrics()
         for record in self:
-            domain = []
-            if record.department_id:
-                domain.append(('department_id', '=', record.department_id.id))
-
-            # Active employees
-            active_employees = self.env['hr.employee'].search_count(
-                domain + [('active', '=', True)]
-            )
-
-            # Inactive employees
-            inactive_employees = self.env['hr.employee'].search_count(
-                domain + [('active', '=', False)]
-            )
-
+            active_employees, inactive_employees = employee_stats.get(record._get_metric_key(), (0, 0))
             total = active_employees + inactive_employees
 
             record.total_employees = active_employees
@@ -118,93 +136,90 @@ class HRAnalyticsStats(models.Model):
 
     @api.depends('department_id', 'total_employees')
     def _compute_salary_stats(self):
-        """Compute salary-related statistics"""
-        for record in self:
-            contract_domain = [('state', '=', 'open')]
-            if record.department_id:
-                contract_domain.append(('employee_id.department_id', '=', record.department_id.id))
-
-            contracts = self.env['hr.contract'].search(contract_domain)
-            wages = contracts.mapped('wage')
+        """Compute salary-related statistics
 
-            if wages:
-                record.avg_salary = sum(wages) / len(wages)
-                record.total_salary_cost = sum(wages)
-            else:
-                record.avg_salary = 0.0
-                record.total_salary_cost = 0.0
+        The average includes the open contracts without wage.
+        """
+        salary_stats = self._get_engine()._get_salary_metrics(include_zero_wages=True)
+        for record in self:
+            stats = salary_stats.get(record._get_metric_key(), {})
+            record.avg_salary = stats.get('avg_salary', 0.0)
+            record.total_salary_cost = stats.get('total_salary_cost', 0.0)
 
     @api.depends('department_id', 'date_from', 'date_to', 'total_employees')
     def _compute_leave_stats(self):
         """Compute leave-related statistics"""
-        for record in self:
-            leave_domain = [
-                ('state', '=', 'validate'),
-                ('request_date_from', '>=', record.date_from),
-                ('request_date_from', '<=', record.date_to)
-            ]
-            if record.department_id:
-                leave_domain.append(('employee_id.department_id', '=', record.department_id.id))
-
-            total_leaves = self.env['hr.leave'].search_count(leave_domain)
-
-            record.total_leaves = total_leaves
-            record.avg_leaves_per_employee = (
-                total_leaves / record.total_employees
-                if record.total_employees > 0 else 0.0
+        engine = self._get_engine()
+        for (date_from, date_to), records in self._group_by_window().items():
+            leave_stats = (
+                engine._get_leave_metrics(date_from, date_to)
+                if date_from and date_to else {}
             )
+            for record in records:
+                total_leaves = leave_stats.get(record._get_metric_key(), 0)
+
+                record.total_leaves = total_leaves
+                record.avg_leaves_per_employee = (
+                    total_leaves / record.total_employees
+                    if record.total_employees > 0 else 0.0
+                )
 
     @api.depends('department_id', 'date_from', 'date_to')
     def _compute_attendance_stats(self):
-        """Compute attendance-related statistics"""
-        for record in self:
-            att_domain = [
-                ('check_in', '>=', record.date_from),
-                ('check_in', '<=', record.date_to),
-                ('worked_hours', '>', 0)
-            ]
-            if record.department_id:
-                att_domain.append(('employee_id.department_id', '=', record.department_id.id))
-
-            attendances = self.env['hr.attendance'].search(att_domain)
-            worked_hours = attendances.mapped('worked_hours')
-
-            if worked_hours:
-                record.total_worked_hours = sum(worked_hours)
+        """Compute attendance-related statistics
+
+        The window ends at the start of ``date_to``: its day is not counted.
+        """
+        engine = self._get_engine()
+        for (date_from, date_to), records in self._group_by_window().items():
+            attendance_stats = (
+                engine._get_attendance_metrics(date_from, date_to - timedelta(days=1))
+                if date_from and date_to else {}
+            )
+            for record in records:
+                worked_hours, unique_days = attendance_stats.get(record._get_metric_key(), (0.0, 0))
+
+                record.total_worked_hours = worked_hours
                 # Calculate average daily hours
-                days_in_period = (record.date_to - record.date_from).days + 1
-                unique_days = len(set(att.check_in.date() for att in attendances))
                 record.avg_daily_hours = (
-                    sum(worked_hours) / unique_days
+                    worked_hours / unique_days
                     if unique_days > 0 else 0.0
                 )
-            else:
-                record.total_worked_hours = 0.0
-                record.avg_daily_hours = 0.0
 
     @api.depends('department_id', 'total_employees')
     def _compute_kpi_stats(self):
         """Compute KPI-related statistics"""
+        kpi_stats = self._get_engine()._get_kpi_metrics(
+            self.department_id.ids,
+            company_wide=any(not record.department_id for record in self),
+        )
         for record in self:
-            employee_domain = [('active', '=', True)]
-            if record.department_id:
-                employee_domain.append(('department_id', '=', record.department_id.id))
-
-            employees = self.env['hr.employee'].search(employee_domain)
-
-            if employees:
-                # Force computation of KPI scores
-                employees._compute_kpi_score()
-                kpi_scores = employees.mapped('kpi_score')
-                record.avg_kpi_score = sum(kpi_scores) / len(kpi_scores) if kpi_scores else 0.0
-            else:
-                record.avg_kpi_score = 0.0
+            record.avg_kpi_score = kpi_stats.get(record._get_metric_key(), 0.0)
 
     def action_refresh_stats(self):
-        """Manual refresh of all statistics"""
-        self._compute_employee_stats()
-        self._compute_salary_stats()
-        self._compute_leave_stats()
-        self._compute_attendance_stats()
-        self._compute_kpi_stats()
+        """Schedule a refresh of these statistics, outside of the request"""
+        self.write({'refresh_pending': True})
+        self.env.ref('hr_analytics_dashboard.ir_cron_hr_analytics_stats_refresh').sudo()._trigger()
+        return True
+
+    @api.model
+    def _cron_refresh_stats(self):
+        """Refresh the statistics whose refresh was requested"""
+        stats = self.search([('refresh_pending', '=', True)])
+        stats._refresh_stats()
+        stats.write({'refresh_pending': False})
+        return True
+
+    def _refresh_stats(self):
+        """Recompute all statistics of the recordset
+
+        The figures are read from the analytics replica when one is
+        configured and within the allowed staleness.
+        """
+        with replica_router.bind(self.env, replica_router.get_max_lag(self.env)):
+            self._compute_employee_stats()
+            self._compute_salary_stats()
+            self._compute_leave_stats()
+            self._compute_attendance_stats()
+            self._compute_kpi_stats()
         return True
\ No newline at end of file
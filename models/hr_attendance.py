@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+
+from odoo import models, fields, api
+
+# Fields feeding the hr.analytics.daily aggregates and the attendance years
+DAILY_AGGREGATE_FIELDS = {'employee_id', 'check_in', 'check_out', 'worked_hours'}
+
+
+class HRAttendance(models.Model):
+    _name = "hr.attendance"
+    _inherit = ["hr.attendance", "hr.analytics.source.mixin"]
+    _hr_analytics_indexes = {
+        'analytics_employee_check_in_index': (['employee_id', 'check_in'], 'worked_hours > 0'),
+        'analytics_department_check_in_index': (['department_id', 'check_in'], 'worked_hours > 0'),
+    }
+
+    # Stored so that department filters do not join hr_employee
+    department_id = fields.Many2one(store=True)
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        records = super().create(vals_list)
+        self.env['hr.analytics.daily'].sudo()._queue_cells(records._get_daily_aggregate_cells())
+        self.env['hr.analytics.attendance.year'].sudo()._refresh_cells(records._get_attendance_year_cells())
+        return records
+
+    def write(self, vals):
+        if not DAILY_AGGREGATE_FIELDS.intersection(vals):
+            return super().write(vals)
+        cells = self._get_daily_aggregate_cells()
+        year_cells = self._get_attendance_year_cells()
+        result = super().write(vals)
+        self.env['hr.analytics.daily'].sudo()._queue_cells(cells | self._get_daily_aggregate_cells())
+        self.env['hr.analytics.attendance.year'].sudo()._refresh_cells(year_cells | self._get_attendance_year_cells())
+        return result
+
+    def unlink(self):
+        cells = self._get_daily_aggregate_cells()
+        year_cells = self._get_attendance_year_cells()
+        result = super().unlink()
+        self.env['hr.analytics.daily'].sudo()._queue_cells(cells)
+        self.env['hr.analytics.attendance.year'].sudo()._refresh_cells(year_cells)
+        return result
+
+    def _get_daily_aggregate_cells(self):
+        """Return the (date, department_id) aggregate cells these attendances fall in"""
+        return {
+            (attendance.check_in.date(), attendance.employee_id.department_id.id)
+            for attendance in self.sudo()
+            if attendance.check_in
+        }
+
+    def _get_attendance_year_cells(self):
+        """Return the (employee_id, year) attendance index rows of these attendances"""
+        return {
+            (attendance.employee_id.id, attendance.check_in.year)
+            for attendance in self.sudo()
+            if attendance.check_in
+        }
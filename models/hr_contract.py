@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+
+from odoo import models, api
+from odoo.tools import SQL
+
+# Wage percentiles reported by _get_salary_aggregates
+SALARY_PERCENTILES = (25, 50, 75, 90)
+
+
+class HRContract(models.Model):
+    _name = "hr.contract"
+    _inherit = ["hr.contract", "hr.analytics.source.mixin"]
+    # Last write read by the cohort index
+    _hr_analytics_indexes = {
+        'write_date_index': (['write_date'], None),
+    }
+
+    @api.model
+    def _get_salary_aggregates(self, department_id=None, domain=None, include_zero_wages=False):
+        """Aggregate the wages of open contracts in a single grouped query
+
+        Totals and per-department figures come from one ``GROUPING SETS``
+        pass; record rules apply as for a regular search. Average, count and
+        percentiles ignore contracts without wage unless
+        ``include_zero_wages``, department totals only include employees
+        assigned to a department.
+
+        Args:
+            department_id (int, optional): Restrict to one department
+            domain (list, optional): Extra domain on the contracts
+            include_zero_wages (bool): Count the contracts without wage in
+                the average, count and percentiles
+
+        Returns:
+            dict: count, total, avg, percentiles ({'p25': ...}) and
+                departments ([{'department_id', 'department', 'count',
+                'total', 'avg'}])
+        """
+        domain = [('state', '=', 'open')] + (domain or [])
+        if department_id:
+            domain.append(('employee_id.department_id', '=', department_id))
+
+        query = self._search(domain)
+        employee_alias = query.make_alias(query.table, 'employee_id')
+        query.add_join('LEFT JOIN', employee_alias, 'hr_employee', SQL(
+            "%s = %s",
+            SQL.identifier(query.table, 'employee_id'),
+            SQL.identifier(employee_alias, 'id'),
+        ))
+        department = SQL.identifier(employee_alias, 'department_id')
+        wage = SQL.identifier(query.table, 'wage')
+        counted = SQL("TRUE") if include_zero_wages else SQL("%s <> 0", wage)
+        query.groupby = SQL("GROUPING SETS ((), (%s))", department)
+
+        self.env.cr.execute(query.select(
+            SQL("GROUPING(%s) = 1", department),
+            department,
+            SQL("COUNT(*) FILTER (WHERE %s)", counted),
+            SQL("COALESCE(SUM(%s), 0)", wage),
+            SQL("COALESCE(AVG(%s) FILTER (WHERE %s), 0)", wage, counted),
+            SQL(
+                "percentile_cont(%s::float[]) WITHIN GROUP (ORDER BY %s) FILTER (WHERE %s)",
+                [p / 100 for p in SALARY_PERCENTILES], wage, counted,
+            ),
+        ))
+
+        result = {
+            'count': 0,
+            'total': 0.0,
+            'avg': 0.0,
+            'percentiles': {f'p{p}': 0.0 for p in SALARY_PERCENTILES},
+            'departments': [],
+        }
+        department_rows = []
+        for is_total, dept_id, count, total, avg, percentiles in self.env.cr.fetchall():
+            if is_total:
+                result.update(count=count, total=total, avg=avg)
+                if percentiles:
+                    result['percentiles'] = {
+                        f'p{p}': value or 0.0
+                        for p, value in zip(SALARY_PERCENTILES, percentiles)
+                    }
+            elif dept_id:
+                department_rows.append((dept_id, count, total, avg))
+
+        departments = self.env['hr.department'].browse([row[0] for row in department_rows])
+        names = {dept.id: dept.name for dept in departments}
+        result['departments'] = [
+            {
+                'department_id': dept_id,
+                'department': names.get(dept_id, ''),
+                'count': count,
+                'total': total,
+                'avg': avg,
+            }
+            for dept_id, count, total, avg in department_rows
+        ]
+        return result
+
+    @api.model
+    def _get_salary_totals(self, domain=None):
+        """Sum and average open contract wages per company and per department
+
+        Both groupings come from one ``GROUPING SETS`` pass; averages ignore
+        contracts without wage, as in ``_get_salary_aggregates``.
+
+        Args:
+            domain (list, optional): Extra domain on the contracts
+
+        Returns:
+            dict: {'companies': {company_id: (total, avg)},
+                'departments': {department_id: (total, avg)}}
+        """
+        query = self._search([('state', '=', 'open')] + (domain or []))
+        employee_alias = query.make_alias(query.table, 'employee_id')
+        query.add_join('LEFT JOIN', employee_alias, 'hr_employee', SQL(
+            "%s = %s",
+            SQL.identifier(query.table, 'employee_id'),
+            SQL.identifier(employee_alias, 'id'),
+        ))
+        company = SQL.identifier(query.table, 'company_id')
+        department = SQL.identifier(employee_alias, 'department_id')
+        wage = SQL.identifier(query.table, 'wage')
+        query.groupby = SQL("GROUPING SETS ((%s), (%s))", company, department)
+
+        self.env.cr.execute(query.select(
+            SQL("GROUPING(%s) = 0", company),
+            company,
+            department,
+            SQL("COALESCE(SUM(%s), 0)", wage),
+            SQL("COALESCE(AVG(%s) FILTER (WHERE %s <> 0), 0)", wage, wage),
+        ))
+        totals = {'companies': {}, 'departments': {}}
+        for is_company, company_id, department_id, total, avg in self.env.cr.fetchall():
+            if is_company:
+                totals['companies'][company_id] = (total, avg)
+            elif department_id:
+                totals['departments'][department_id] = (total, avg)
+        return totals
@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+
+import hashlib
+import json
+
+from odoo import models, api, tools
+
+# Fields of the cached department index and of the dashboard sections
+DEPARTMENT_INDEX_FIELDS = {'name', 'parent_id', 'company_id', 'active'}
+
+
+class HRDepartment(models.Model):
+    _inherit = "hr.department"
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        records = super().create(vals_list)
+        self.env['hr.analytics.source.mixin']._hr_analytics_register_change(self._name)
+        return records
+
+    def write(self, vals):
+        result = super().write(vals)
+        if DEPARTMENT_INDEX_FIELDS.intersection(vals):
+            self.env['hr.analytics.source.mixin']._hr_analytics_register_change(self._name)
+        return result
+
+    def unlink(self):
+        result = super().unlink()
+        self.env['hr.analytics.source.mixin']._hr_analytics_register_change(self._name)
+        return result
+
+    @api.model
+    def _get_department_index(self):
+        """Return the departments of all companies, cached per worker
+
+        Built once from ``parent_path`` with the descendants of every
+        department precomputed, so that sub-department filters need no tree
+        walk. The cache is keyed on the committed change counter of the
+        departments, so a department change only replaces this index, in
+        every worker; a transaction that changed departments builds its own.
+        The result is shared: do not modify it.
+
+        Returns:
+            tuple: (version, {department_id: {'id', 'name', 'complete_name',
+                'parent_id', 'company_id', 'active', 'child_ids',
+                'descendant_ids'}}) where version changes with the content
+        """
+        Source = self.env['hr.analytics.source.mixin']
+        if self._name in self.env.cr.postcommit.data.get('hr_analytics.changed_models', ()):
+            return self._build_department_index()
+        return self._get_cached_department_index(Source._hr_analytics_get_data_versions().get(self._name, 0))
+
+    @api.model
+    @tools.ormcache('data_version')
+    def _get_cached_department_index(self, data_version):
+        return self._build_department_index()
+
+    @api.model
+    def _build_department_index(self):
+        departments = self.sudo().with_context(active_test=False).search_fetch(
+            [], ['name', 'complete_name', 'parent_id', 'company_id', 'active', 'parent_path'],
+            order='complete_name, id',
+        )
+        index = {
+            department.id: {
+                'id': department.id,
+                'name': department.name,
+                'complete_name': department.complete_name,
+                'parent_id': department.parent_id.id or False,
+                'company_id': department.company_id.id or False,
+                'active': department.active,
+                'child_ids': [],
+                'descendant_ids': [department.id],
+            }
+            for department in departments
+        }
+        for department in departments:
+            node = index[department.id]
+            if node['parent_id'] in index:
+                index[node['parent_id']]['child_ids'].append(department.id)
+            ancestor_ids = [int(ancestor_id) for ancestor_id in department.parent_path.split('/')[:-2]]
+            for ancestor_id in ancestor_ids:
+                if ancestor_id in index:
+                    index[ancestor_id]['descendant_ids'].append(department.id)
+        version = hashlib.sha1(json.dumps(index, sort_keys=True).encode()).hexdigest()[:16]
+        return version, index
+
+    @api.model
+    def _get_visible_department_index(self):
+        """Return the departments of the allowed companies from the cached index
+
+        Returns:
+            tuple: (version, {department_id: node}), see ``_get_department_index``
+        """
+        version, index = self._get_department_index()
+        company_ids = set(self.env.companies.ids)
+        return version, {
+            department_id: node
+            for department_id, node in index.items()
+            if not node['company_id'] or node['company_id'] in company_ids
+        }
+
+    @api.model
+    def _get_department_filter_ids(self, department_id, include_children=False):
+        """Return the ids matched by a department filter, from the cached index
+
+        Returns:
+            list: the department, with its sub-departments when asked, or
+                None when the department is unknown or not visible
+        """
+        _version, index = self._get_visible_department_index()
+        node = index.get(department_id)
+        if not node:
+            return None
+        if not include_children:
+            return [department_id]
+        return [descendant_id for descendant_id in node['descendant_ids'] if descendant_id in index]
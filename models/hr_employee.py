@@ -1,26 +1,49 @@
 # -*- coding: utf-8 -*-
 
 from odoo import models, fields, api
-from datetime import datetime, timedelta
+from odoo.tools import SQL
+from datetime import date, datetime, timedelta
+import logging
+
+_logger = logging.getLogger(__name__)
+
+# Date of the last KPI window shift handled by _cron_recompute_kpi_scores
+KPI_WINDOW_PARAM = "hr_analytics_dashboard.kpi_window_date"
+
+# Per-employee metrics of the drill-down rows, all sortable and filterable
+DRILLDOWN_METRICS = ('kpi_score', 'current_salary', 'total_leaves_ytd', 'avg_daily_hours')
+DRILLDOWN_SORTS = ('name',) + DRILLDOWN_METRICS
+DRILLDOWN_OPERATORS = ('<', '<=', '=', '>=', '>')
 
 
 class HREmployee(models.Model):
-    _inherit = "hr.employee"
+    _name = "hr.employee"
+    _inherit = ["hr.employee", "hr.analytics.source.mixin"]
+
+    # Keyset pagination of the drill-down rows on the stored metrics, and the
+    # last write read by the cohort index
+    _hr_analytics_indexes = {
+        'analytics_kpi_score_index': (['kpi_score', 'id'], None),
+        'analytics_current_salary_index': (['current_salary', 'id'], None),
+        'write_date_index': (['write_date'], None),
+    }
 
     # Analytics fields
     department_turnover_rate = fields.Float(
         string="Department Turnover Rate (%)",
         compute="_compute_department_turnover_rate",
-        help="Turnover rate for the employee's department"
+        help="Turnover rate for the employee's department over the last 12 months"
     )
     current_salary = fields.Float(
         string="Current Salary",
         compute="_compute_current_salary",
+        store=True,
         help="Current salary from active contract"
     )
     kpi_score = fields.Float(
         string="KPI Score",
         compute="_compute_kpi_score",
+        store=True,
         help="Performance score based on attendance and leave patterns"
     )
     total_leaves_ytd = fields.Integer(
@@ -33,30 +56,37 @@ class HREmployee(models.Model):
         compute="_compute_avg_daily_hours",
         help="Average working hours per day (last 30 days)"
     )
+    # Dependency of kpi_score on the employee's leaves
+    analytics_leave_ids = fields.One2many(
+        "hr.leave",
+        "employee_id",
+        string="Analytics Leaves",
+        groups="hr.group_hr_user"
+    )
+
+    def write(self, vals):
+        if 'department_id' not in vals and 'company_id' not in vals:
+            return super().write(vals)
+        department_ids = {employee.department_id.id for employee in self}
+        result = super().write(vals)
+        department_ids.update(employee.department_id.id for employee in self)
+        # Attendance and leave aggregates are bucketed by the employee's department
+        self.env['hr.analytics.daily'].sudo()._refresh_employees(self, department_ids)
+        return result
 
     @api.depends('department_id')
     def _compute_department_turnover_rate(self):
-        """Calculate turnover rate for employee's department"""
+        """Calculate turnover rate for employee's department
+
+        Departures of the last 12 months over the average headcount, read
+        for all departments at once from the cohort index.
+        """
+        today = fields.Date.context_today(self)
+        turnover_rates = self.env['hr.analytics.cohort']._get_department_turnover_rates(
+            today - timedelta(days=365), today,
+        )
         for record in self:
-            if not record.department_id:
-                record.department_turnover_rate = 0.0
-                continue
-
-            # Get all employees in department (active + inactive)
-            total_dept_employees = self.env['hr.employee'].search_count([
-                ('department_id', '=', record.department_id.id)
-            ])
-
-            # Get inactive employees in department
-            inactive_dept_employees = self.env['hr.employee'].search_count([
-                ('department_id', '=', record.department_id.id),
-                ('active', '=', False)
-            ])
-
-            if total_dept_employees > 0:
-                record.department_turnover_rate = (inactive_dept_employees / total_dept_employees) * 100
-            else:
-                record.department_turnover_rate = 0.0
+            record.department_turnover_rate = turnover_rates.get(record.department_id.id, 0.0)
 
     @api.depends('contract_ids', 'contract_ids.state', 'contract_ids.wage')
     def _compute_current_salary(self):
@@ -71,63 +101,258 @@ class HREmployee(models.Model):
             else:
                 record.current_salary = 0.0
 
+    @api.depends(
+        'attendance_ids.check_in', 'attendance_ids.check_out', 'attendance_ids.worked_hours',
+        'analytics_leave_ids.state', 'analytics_leave_ids.request_date_from',
+    )
     def _compute_kpi_score(self):
-        """Calculate KPI score based on performance metrics"""
+        """Calculate KPI score based on performance metrics
+
+        Leave counts and attendance days are fetched for the whole recordset
+        in two grouped queries, so the cost does not grow with headcount.
+        The score is stored and recomputed when the employee's attendances
+        or leaves change; the "HR Analytics: KPI Window" scheduled action
+        follows the rolling 30-day window and the new year, which no record
+        change reflects.
+        """
+        # Factor 1: Leave usage (validated leaves this year)
+        leave_counts = self._get_ytd_leave_counts()
+
+        # Factor 2: Attendance consistency (last 30 days)
+        thirty_days_ago = datetime.now() - timedelta(days=30)
+        attendance_days = self._get_attendance_day_counts(thirty_days_ago)
+
         for record in self:
             score = 100.0  # Start with perfect score
 
-            # Factor 1: Leave usage (reduce score for excessive leaves)
-            current_year = datetime.now().year
-            leaves_count = self.env['hr.leave'].search_count([
-                ('employee_id', '=', record.id),
-                ('state', '=', 'validate'),
-                ('request_date_from', '>=', f'{current_year}-01-01'),
-                ('request_date_from', '<=', f'{current_year}-12-31')
-            ])
-
             # Deduct 3 points per leave day (assuming reasonable leave allowance)
+            leaves_count = leave_counts.get(record.id, 0)
             score -= min(leaves_count * 3, 30)  # Max 30 points deduction
 
-            # Factor 2: Attendance consistency (last 30 days)
-            thirty_days_ago = datetime.now() - timedelta(days=30)
-            attendances = self.env['hr.attendance'].search([
-                ('employee_id', '=', record.id),
-                ('check_in', '>=', thirty_days_ago)
-            ])
-
             # Check for attendance gaps (days without check-in)
-            if attendances:
-                attendance_days = len(set(att.check_in.date() for att in attendances))
+            days = attendance_days.get(record.id, 0)
+            if days:
                 working_days = 22  # Approximate working days in 30 days
-                attendance_rate = attendance_days / working_days if working_days > 0 else 0
+                attendance_rate = days / working_days if working_days > 0 else 0
                 score *= attendance_rate  # Multiply by attendance rate
 
             record.kpi_score = max(0.0, min(100.0, score))
 
-    def _compute_total_leaves_ytd(self):
-        """Calculate total validated leaves for current year"""
+    def _recompute_kpi_score(self):
+        """Mark the KPI score of these employees for recomputation at next flush
+
+        For the changes the field dependencies do not see: the moving time
+        window and rows written in SQL.
+        """
+        self.env.add_to_compute(self._fields['kpi_score'], self.sudo().exists())
+
+    @api.model
+    def _cron_recompute_kpi_scores(self):
+        """Recompute the KPI scores affected by the days elapsed since the last run
+
+        Attendances leaving the 30-day window only affect their employees; a
+        new year resets the leave counts, so every score is recomputed.
+        """
+        today = fields.Date.context_today(self)
+        params = self.env['ir.config_parameter'].sudo()
+        last_run = fields.Date.to_date(params.get_param(KPI_WINDOW_PARAM)) or today - timedelta(days=1)
+
+        employees = self.with_context(active_test=False).search([])
+        if last_run.year == today.year:
+            window_end = datetime.now() - timedelta(days=30)
+            window_start = datetime.combine(last_run - timedelta(days=31), datetime.min.time())
+            groups = self.env['hr.attendance']._read_group(
+                [('check_in', '>=', window_start), ('check_in', '<', window_end)],
+                groupby=['employee_id'],
+            )
+            employees = self.browse([employee.id for (employee,) in groups])
+
+        employees._recompute_kpi_score()
+        self.env.flush_all()
+        params.set_param(KPI_WINDOW_PARAM, fields.Date.to_string(today))
+        _logger.info("Recomputed KPI scores of %s employees", len(employees))
+
+    def _get_ytd_leave_counts(self):
+        """Count validated leaves starting this year, grouped by employee
+
+        Returns:
+            dict: {employee_id: leave_count}
+        """
+        if not self.ids:
+            return {}
         current_year = datetime.now().year
-        for record in self:
-            record.total_leaves_ytd = self.env['hr.leave'].search_count([
-                ('employee_id', '=', record.id),
+        groups = self.env['hr.leave']._read_group(
+            [
+                ('employee_id', 'in', self.ids),
                 ('state', '=', 'validate'),
                 ('request_date_from', '>=', f'{current_year}-01-01'),
-                ('request_date_from', '<=', f'{current_year}-12-31')
-            ])
+                ('request_date_from', '<=', f'{current_year}-12-31'),
+            ],
+            groupby=['employee_id'],
+            aggregates=['__count'],
+        )
+        return {employee.id: count for employee, count in groups}
+
+    def _get_attendance_day_counts(self, date_from):
+        """Count distinct check-in days since date_from, grouped by employee
+
+        Read from the attendance day bitsets of ``hr.analytics.attendance.year``:
+        days are bucketed in UTC so they match ``check_in.date()`` on the
+        stored (naive UTC) datetimes, and only the check-ins from
+        ``date_from`` count on its day.
+
+        Returns:
+            dict: {employee_id: distinct_days}
+        """
+        day_stats = self.env['hr.analytics.attendance.year'].sudo()._get_window_stats(self.ids, date_from)
+        return {
+            employee_id: attendance_days
+            for employee_id, (attendance_days, _worked_days, _hours) in day_stats.items()
+            if attendance_days
+        }
+
+    def _compute_total_leaves_ytd(self):
+        """Calculate total validated leaves for current year"""
+        leave_counts = self._get_ytd_leave_counts()
+        for record in self:
+            record.total_leaves_ytd = leave_counts.get(record.id, 0)
 
     def _compute_avg_daily_hours(self):
         """Calculate average daily working hours (last 30 days)"""
         thirty_days_ago = datetime.now() - timedelta(days=30)
+        attendance_hours = self._get_attendance_hours(thirty_days_ago)
         for record in self:
-            attendances = self.env['hr.attendance'].search([
-                ('employee_id', '=', record.id),
-                ('check_in', '>=', thirty_days_ago),
-                ('worked_hours', '>', 0)
-            ])
-
-            if attendances:
-                total_hours = sum(attendances.mapped('worked_hours'))
-                working_days = len(set(att.check_in.date() for att in attendances))
-                record.avg_daily_hours = total_hours / working_days if working_days > 0 else 0.0
-            else:
-                record.avg_daily_hours = 0.0
\ No newline at end of file
+            total_hours, working_days = attendance_hours.get(record.id, (0.0, 0))
+            record.avg_daily_hours = total_hours / working_days if working_days > 0 else 0.0
+
+    def _get_attendance_hours(self, date_from):
+        """Sum worked hours since date_from, grouped by employee
+
+        Only days with positive worked hours are considered; days are
+        bucketed in UTC like ``_get_attendance_day_counts``.
+
+        Returns:
+            dict: {employee_id: (total_hours, distinct_days)}
+        """
+        day_stats = self.env['hr.analytics.attendance.year'].sudo()._get_window_stats(self.ids, date_from)
+        return {
+            employee_id: (worked_hours, worked_days)
+            for employee_id, (_attendance_days, worked_days, worked_hours) in day_stats.items()
+            if worked_days
+        }
+
+    @api.model
+    def _get_analytics_page(self, domain, sort='kpi_score', descending=False, filters=(), after=None, limit=50):
+        """Return one page of per-employee analytics rows, by keyset pagination
+
+        Employees are ordered by ``sort`` then id and ``after`` continues
+        from the last row of the previous page, so every page is a range
+        scan on the sort key instead of an ever-growing OFFSET. The stored
+        KPI score and salary are read from their (indexed) columns; the
+        year-to-date leaves and 30-day average hours are aggregated in SQL
+        only when sorted or filtered on, and are otherwise computed for the
+        employees of the page alone.
+
+        Args:
+            domain (list): Employees to browse
+            sort (str): One of ``DRILLDOWN_SORTS``
+            descending (bool): Highest values first
+            filters (list): [(metric, operator, value)] with a metric of
+                ``DRILLDOWN_METRICS`` and an operator of ``DRILLDOWN_OPERATORS``
+            after (list, optional): ``next_cursor`` of the previous page
+            limit (int): Number of rows of the page
+
+        Returns:
+            dict: rows ([{'id', 'name', 'department_id', 'department',
+                ...DRILLDOWN_METRICS}]) and next_cursor (None on the last page)
+        """
+        assert sort in DRILLDOWN_SORTS, f"Invalid sort: {sort}"
+        self.flush_model(['name', 'department_id', 'active', 'kpi_score', 'current_salary'])
+        query = self._search(domain)
+        # Aggregates are only computed for the employees of the domain
+        candidates = self._search(domain).subselect()
+        aggregates = {}
+
+        def column(name):
+            if name in ('name', 'kpi_score', 'current_salary'):
+                return SQL.identifier(query.table, name)
+            if name not in aggregates:
+                alias = query.make_alias(query.table, name)
+                query.add_join('LEFT JOIN', alias, self._get_drilldown_aggregate(name, candidates), SQL(
+                    "%s = %s", SQL.identifier(alias, 'employee_id'), SQL.identifier(query.table, 'id'),
+                ))
+                aggregates[name] = SQL("COALESCE(%s, 0)", SQL.identifier(alias, 'value'))
+            return aggregates[name]
+
+        for metric, operator, value in filters:
+            assert metric in DRILLDOWN_METRICS and operator in DRILLDOWN_OPERATORS, "Invalid filter"
+            query.add_where(SQL("%s %s %s", column(metric), SQL(operator), value))
+
+        sort_key = column(sort)
+        employee_id = SQL.identifier(query.table, 'id')
+        if after:
+            after_value, after_id = after
+            query.add_where(SQL(
+                "(%s, %s) %s (%s, %s)", sort_key, employee_id, SQL('<' if descending else '>'), after_value, after_id,
+            ))
+        direction = SQL('DESC' if descending else 'ASC')
+        query.order = SQL("%s %s, %s %s", sort_key, direction, employee_id, direction)
+        # One extra row tells whether a next page exists
+        query.limit = limit + 1
+
+        self.env.cr.execute(query.select(employee_id, sort_key))
+        page = self.env.cr.fetchall()
+        next_cursor = list(page[limit - 1]) if len(page) > limit else None
+        page = page[:limit]
+
+        employees = self.browse([row[0] for row in page])
+        leave_counts = employees._get_ytd_leave_counts()
+        attendance_hours = employees._get_attendance_hours(datetime.now() - timedelta(days=30))
+        rows = []
+        for employee in employees:
+            total_hours, working_days = attendance_hours.get(employee.id, (0.0, 0))
+            rows.append({
+                'id': employee.id,
+                'name': employee.name,
+                'department_id': employee.department_id.id or False,
+                'department': employee.department_id.name or '',
+                'kpi_score': round(employee.kpi_score, 2),
+                'current_salary': round(employee.current_salary, 2),
+                'total_leaves_ytd': leave_counts.get(employee.id, 0),
+                'avg_daily_hours': round(total_hours / working_days, 2) if working_days else 0.0,
+            })
+        return {'rows': rows, 'next_cursor': next_cursor}
+
+    def _get_drilldown_aggregate(self, metric, employee_ids):
+        """Per-employee subquery (employee_id, value) of a non-stored metric
+
+        Matches ``_get_ytd_leave_counts`` and ``_get_attendance_hours``, on
+        the partial indexes of validated leaves and worked attendances.
+
+        Args:
+            metric (str): ``total_leaves_ytd`` or ``avg_daily_hours``
+            employee_ids (SQL): Subquery of the employees to aggregate
+        """
+        if metric == 'total_leaves_ytd':
+            self.env['hr.leave'].flush_model(['employee_id', 'state', 'request_date_from'])
+            current_year = datetime.now().year
+            return SQL(
+                """
+                (SELECT employee_id, COUNT(*) AS value
+                   FROM hr_leave
+                  WHERE state = 'validate' AND request_date_from >= %s AND request_date_from <= %s
+                    AND employee_id IN (%s)
+               GROUP BY employee_id)
+                """,
+                date(current_year, 1, 1), date(current_year, 12, 31), employee_ids,
+            )
+        self.env['hr.attendance'].flush_model(['employee_id', 'check_in', 'worked_hours'])
+        return SQL(
+            """
+            (SELECT employee_id, SUM(worked_hours) / COUNT(DISTINCT check_in::date) AS value
+               FROM hr_attendance
+              WHERE check_in >= %s AND worked_hours > 0 AND employee_id IN (%s)
+           GROUP BY employee_id)
+            """,
+            datetime.now() - timedelta(days=30), employee_ids,
+        )
@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+
+from odoo import models, api
+
+# Fields feeding the hr.analytics.daily aggregates
+DAILY_AGGREGATE_FIELDS = {'employee_id', 'state', 'request_date_from'}
+
+
+class HRLeave(models.Model):
+    _name = "hr.leave"
+    _inherit = ["hr.leave", "hr.analytics.source.mixin"]
+    _hr_analytics_indexes = {
+        'analytics_validated_date_index': (['request_date_from'], "state = 'validate'"),
+        'analytics_validated_employee_index': (['employee_id', 'request_date_from'], "state = 'validate'"),
+    }
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        records = super().create(vals_list)
+        self.env['hr.analytics.daily'].sudo()._queue_cells(records._get_daily_aggregate_cells())
+        return records
+
+    def write(self, vals):
+        if not DAILY_AGGREGATE_FIELDS.intersection(vals):
+            return super().write(vals)
+        cells = self._get_daily_aggregate_cells()
+        result = super().write(vals)
+        self.env['hr.analytics.daily'].sudo()._queue_cells(cells | self._get_daily_aggregate_cells())
+        return result
+
+    def unlink(self):
+        cells = self._get_daily_aggregate_cells()
+        result = super().unlink()
+        self.env['hr.analytics.daily'].sudo()._queue_cells(cells)
+        return result
+
+    def _get_daily_aggregate_cells(self):
+        """Return the (date, department_id) aggregate cells these leaves fall in"""
+        return {
+            (leave.request_date_from, leave.employee_id.department_id.id)
+            for leave in self.sudo()
+            if leave.request_date_from
+        }
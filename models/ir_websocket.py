@@ -0,0 +1,19 @@
+# -*- coding: utf-8 -*-
+
+from odoo import models
+
+from ..tools.live_updates import LIVE_UPDATE_CHANNEL
+
+
+class IrWebsocket(models.AbstractModel):
+    _inherit = "ir.websocket"
+
+    def _build_bus_channel_list(self, channels):
+        # Internal users receive the dashboard updates of their companies
+        if self.env.uid and self.env.user._is_internal():
+            channels = list(channels)
+            channels.extend(
+                (company, LIVE_UPDATE_CHANNEL)
+                for company in self.env.user.company_ids
+            )
+        return super()._build_bus_channel_list(channels)
@@ -1,11 +1,14 @@
 /** @odoo-module **/
 
-import { Component, useState, onWillStart } from "@odoo/owl";
+import { Component, useState, onWillStart, onWillUnmount } from "@odoo/owl";
 import { registry } from "@web/core/registry";
 import { rpc } from "@web/core/network/rpc";
 import { useService } from "@web/core/utils/hooks";
 import { ChartRenderer } from "./chart_renderer";
 
+// Live updates received within this delay (ms) trigger a single reload
+const LIVE_UPDATE_DELAY = 5000;
+
 class NumberCard extends Component {
     static template = "hr_analytics_dashboard.NumberCard";
     static props = { 
@@ -24,6 +27,8 @@ class FilterSection extends Component {
         selectedDepartment: [String, Number],
         startDate: String,
         endDate: String,
+        granularity: { type: String, optional: true },
+        includeChildren: { type: Boolean, optional: true },
         onFilterChange: Function
     };
 }
@@ -40,49 +45,183 @@ class HRDashboard extends Component {
             filters: {
                 department_id: null,
                 start_date: new Date(new Date().getFullYear(), new Date().getMonth(), 1).toISOString().split('T')[0], // First day of current month
-                end_date: new Date().toISOString().split('T')[0] // Today
+                end_date: new Date().toISOString().split('T')[0], // Today
+                granularity: null, // Trend buckets, chosen by the server from the range by default
+                include_children: false // Roll the sub-departments up into the selected department
             },
             departments: [],
             autoRefresh: true, // Auto-refresh enabled by default
             lastUpdated: null,
-            isRefreshing: false
+            isRefreshing: false,
+            canViewProfileStats: false, // Sent by the server with the data
+            profileStats: null, // Rolling per-step timings, shown to admins and HR managers on demand
+            drilldown: null // Per-employee analytics rows opened from the cards
         });
 
         this.actionService = useService("action");
+        this.busService = useService("bus_service");
         this.refreshInterval = null;
+        this.versions = {}; // Section version tokens of the data currently shown
+        this.pendingLiveUpdate = false;
+        this.liveUpdateTimeout = null;
+        this.onLiveUpdate = this.onLiveUpdate.bind(this);
+        this.jobId = null; // Background job computing the data requested last
+        this.jobPollInterval = null;
+        this.onJobUpdate = this.onJobUpdate.bind(this);
+        this.busService.subscribe("hr_analytics_dashboard/job", this.onJobUpdate);
         this.loadData();
         this.loadDepartments();
         this.startAutoRefresh();
+        onWillUnmount(() => this.willUnmount());
     }
 
     async loadData() {
         this.state.loading = !this.state.lastUpdated; // Only show loading on first load
         this.state.isRefreshing = !!this.state.lastUpdated; // Show refreshing indicator for subsequent loads
+        this.stopJobPolling();
         try {
             console.log("Sending filters to API:", this.state.filters);
-            const result = await rpc("/hr_analytics/data", this.state.filters);
-            console.log("Received data from API:", result);
-            this.state.data = result;
-            this.state.loading = false;
-            this.state.isRefreshing = false;
-            this.state.lastUpdated = new Date();
-            this.state.error = null;
+            const response = await rpc("/hr_analytics/data", {
+                ...this.state.filters,
+                versions: this.versions,
+            });
+            this.state.canViewProfileStats = !!response.can_view_profile_stats;
+            if (response.job_id) {
+                // Long date ranges are computed in the background
+                console.log("Background job queued:", response.job_id);
+                this.watchJob(response.job_id);
+                return;
+            }
+            this.applyData(response);
         } catch (error) {
             console.error("API Error:", error);
             this.state.error = "Không thể lấy dữ liệu dashboard";
             this.state.loading = false;
             this.state.isRefreshing = false;
         }
+        this.applyPendingLiveUpdate();
+    }
+
+    applyData({ versions, not_modified, ...result }) {
+        console.log("Received data from API:", not_modified ? "not modified" : result);
+        // Only changed sections are sent back, merge them into the current data
+        if (!not_modified) {
+            this.state.data = { ...this.state.data, ...result };
+        }
+        this.versions = versions || {};
+        this.state.loading = false;
+        this.state.isRefreshing = false;
+        this.state.lastUpdated = new Date();
+        this.state.error = null;
+    }
+
+    applyPendingLiveUpdate() {
+        // Apply live updates received while loading
+        if (this.pendingLiveUpdate) {
+            this.pendingLiveUpdate = false;
+            this.loadData();
+        }
+    }
+
+    watchJob(jobId) {
+        this.jobId = jobId;
+        // The bus notifies the end of the job, polling is only a fallback
+        this.jobPollInterval = setInterval(() => this.pollJob(), 5000);
+    }
+
+    stopJobPolling() {
+        if (this.jobPollInterval) {
+            clearInterval(this.jobPollInterval);
+            this.jobPollInterval = null;
+        }
+        this.jobId = null;
+    }
+
+    onJobUpdate(payload) {
+        if (payload.job_id === this.jobId) {
+            this.pollJob();
+        }
+    }
+
+    async pollJob() {
+        const jobId = this.jobId;
+        if (!jobId) {
+            return;
+        }
+        try {
+            const status = await rpc("/hr_analytics/job", { job_id: jobId });
+            // Ignore the answers of jobs replaced by a newer request
+            if (jobId !== this.jobId || status.state === "queued" || status.state === "running") {
+                return;
+            }
+            this.stopJobPolling();
+            if (status.state === "done") {
+                this.applyData(status.data);
+            } else {
+                console.error("Background job failed:", status.message);
+                this.state.error = "Không thể lấy dữ liệu dashboard";
+                this.state.loading = false;
+                this.state.isRefreshing = false;
+            }
+            this.applyPendingLiveUpdate();
+        } catch (error) {
+            console.error("Failed to poll background job:", error);
+        }
+    }
+
+    onLiveUpdate(payload) {
+        const departmentIds = this.getFilterDepartmentIds();
+        // Company-wide figures change with any department
+        if (departmentIds && !departmentIds.some((id) => payload.department_ids.includes(id))) {
+            return;
+        }
+        console.log("Live update received:", payload);
+        // Bursts of changes are coalesced into a single reload
+        if (!this.liveUpdateTimeout) {
+            this.liveUpdateTimeout = setTimeout(() => this.applyLiveUpdate(), LIVE_UPDATE_DELAY);
+        }
+    }
+
+    applyLiveUpdate() {
+        this.liveUpdateTimeout = null;
+        if (this.state.loading || this.state.isRefreshing) {
+            this.pendingLiveUpdate = true;
+        } else {
+            // Unchanged sections are skipped server-side through the versions
+            this.loadData();
+        }
+    }
+
+    cancelLiveUpdate() {
+        if (this.liveUpdateTimeout) {
+            clearTimeout(this.liveUpdateTimeout);
+            this.liveUpdateTimeout = null;
+        }
+    }
+
+    getFilterDepartmentIds() {
+        const departmentId = this.state.filters.department_id;
+        if (!departmentId) {
+            return null;
+        }
+        const ids = [Number(departmentId)];
+        if (this.state.filters.include_children) {
+            const byId = Object.fromEntries(this.state.departments.map((dept) => [dept.id, dept]));
+            for (let i = 0; i < ids.length; i++) {
+                ids.push(...((byId[ids[i]] && byId[ids[i]].child_ids) || []));
+            }
+        }
+        return ids;
     }
 
     async loadDepartments() {
         try {
-            const departments = await rpc("/web/dataset/call_kw", {
-                model: "hr.department",
-                method: "search_read",
-                args: [[], ["id", "name"]],
-                kwargs: {}
-            });
+            // Plain GET, revalidated by the browser against the server ETag
+            const response = await fetch("/hr_analytics/departments", { credentials: "same-origin" });
+            if (!response.ok) {
+                throw new Error(`HTTP ${response.status}`);
+            }
+            const departments = await response.json();
             this.state.departments = departments;
             console.log("Loaded departments:", departments);
         } catch (error) {
@@ -93,8 +232,12 @@ class HRDashboard extends Component {
     onFilterChange(filterType, value) {
         console.log(`Filter changed: ${filterType} = ${value}`);
         this.state.filters[filterType] = value;
+        this.versions = {}; // Versions only apply to the previous filters
         console.log("Updated filters:", this.state.filters);
         this.loadData();
+        if (this.state.drilldown) {
+            this.openDrilldown(this.state.drilldown.sort, this.state.drilldown.order);
+        }
         
         // Restart auto-refresh when filters change
         if (this.state.autoRefresh) {
@@ -106,13 +249,17 @@ class HRDashboard extends Component {
         if (this.refreshInterval) {
             clearInterval(this.refreshInterval);
         }
+        this.busService.unsubscribe("hr_analytics_dashboard/update", this.onLiveUpdate);
         
         if (this.state.autoRefresh) {
+            // Changes are pushed on the bus, polling is only a fallback
+            this.busService.subscribe("hr_analytics_dashboard/update", this.onLiveUpdate);
+            this.busService.start();
             this.refreshInterval = setInterval(() => {
                 if (!this.state.loading && !this.state.isRefreshing) {
                     this.loadData();
                 }
-            }, 30000); // Refresh every 30 seconds
+            }, 300000); // Refresh every 5 minutes
         }
     }
 
@@ -121,12 +268,14 @@ class HRDashboard extends Component {
         
         if (this.state.autoRefresh) {
             this.startAutoRefresh();
-            this.showNotification('success', 'Cập nhật tự động đã được bật (30 giây)');
+            this.showNotification('success', 'Cập nhật tự động đã được bật (trực tiếp)');
         } else {
             if (this.refreshInterval) {
                 clearInterval(this.refreshInterval);
                 this.refreshInterval = null;
             }
+            this.busService.unsubscribe("hr_analytics_dashboard/update", this.onLiveUpdate);
+            this.cancelLiveUpdate();
             this.showNotification('info', 'Cập nhật tự động đã được tắt');
         }
     }
@@ -138,14 +287,88 @@ class HRDashboard extends Component {
         }
     }
 
+    async toggleProfileStats() {
+        if (this.state.profileStats) {
+            this.state.profileStats = null;
+            return;
+        }
+        try {
+            const stats = await rpc("/hr_analytics/profile_stats", {});
+            if (stats.error) {
+                this.showNotification('error', stats.message);
+                return;
+            }
+            this.state.profileStats = Object.entries(stats).map(([step, values]) => ({ step, ...values }));
+        } catch (error) {
+            console.error("Failed to load profile stats:", error);
+            this.showNotification('error', 'Không thể tải thống kê hiệu năng');
+        }
+    }
+
     willUnmount() {
         if (this.refreshInterval) {
             clearInterval(this.refreshInterval);
         }
+        this.stopJobPolling();
+        this.cancelLiveUpdate();
+        this.busService.unsubscribe("hr_analytics_dashboard/update", this.onLiveUpdate);
+        this.busService.unsubscribe("hr_analytics_dashboard/job", this.onJobUpdate);
+    }
+
+    // Drill-down rows, keyset-paginated server-side
+    async openDrilldown(sort = "kpi_score", order = "asc") {
+        this.state.drilldown = { sort, order, rows: [], nextCursor: null, loading: false };
+        await this.loadDrilldownPage();
+    }
+
+    async loadDrilldownPage() {
+        const drilldown = this.state.drilldown;
+        if (!drilldown || drilldown.loading) {
+            return;
+        }
+        drilldown.loading = true;
+        try {
+            const page = await rpc("/hr_analytics/employees", {
+                department_id: this.state.filters.department_id,
+                include_children: this.state.filters.include_children,
+                sort: drilldown.sort,
+                order: drilldown.order,
+                after: drilldown.nextCursor,
+            });
+            if (page.error) {
+                this.showNotification('error', page.message);
+                return;
+            }
+            drilldown.rows.push(...page.rows);
+            drilldown.nextCursor = page.next_cursor;
+        } catch (error) {
+            console.error("Failed to load employee rows:", error);
+            this.showNotification('error', 'Không thể tải danh sách nhân viên');
+        } finally {
+            drilldown.loading = false;
+        }
+    }
+
+    onDrilldownSort(sort) {
+        const drilldown = this.state.drilldown;
+        const order = drilldown.sort === sort && drilldown.order === "asc" ? "desc" : "asc";
+        this.openDrilldown(sort, order);
+    }
+
+    closeDrilldown() {
+        this.state.drilldown = null;
     }
 
     // Navigation handlers
     onEmployeesClick() {
+        this.openDrilldown("name", "asc");
+    }
+
+    onKpiClick() {
+        this.openDrilldown("kpi_score", "asc"); // Lowest KPI first
+    }
+
+    openEmployeeList() {
         this.actionService.doAction({
             type: "ir.actions.act_window",
             name: "Employees",
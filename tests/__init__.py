@@ -0,0 +1,11 @@
+# -*- coding: utf-8 -*-
+
+from . import test_analytics_math
+from . import test_analytics_page
+from . import test_analytics_stats
+from . import test_attendance_year
+from . import test_benchmarks
+from . import test_cohort_index
+from . import test_daily_aggregates
+from . import test_kpi_score
+from . import test_result_cache
@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+
+from odoo.tests import BaseCase
+
+from ..tools import analytics_math
+
+
+class TestAnalyticsMath(BaseCase):
+
+    def test_histogram(self):
+        self.assertEqual(analytics_math.histogram([]), [])
+        # Upper bounds open a new bucket, empty buckets are left out
+        self.assertEqual(
+            analytics_math.histogram([0, 9.99, 10, 35, 100]),
+            [(0, 2), (10, 1), (30, 1), (100, 1)],
+        )
+        self.assertEqual(analytics_math.histogram([3, 7, 12], bin_width=5), [(0, 1), (5, 1), (10, 1)])
+
+    def test_describe(self):
+        empty = analytics_math.describe([])
+        self.assertEqual(empty['count'], 0)
+        self.assertEqual(empty['p90'], 0.0)
+
+        stats = analytics_math.describe([10, 20, 30, 40])
+        self.assertEqual(stats['count'], 4)
+        self.assertAlmostEqual(stats['mean'], 25.0)
+        self.assertAlmostEqual(stats['std'], 125 ** 0.5)
+        self.assertEqual((stats['min'], stats['max']), (10.0, 40.0))
+        self.assertAlmostEqual(stats['p25'], 17.5)
+        self.assertAlmostEqual(stats['p50'], 25.0)
+        self.assertAlmostEqual(stats['p90'], 37.0)
+
+    def test_ratios(self):
+        self.assertEqual(analytics_math.ratios([10, 5, 0], [4, 0, 0]).tolist(), [2.5, 0.0, 0.0])
+
+    def test_rolling_means(self):
+        # Days 1, 2 and 10: the gap counts as empty days
+        days, means = analytics_math.rolling_means([1, 2, 10], [8, 6, 9], [1, 2, 1], windows=(2, 10))
+        self.assertEqual(days.tolist(), [1, 2, 10])
+        self.assertEqual(means[2].tolist(), [8.0, 14 / 3, 9.0])
+        self.assertEqual(means[10].tolist(), [8.0, 14 / 3, 23 / 4])
+
+    def test_rolling_means_empty(self):
+        days, means = analytics_math.rolling_means([], [], [], windows=(7,))
+        self.assertEqual(days.size, 0)
+        self.assertEqual(means[7].size, 0)
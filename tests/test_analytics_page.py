@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+
+from datetime import datetime, time, timedelta
+
+from odoo.tests import TransactionCase, tagged
+
+
+@tagged('post_install', '-at_install')
+class TestAnalyticsPage(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.employees = cls.env['hr.employee'].create([
+            {'name': f"Page Test {index % 4}"} for index in range(11)
+        ])
+        check_in = datetime.combine(datetime.now().date() - timedelta(days=2), time(8))
+        cls.env['hr.attendance'].create([
+            {
+                'employee_id': employee.id,
+                'check_in': check_in,
+                'check_out': check_in + timedelta(hours=index % 5 + 1),
+            }
+            for index, employee in enumerate(cls.employees[:8])
+        ])
+        cls.domain = [('id', 'in', cls.employees.ids)]
+
+    def _get_all_pages(self, sort, descending=False, filters=(), limit=3):
+        Employee = self.env['hr.employee']
+        rows, after = [], None
+        while True:
+            page = Employee._get_analytics_page(self.domain, sort, descending, filters, after, limit)
+            self.assertLessEqual(len(page['rows']), limit)
+            rows += page['rows']
+            after = page['next_cursor']
+            if not after:
+                return rows
+
+    def _assertKeysetOrder(self, rows, sort, descending=False):
+        keys = [(row[sort], row['id']) for row in rows]
+        self.assertEqual(keys, sorted(keys, reverse=descending))
+
+    def test_pages_cover_all_employees(self):
+        for sort in ('name', 'kpi_score', 'current_salary', 'total_leaves_ytd', 'avg_daily_hours'):
+            for descending in (False, True):
+                with self.subTest(sort=sort, descending=descending):
+                    rows = self._get_all_pages(sort, descending)
+                    self.assertEqual(sorted(row['id'] for row in rows), self.employees.ids)
+                    self._assertKeysetOrder(rows, sort, descending)
+
+    def test_ties_broken_by_id(self):
+        # Several employees share each name: the id keeps the pages disjoint
+        rows = self._get_all_pages('name', limit=2)
+        self.assertEqual(len(rows), len(self.employees))
+        self.assertEqual(len({row['id'] for row in rows}), len(self.employees))
+
+    def test_single_page(self):
+        page = self.env['hr.employee']._get_analytics_page(self.domain, 'name', limit=len(self.employees))
+        self.assertEqual(len(page['rows']), len(self.employees))
+        self.assertIsNone(page['next_cursor'])
+
+    def test_filters(self):
+        rows = self._get_all_pages('avg_daily_hours', filters=[('avg_daily_hours', '>=', 3)])
+        self.assertEqual(sorted(row['avg_daily_hours'] for row in rows), [3.0, 3.0, 4.0, 5.0])
+        self._assertKeysetOrder(rows, 'avg_daily_hours')
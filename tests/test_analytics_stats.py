@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+
+from datetime import date, datetime, timedelta
+
+from odoo.tests import TransactionCase, tagged
+
+
+@tagged('post_install', '-at_install')
+class TestAnalyticsStats(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.department = cls.env['hr.department'].create({'name': 'Stats Test'})
+        cls.employees = cls.env['hr.employee'].create([
+            {'name': f"Stats Test {index}", 'department_id': cls.department.id} for index in range(3)
+        ])
+        cls.env['hr.contract'].create([
+            {
+                'name': f"Stats Test Contract {index}",
+                'employee_id': employee.id,
+                'wage': wage,
+                'date_start': date(2001, 1, 1),
+                'state': 'open',
+            }
+            for index, (employee, wage) in enumerate(zip(cls.employees, (3000, 1500, 0)))
+        ])
+        cls.env['hr.attendance'].create([
+            {
+                'employee_id': cls.employees[0].id,
+                'check_in': check_in,
+                'check_out': check_in + timedelta(hours=hours),
+            }
+            for check_in, hours in (
+                (datetime(2001, 3, 1, 8), 8),
+                (datetime(2001, 3, 2, 8), 6),
+                # On date_to: outside of the window
+                (datetime(2001, 3, 10, 8), 4),
+            )
+        ])
+        Daily = cls.env['hr.analytics.daily']
+        while Daily._process_queue_batch():
+            pass
+
+    def test_stats(self):
+        stats = self.env['hr.analytics.stats'].create({
+            'department_id': self.department.id,
+            'date_from': date(2001, 3, 1),
+            'date_to': date(2001, 3, 10),
+        })
+        stats._refresh_stats()
+        # Contracts without wage count in the average
+        self.assertAlmostEqual(stats.avg_salary, 1500)
+        self.assertAlmostEqual(stats.total_salary_cost, 4500)
+        self.assertAlmostEqual(stats.total_worked_hours, 14)
+        self.assertAlmostEqual(stats.avg_daily_hours, 7)
@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from odoo.tests import TransactionCase, tagged
+
+
+@tagged('post_install', '-at_install')
+class TestAttendanceYear(TransactionCase):
+    """The attendance year index matches grouping the attendances directly"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.employees = cls.env['hr.employee'].create([
+            {'name': f"Attendance Year Test {index}"} for index in range(3)
+        ])
+        shifts = [
+            # Before the start of the window, on its first day
+            (0, datetime(2001, 3, 10, 8), 2),
+            # In the window, on its first day
+            (0, datetime(2001, 3, 10, 13), 3.25),
+            (1, datetime(2001, 3, 10, 12), 1),
+            (0, datetime(2001, 3, 11, 8), 8),
+            (0, datetime(2001, 3, 11, 18), 0.5),
+            (1, datetime(2001, 12, 31, 22), 4),
+            (1, datetime(2002, 1, 2, 8), 7.75),
+            # No worked hours
+            (2, datetime(2001, 3, 10, 23), 0),
+            (2, datetime(2001, 4, 1, 8), 0),
+        ]
+        cls.env['hr.attendance'].create([
+            {
+                'employee_id': cls.employees[index].id,
+                'check_in': check_in,
+                'check_out': check_in + timedelta(hours=hours),
+            }
+            for index, check_in, hours in shifts
+        ])
+
+    def _get_expected(self, date_from):
+        """Attendance days and worked hours by the grouped attendance query"""
+        Attendance = self.env['hr.attendance'].with_context(tz='UTC')
+        domain = [('employee_id', 'in', self.employees.ids), ('check_in', '>=', date_from)]
+        days = defaultdict(int)
+        for employee, _day in Attendance._read_group(domain, groupby=['employee_id', 'check_in:day']):
+            days[employee.id] += 1
+        hours = defaultdict(lambda: (0.0, 0))
+        for employee, _day, worked_hours in Attendance._read_group(
+            domain + [('worked_hours', '>', 0)],
+            groupby=['employee_id', 'check_in:day'],
+            aggregates=['worked_hours:sum'],
+        ):
+            total_hours, worked_days = hours[employee.id]
+            hours[employee.id] = (total_hours + worked_hours, worked_days + 1)
+        return dict(days), dict(hours)
+
+    def test_window_stats(self):
+        for date_from in (
+            datetime(2001, 3, 10, 12, 30),
+            datetime(2001, 3, 10, 12),
+            datetime(2001, 3, 10),
+            datetime(2001, 3, 11, 12),
+            datetime(2001, 12, 31, 23),
+            datetime(2002, 1, 1),
+        ):
+            with self.subTest(date_from=date_from):
+                expected_days, expected_hours = self._get_expected(date_from)
+                self.assertEqual(self.employees._get_attendance_day_counts(date_from), expected_days)
+                hours = self.employees._get_attendance_hours(date_from)
+                self.assertEqual(hours.keys(), expected_hours.keys())
+                for employee_id, (total_hours, worked_days) in expected_hours.items():
+                    self.assertAlmostEqual(hours[employee_id][0], total_hours, places=6)
+                    self.assertEqual(hours[employee_id][1], worked_days)
+
+    def test_refresh_on_write(self):
+        attendance = self.env['hr.attendance'].search([('employee_id', '=', self.employees[1].id)], limit=1)
+        attendance.write({'check_in': datetime(2003, 6, 1, 8), 'check_out': datetime(2003, 6, 1, 9)})
+        date_from = datetime(2001, 1, 1)
+        self.assertEqual(self.employees._get_attendance_day_counts(date_from), self._get_expected(date_from)[0])
+
+        self.env['hr.analytics.attendance.year']._rebuild()
+        self.assertEqual(self.employees._get_attendance_day_counts(date_from), self._get_expected(date_from)[0])
@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+
+import logging
+import time
+from datetime import datetime, timedelta
+
+from odoo.tests import HttpCase, TransactionCase, tagged
+
+from ..benchmarks import data_generator, kpi_queries, runner
+
+_logger = logging.getLogger(__name__)
+
+# Employees of the generated benchmark dataset
+BENCHMARK_EMPLOYEES = 1000
+
+
+@tagged('post_install', '-at_install', '-standard', 'hr_analytics_benchmark')
+class TestAnalyticsBenchmark(TransactionCase):
+    """Wall time, queries and peak memory of every analytics entry point
+
+    Not part of the standard test run: run with ``--test-tags
+    hr_analytics_benchmark``. The dataset is generated once by
+    ``data_generator`` and rolled back with the test transaction.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.env['ir.config_parameter'].sudo().set_param('hr_analytics_dashboard.cache_ttl', 0)
+        cls.volumes = data_generator.generate(cls.env, employees=BENCHMARK_EMPLOYEES)
+
+    def test_entry_points(self):
+        for name, func in runner.get_entry_points(self.env, self.volumes).items():
+            with self.subTest(entry_point=name):
+                result = runner.measure(self.env, func)
+                _logger.info("HR Analytics benchmark, %s employees, %s: %s", BENCHMARK_EMPLOYEES, name, result)
+
+    def test_kpi_query_count(self):
+        """KPI scoring runs a flat number of queries whatever the headcount"""
+        employees = self.env['hr.employee'].search([('active', '=', True)])
+        results = [
+            kpi_queries.measure_kpi_computation(employees[:size])
+            for size in (10, 100, len(employees))
+        ]
+        _logger.info("HR Analytics KPI benchmark: %s", results)
+        self.assertEqual(len({result['queries'] for result in results}), 1)
+
+
+@tagged('post_install', '-at_install', '-standard', 'hr_analytics_benchmark')
+class TestAnalyticsBenchmarkHttp(HttpCase):
+    """End-to-end wall time of the dashboard endpoint over HTTP"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.env['ir.config_parameter'].sudo().set_param('hr_analytics_dashboard.cache_ttl', 0)
+        data_generator.generate(cls.env, employees=BENCHMARK_EMPLOYEES)
+
+    def test_dashboard_data(self):
+        self.authenticate('admin', 'admin')
+        params = {
+            'start_date': (datetime.now().date() - timedelta(days=30)).isoformat(),
+            'end_date': datetime.now().date().isoformat(),
+        }
+
+        started = time.perf_counter()
+        data = self.make_jsonrpc_request('/hr_analytics/data', params)
+        full_ms = (time.perf_counter() - started) * 1000
+        self.assertFalse(data.get('error'), data.get('message'))
+
+        started = time.perf_counter()
+        data = self.make_jsonrpc_request('/hr_analytics/data', dict(params, versions=data['versions']))
+        not_modified_ms = (time.perf_counter() - started) * 1000
+        self.assertTrue(data.get('not_modified'))
+
+        _logger.info(
+            "HR Analytics HTTP benchmark, %s employees: full=%.2fms not_modified=%.2fms",
+            BENCHMARK_EMPLOYEES, full_ms, not_modified_ms,
+        )
@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+
+from datetime import date
+
+from odoo.tests import BaseCase
+
+from ..tools.cohort_index import NO_DEPARTMENT, CohortIndex, months_between
+
+
+class TestCohortIndex(BaseCase):
+
+    def setUp(self):
+        super().setUp()
+        self.index = CohortIndex()
+        # Employed all year in department 10
+        self.index.set_employee(1, date(2020, 1, 1), None, 1, [(date(2020, 1, 1), 10)])
+        # Hired mid-March in department 10, moved to department 20 in June
+        self.index.set_employee(2, date(2024, 3, 15), None, 1, [(date(2024, 3, 15), 10), (date(2024, 6, 1), 20)])
+        # Left department 20 at the end of September
+        self.index.set_employee(3, date(2022, 5, 1), date(2024, 9, 30), 1, [(date(2022, 5, 1), 20)])
+        # Another company, no department
+        self.index.set_employee(4, date(2024, 2, 1), None, 2, [(date(2024, 2, 1), False)])
+
+    def test_months_between(self):
+        day = date.toordinal
+        self.assertEqual(months_between(day(date(2024, 1, 15)), day(date(2024, 1, 15))), 0)
+        self.assertEqual(months_between(day(date(2024, 1, 15)), day(date(2024, 2, 14))), 0)
+        self.assertEqual(months_between(day(date(2024, 1, 15)), day(date(2024, 2, 15))), 1)
+        self.assertEqual(months_between(day(date(2024, 1, 31)), day(date(2024, 2, 29))), 0)
+        self.assertEqual(months_between(day(date(2023, 11, 30)), day(date(2025, 1, 30))), 14)
+
+    def test_period_counts(self):
+        counts = self.index.period_counts(date(2024, 1, 1), date(2024, 12, 31), company_ids=[1])
+        # [headcount_start, headcount_end, hires, departures] in the
+        # department of each employee on the day of each event
+        self.assertEqual(counts, {
+            10: [1, 1, 1, 0],
+            20: [1, 1, 0, 1],
+        })
+
+        counts = self.index.period_counts(date(2024, 1, 1), date(2024, 12, 31))
+        self.assertEqual(counts[NO_DEPARTMENT], [0, 1, 1, 0])
+
+        # Departure on the first day of the period: counted in both
+        counts = self.index.period_counts(date(2024, 9, 30), date(2024, 10, 31), company_ids=[1])
+        self.assertEqual(counts[20], [2, 1, 0, 1])
+
+    def test_set_employee_replaces_entry(self):
+        self.index.set_employee(3, date(2022, 5, 1), None, 1, [(date(2022, 5, 1), 20)])
+        self.assertEqual(len(self.index), 4)
+        counts = self.index.period_counts(date(2024, 1, 1), date(2024, 12, 31), company_ids=[1])
+        self.assertEqual(counts[20], [1, 2, 0, 0])
+
+    def test_retention_curve(self):
+        index = CohortIndex()
+        index.set_employee(1, date(2024, 1, 10), None, 1, [(date(2024, 1, 10), 10)])
+        index.set_employee(2, date(2024, 1, 20), date(2024, 3, 5), 1, [(date(2024, 1, 20), 10)])
+        index.set_employee(3, date(2024, 3, 1), None, 1, [(date(2024, 3, 1), 20)])
+        curve = index.retention_curve(date(2024, 1, 1), date(2024, 3, 31), 4, date(2024, 5, 15))
+        # Employee 3 is only eligible up to month 2 (right censoring),
+        # employee 2 only retained up to month 1
+        self.assertEqual(curve, [(3, 3), (3, 3), (3, 2), (2, 1), (1, 1)])
+
+        curve = index.retention_curve(date(2024, 1, 1), date(2024, 3, 31), 2, date(2024, 5, 15), {20})
+        self.assertEqual(curve, [(1, 1), (1, 1), (1, 1)])
+
+    def test_tenure_distribution(self):
+        counts = self.index.tenure_distribution(date(2024, 12, 31), company_ids=[1])
+        # <1 year: employee 2; 1-2: none (employee 3 left); 2-5: employee 1
+        self.assertEqual(counts, [1, 0, 1, 0, 0])
@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+
+from datetime import date, datetime, timedelta
+
+from odoo.tests import TransactionCase, tagged
+
+from ..benchmarks.data_generator import FAST_CREATE_CONTEXT
+
+DATE_FROM = date(2001, 3, 1)
+DATE_TO = date(2001, 3, 31)
+
+
+@tagged('post_install', '-at_install')
+class TestDailyAggregates(TransactionCase):
+    """The queued incremental refresh matches a rebuild from the source rows"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.env = cls.env(context=dict(cls.env.context, **FAST_CREATE_CONTEXT))
+        cls.departments = cls.env['hr.department'].create([
+            {'name': 'Daily Test A'},
+            {'name': 'Daily Test B'},
+        ])
+        cls.employees = cls.env['hr.employee'].create([
+            {'name': 'Daily Test 1', 'department_id': cls.departments[0].id},
+            {'name': 'Daily Test 2', 'department_id': cls.departments[0].id},
+            {'name': 'Daily Test 3', 'department_id': cls.departments[1].id},
+            {'name': 'Daily Test 4'},
+        ])
+        cls.leave_type = cls.env['hr.leave.type'].create({
+            'name': 'Daily Test Leave',
+            'requires_allocation': 'no',
+        })
+        cls._process_queue()
+
+    @classmethod
+    def _process_queue(cls):
+        Daily = cls.env['hr.analytics.daily']
+        while Daily._process_queue_batch():
+            pass
+
+    def _get_rows(self):
+        rows = self.env['hr.analytics.daily'].search_read(
+            [('date', '>=', DATE_FROM), ('date', '<=', DATE_TO)],
+            ['date', 'company_id', 'department_id', 'attendance_count', 'worked_hours', 'employee_count', 'leave_count'],
+        )
+        return sorted(
+            (
+                row['date'], row['company_id'], row['department_id'], row['attendance_count'],
+                round(row['worked_hours'], 6), row['employee_count'], row['leave_count'],
+            )
+            for row in rows
+        )
+
+    def _assertMatchesRebuild(self):
+        self._process_queue()
+        incremental = self._get_rows()
+        self.env['hr.analytics.daily']._rebuild(DATE_FROM, DATE_TO)
+        self.assertEqual(incremental, self._get_rows())
+        return incremental
+
+    def _create_attendances(self):
+        return self.env['hr.attendance'].create([
+            {
+                'employee_id': employee.id,
+                'check_in': datetime(2001, 3, day, 8),
+                'check_out': datetime(2001, 3, day, 8) + timedelta(hours=hours),
+            }
+            for day, hours in ((5, 8), (6, 7.5), (9, 4))
+            for employee in self.employees
+        ])
+
+    def test_attendances(self):
+        attendances = self._create_attendances()
+        rows = self._assertMatchesRebuild()
+        self.assertEqual(sum(row[3] for row in rows), len(attendances))
+
+        attendances[:2].write({'check_out': datetime(2001, 3, 5, 10)})
+        attendances[2:4].write({'check_in': datetime(2001, 3, 20, 8), 'check_out': datetime(2001, 3, 20, 9)})
+        self._assertMatchesRebuild()
+
+        attendances[4:].unlink()
+        self._assertMatchesRebuild()
+
+    def test_leaves(self):
+        leaves = self.env['hr.leave'].create([
+            {
+                'employee_id': employee.id,
+                'holiday_status_id': self.leave_type.id,
+                'request_date_from': date(2001, 3, day),
+                'request_date_to': date(2001, 3, day),
+            }
+            for day in (7, 8)
+            for employee in self.employees
+        ])
+        # Not validated yet
+        self.assertFalse(any(row[6] for row in self._assertMatchesRebuild()))
+
+        leaves.write({'state': 'validate'})
+        rows = self._assertMatchesRebuild()
+        self.assertEqual(sum(row[6] for row in rows), len(leaves))
+
+        leaves[:3].write({'state': 'refuse'})
+        self._assertMatchesRebuild()
+
+    def test_department_move(self):
+        self._create_attendances()
+        self._process_queue()
+        self.employees[0].department_id = self.departments[1]
+        self.employees[3].department_id = self.departments[0]
+        self.employees[2].department_id = False
+        self._assertMatchesRebuild()
@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+
+from datetime import datetime, time, timedelta
+
+from odoo import fields
+from odoo.tests import TransactionCase, tagged
+
+from ..benchmarks.data_generator import FAST_CREATE_CONTEXT
+
+
+@tagged('post_install', '-at_install')
+class TestKpiScore(TransactionCase):
+    """The stored KPI score follows attendance and leave changes"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.env = cls.env(context=dict(cls.env.context, **FAST_CREATE_CONTEXT))
+        cls.employee = cls.env['hr.employee'].create({'name': 'KPI Test'})
+        cls.leave_type = cls.env['hr.leave.type'].create({
+            'name': 'KPI Test Leave',
+            'requires_allocation': 'no',
+        })
+
+    def test_dependencies(self):
+        self.assertEqual(self.employee.kpi_score, 100)
+
+        today = fields.Date.context_today(self.employee)
+        attendances = self.env['hr.attendance'].create([
+            {
+                'employee_id': self.employee.id,
+                'check_in': datetime.combine(today - timedelta(days=days), time(8)),
+                'check_out': datetime.combine(today - timedelta(days=days), time(12)),
+            }
+            for days in range(2, 13)
+        ])
+        # 11 attendance days out of 22 working days
+        self.assertAlmostEqual(self.employee.kpi_score, 50)
+
+        leave = self.env['hr.leave'].create({
+            'employee_id': self.employee.id,
+            'holiday_status_id': self.leave_type.id,
+            'request_date_from': today,
+            'request_date_to': today,
+        })
+        self.assertAlmostEqual(self.employee.kpi_score, 50)
+        leave.write({'state': 'validate'})
+        self.assertAlmostEqual(self.employee.kpi_score, 97 / 2)
+
+        attendances[0].unlink()
+        self.assertAlmostEqual(self.employee.kpi_score, 97 * 10 / 22)
+
+        attendances[1].write({'check_in': datetime(2001, 1, 1, 8), 'check_out': datetime(2001, 1, 1, 9)})
+        self.assertAlmostEqual(self.employee.kpi_score, 97 * 9 / 22)
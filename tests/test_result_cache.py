@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+
+from unittest.mock import patch
+
+from odoo.tests import BaseCase
+
+from ..tools.result_cache import ResultCache
+
+
+class TestResultCache(BaseCase):
+
+    def setUp(self):
+        super().setUp()
+        self.cache = ResultCache(max_entries=2)
+        self.now = 1000.0
+        patcher = patch('time.monotonic', lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_ttl(self):
+        self.cache.set('db', 'key', 'value')
+        self.now += 10
+        self.assertEqual(self.cache.get('db', 'key', ttl=10), 'value')
+        self.now += 1
+        self.assertIsNone(self.cache.get('db', 'key', ttl=10))
+        # Expired entries are dropped
+        self.assertIsNone(self.cache.get('db', 'key', ttl=100))
+
+    def test_lru_eviction(self):
+        self.cache.set('db', 'a', 1)
+        self.cache.set('db', 'b', 2)
+        # Reading 'a' makes 'b' the least recently used entry
+        self.assertEqual(self.cache.get('db', 'a', ttl=60), 1)
+        self.cache.set('db', 'c', 3)
+        self.assertIsNone(self.cache.get('db', 'b', ttl=60))
+        self.assertEqual(self.cache.get('db', 'a', ttl=60), 1)
+        self.assertEqual(self.cache.get('db', 'c', ttl=60), 3)
+
+    def test_version(self):
+        self.cache.set('db', 'key', 'value', version=(1, 2))
+        self.assertEqual(self.cache.get('db', 'key', ttl=60, version=(1, 2)), 'value')
+        self.assertIsNone(self.cache.get('db', 'key', ttl=60, version=(1, 3)))
+        self.assertIsNone(self.cache.get('db', 'key', ttl=60, version=(1, 2)))
+
+    def test_databases(self):
+        self.cache.set('db1', 'key', 1)
+        self.cache.set('db2', 'key', 2)
+        self.cache.set('db2', 'other', 3)
+        # Each database has its own entries and limit
+        self.assertEqual(self.cache.get('db1', 'key', ttl=60), 1)
+        self.cache.invalidate('db2')
+        self.assertIsNone(self.cache.get('db2', 'key', ttl=60))
+        self.assertEqual(self.cache.get('db1', 'key', ttl=60), 1)
@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+"""
+Vectorized statistics for the analytics dashboard.
+
+Inputs are flat columns (scores, hours, day ordinals) converted once to
+NumPy arrays; no function loops over rows in Python.
+"""
+
+import numpy as np
+
+DEFAULT_PERCENTILES = (25, 50, 75, 90)
+
+
+def histogram(values, bin_width=10):
+    """Count values per bucket of bin_width, keeping non-empty buckets only
+
+    Buckets are labelled by their lower bound (``int(value // bin_width) *
+    bin_width``), so a value equal to an upper bound opens a new bucket.
+
+    Returns:
+        list: [(bucket_lower_bound, count)] sorted by bucket
+    """
+    values = np.asarray(values, dtype=float)
+    if not values.size:
+        return []
+    buckets, counts = np.unique((values // bin_width).astype(int) * bin_width, return_counts=True)
+    return list(zip(buckets.tolist(), counts.tolist()))
+
+
+def describe(values, percentiles=DEFAULT_PERCENTILES):
+    """Return count, mean, std, min, max and percentiles (``p25``...) of values"""
+    values = np.asarray(values, dtype=float)
+    if not values.size:
+        return {'count': 0, 'mean': 0.0, 'std': 0.0, 'min': 0.0, 'max': 0.0,
+                **{f'p{p}': 0.0 for p in percentiles}}
+    return {
+        'count': int(values.size),
+        'mean': float(values.mean()),
+        'std': float(values.std()),
+        'min': float(values.min()),
+        'max': float(values.max()),
+        **{f'p{p}': float(value) for p, value in zip(percentiles, np.percentile(values, percentiles))},
+    }
+
+
+def ratios(sums, counts):
+    """Element-wise sums / counts, 0 where the count is 0"""
+    sums = np.asarray(sums, dtype=float)
+    counts = np.asarray(counts, dtype=float)
+    return np.divide(sums, counts, out=np.zeros_like(sums), where=counts > 0)
+
+
+def rolling_means(day_ordinals, sums, counts, windows=(7, 30)):
+    """Trailing calendar-window means of per-day sums and counts
+
+    Days without data count as empty (they neither add to the sum nor to
+    the count), so a window mean is ``sum of sums / sum of counts`` over the
+    last N calendar days.
+
+    Returns:
+        tuple: (day ordinals of the input days, {window: means})
+    """
+    day_ordinals = np.asarray(day_ordinals, dtype=int)
+    if not day_ordinals.size:
+        return day_ordinals, {window: np.zeros(0) for window in windows}
+    first = day_ordinals.min()
+    span = day_ordinals.max() - first + 1
+    positions = day_ordinals - first
+    dense_sums = np.bincount(positions, weights=np.asarray(sums, dtype=float), minlength=span)
+    dense_counts = np.bincount(positions, weights=np.asarray(counts, dtype=float), minlength=span)
+    cumulative_sums = np.concatenate(([0.0], np.cumsum(dense_sums)))
+    cumulative_counts = np.concatenate(([0.0], np.cumsum(dense_counts)))
+
+    means = {}
+    ends = positions + 1
+    for window in windows:
+        starts = np.maximum(ends - window, 0)
+        window_sums = cumulative_sums[ends] - cumulative_sums[starts]
+        window_counts = cumulative_counts[ends] - cumulative_counts[starts]
+        means[window] = ratios(window_sums, window_counts)
+    return day_ordinals, means
@@ -0,0 +1,222 @@
+# -*- coding: utf-8 -*-
+
+import threading
+from array import array
+from bisect import bisect_right
+from collections import defaultdict
+from datetime import date
+
+# Key of the employees without department in the per-department counts
+NO_DEPARTMENT = 0
+
+# Tenure buckets in years: (label, lower bound, upper bound or None)
+TENURE_BUCKETS = (
+    ('<1', 0, 1),
+    ('1-2', 1, 2),
+    ('2-5', 2, 5),
+    ('5-10', 5, 10),
+    ('10+', 10, None),
+)
+
+
+def months_between(start, end):
+    """Number of whole months from ordinal ``start`` to ordinal ``end``"""
+    start, end = date.fromordinal(start), date.fromordinal(end)
+    months = (end.year - start.year) * 12 + end.month - start.month
+    return months - 1 if end.day < start.day else months
+
+
+class CohortIndex:
+    """Compact in-memory index of employee hires, departures and departments
+
+    One entry per employee in parallel arrays of day ordinals: hire day,
+    last day of employment (0 while employed) and company, plus the
+    department history as (start ordinals, department ids) arrays sorted by
+    date. Period turnover, retention and tenure figures are answered from it
+    in a single pass without querying the database.
+
+    Instances are replaced, never modified, once shared: ``copy`` them
+    before applying changes.
+    """
+
+    def __init__(self):
+        self.positions = {}  # employee id -> position in the arrays
+        self.employee_ids = array('i')
+        self.hires = array('i')
+        self.departures = array('i')
+        self.companies = array('i')
+        self.histories = []  # per position: (start ordinals, department ids)
+
+    def __len__(self):
+        return len(self.employee_ids)
+
+    def copy(self):
+        index = CohortIndex()
+        index.positions = dict(self.positions)
+        index.employee_ids = array('i', self.employee_ids)
+        index.hires = array('i', self.hires)
+        index.departures = array('i', self.departures)
+        index.companies = array('i', self.companies)
+        index.histories = list(self.histories)
+        return index
+
+    def set_employee(self, employee_id, hire, departure, company_id, history):
+        """Add or replace the entry of an employee
+
+        Args:
+            employee_id (int): Employee id
+            hire (date): First day of employment
+            departure (date): Last day of employment, None while employed
+            company_id (int): Company id, False when none
+            history (list): [(start date, department id or False)] sorted by
+                date, the first department also applying before its start
+        """
+        values = (
+            hire.toordinal(),
+            departure.toordinal() if departure else 0,
+            company_id or 0,
+            (
+                array('i', [start.toordinal() for start, _department_id in history]),
+                array('i', [department_id or NO_DEPARTMENT for _start, department_id in history]),
+            ),
+        )
+        position = self.positions.get(employee_id)
+        if position is None:
+            self.positions[employee_id] = len(self.employee_ids)
+            self.employee_ids.append(employee_id)
+            self.hires.append(values[0])
+            self.departures.append(values[1])
+            self.companies.append(values[2])
+            self.histories.append(values[3])
+        else:
+            self.hires[position], self.departures[position], self.companies[position] = values[:3]
+            self.histories[position] = values[3]
+
+    def department_at(self, position, ordinal):
+        """Department of the employee at ``position`` on a day ordinal"""
+        starts, department_ids = self.histories[position]
+        if not department_ids:
+            return NO_DEPARTMENT
+        return department_ids[max(bisect_right(starts, ordinal) - 1, 0)]
+
+    def _positions(self, company_ids):
+        if company_ids is None:
+            return range(len(self))
+        company_ids = set(company_ids)
+        return [position for position, company_id in enumerate(self.companies) if company_id in company_ids]
+
+    def period_counts(self, date_from, date_to, company_ids=None):
+        """Headcounts, hires and departures of a period per department
+
+        Employees are counted in their department on the day of each event:
+        the first and last days of the period for the headcounts, the hire
+        and departure days for the moves.
+
+        Returns:
+            dict: {department_id or NO_DEPARTMENT: [headcount_start,
+                headcount_end, hires, departures]}
+        """
+        first, last = date_from.toordinal(), date_to.toordinal()
+        counts = defaultdict(lambda: [0, 0, 0, 0])
+        for position in self._positions(company_ids):
+            hire, departure = self.hires[position], self.departures[position]
+            if hire > last or (departure and departure < first):
+                continue
+            for slot, ordinal in ((0, first), (1, last)):
+                if hire <= ordinal and (not departure or departure >= ordinal):
+                    counts[self.department_at(position, ordinal)][slot] += 1
+            if hire >= first:
+                counts[self.department_at(position, hire)][2] += 1
+            if departure and departure <= last:
+                counts[self.department_at(position, departure)][3] += 1
+        return dict(counts)
+
+    def retention_curve(self, cohort_from, cohort_to, months, today, department_ids=None, company_ids=None):
+        """Monthly retention of the employees hired in a period
+
+        Month ``k`` only counts the employees hired at least ``k`` whole
+        months before ``today`` (right censoring); they are retained when
+        still employed ``k`` months after their hire.
+
+        Args:
+            department_ids (set, optional): Departments at hire to include
+
+        Returns:
+            list: [(eligible, retained)] for months 0 to ``months``
+        """
+        first, last, now = cohort_from.toordinal(), cohort_to.toordinal(), today.toordinal()
+        eligible = [0] * (months + 2)
+        retained = [0] * (months + 2)
+        for position in self._positions(company_ids):
+            hire = self.hires[position]
+            if not first <= hire <= last or hire > now:
+                continue
+            if department_ids is not None and self.department_at(position, hire) not in department_ids:
+                continue
+            elapsed = min(months_between(hire, now), months)
+            departure = self.departures[position]
+            tenure = max(min(months_between(hire, departure), elapsed), 0) if departure else elapsed
+            # Difference arrays: months 0..elapsed are eligible, 0..tenure retained
+            eligible[0] += 1
+            eligible[elapsed + 1] -= 1
+            retained[0] += 1
+            retained[tenure + 1] -= 1
+        curve = []
+        eligible_count = retained_count = 0
+        for month in range(months + 1):
+            eligible_count += eligible[month]
+            retained_count += retained[month]
+            curve.append((eligible_count, retained_count))
+        return curve
+
+    def tenure_distribution(self, day, department_ids=None, company_ids=None):
+        """Employees employed on ``day`` per tenure bucket (``TENURE_BUCKETS``)
+
+        Returns:
+            list: employee count per bucket
+        """
+        ordinal = day.toordinal()
+        counts = [0] * len(TENURE_BUCKETS)
+        for position in self._positions(company_ids):
+            hire, departure = self.hires[position], self.departures[position]
+            if hire > ordinal or (departure and departure < ordinal):
+                continue
+            if department_ids is not None and self.department_at(position, ordinal) not in department_ids:
+                continue
+            years = months_between(hire, ordinal) // 12
+            for bucket, (_label, lower, upper) in enumerate(TENURE_BUCKETS):
+                if years >= lower and (upper is None or years < upper):
+                    counts[bucket] += 1
+                    break
+        return counts
+
+
+class CohortIndexRegistry:
+    """Cohort indexes of the worker process with their marks, per database key
+
+    Each key has a lock so that a single thread builds or updates its
+    index while the others wait and reuse the result.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._locks = {}
+        self._indexes = {}
+
+    def lock(self, key):
+        with self._lock:
+            return self._locks.setdefault(key, threading.Lock())
+
+    def get(self, key):
+        """Return (index, marks), (None, None) when not built yet"""
+        return self._indexes.get(key, (None, None))
+
+    def set(self, key, index, marks):
+        self._indexes[key] = (index, marks)
+
+    def invalidate(self, key):
+        self._indexes.pop(key, None)
+
+
+# Shared by all requests of the worker process
+cohort_indexes = CohortIndexRegistry()
@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+
+# Bus notification type listened to by the dashboard
+LIVE_UPDATE_TYPE = "hr_analytics_dashboard/update"
+# Subchannel of the company channels the dashboards subscribe to
+LIVE_UPDATE_CHANNEL = "hr_analytics_dashboard"
+
+
+def send_live_updates(env, changes):
+    """Notify the dashboards of the changes of the current transaction
+
+    One bus notification per company lists the affected departments and
+    response sections. Notifications are stored in the transaction, so they
+    are only delivered once it is committed, and are lost with it when it
+    is rolled back; dashboards coalesce the bursts of notifications.
+
+    Args:
+        env: Environment of the writing transaction
+        changes (dict): {company_id: (department_ids, sections)}
+    """
+    if not changes:
+        return
+    env['bus.bus'].sudo()._sendmany([
+        (
+            (env['res.company'].browse(company_id), LIVE_UPDATE_CHANNEL),
+            LIVE_UPDATE_TYPE,
+            {
+                'company_id': company_id,
+                'department_ids': sorted(department_ids, key=lambda dept_id: dept_id or 0),
+                'sections': sorted(sections),
+            },
+        )
+        for company_id, (department_ids, sections) in changes.items()
+    ])
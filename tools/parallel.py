@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from psycopg2.pool import PoolError
+
+from odoo import api
+from odoo.tools import SQL, config
+
+from .profiler import current_profile, profile_task
+from .request_env import request_env
+
+_logger = logging.getLogger(__name__)
+
+
+class SectionExecutor:
+    """Run independent dashboard computations concurrently
+
+    The first task runs in the calling thread on the request cursor, the
+    others in pool threads, each on a new read-only cursor importing the
+    snapshot of the calling transaction (``pg_export_snapshot``): all tasks
+    see the same committed data as a serial run would. Uncommitted changes
+    of the calling transaction are only visible to the first task, so only
+    use it for read-only requests.
+
+    Tasks run serially in the calling thread when fewer than two are given
+    or when the cursor budget of the worker is exhausted; a task whose
+    cursor cannot be opened because the connection pool is full is run
+    serially afterwards.
+    """
+
+    def __init__(self, max_workers=6, max_cursors=None):
+        self.max_workers = max_workers
+        # Defaults to a quarter of the connection pool of the worker
+        self.max_cursors = max_cursors
+        self._lock = threading.Lock()
+        self._executor = None
+        self._cursors = None
+
+    def run(self, env, tasks):
+        """Run the tasks and return their results
+
+        Args:
+            env: Environment of the calling thread
+            tasks (dict): {name: callable without arguments}, reading the
+                database through ``request.env``
+
+        Returns:
+            dict: {name: result}
+        """
+        names = list(tasks)
+        slots = self._acquire_cursors(len(names) - 1)
+        if not slots:
+            if len(names) > 1:
+                _logger.info("HR Analytics sections: cursor budget exhausted, computing serially")
+            return {name: tasks[name]() for name in names}
+
+        try:
+            env.cr.execute(SQL("SELECT pg_export_snapshot()"))
+            [snapshot] = env.cr.fetchone()
+            profile = current_profile()
+            futures = {
+                name: self._get_executor().submit(
+                    self._run_task, env.registry, env.uid, dict(env.context), snapshot, profile, tasks[name],
+                )
+                for name in names[1:]
+            }
+            results = {names[0]: tasks[names[0]]()}
+            serial = []
+            for name, future in futures.items():
+                try:
+                    results[name] = future.result()
+                except PoolError:
+                    serial.append(name)
+        finally:
+            self._release_cursors(slots)
+
+        if serial:
+            _logger.info("HR Analytics sections: connection pool full, computing %s serially", ', '.join(serial))
+        for name in serial:
+            results[name] = tasks[name]()
+        return results
+
+    def _run_task(self, registry, uid, context, snapshot, profile, task):
+        with registry.cursor() as cr:
+            cr.execute(SQL("SET TRANSACTION SNAPSHOT %s", snapshot))
+            cr.execute(SQL("SET TRANSACTION READ ONLY"))
+            env = api.Environment(cr, uid, context)
+            with request_env(env), profile_task(cr, profile):
+                return task()
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(self.max_workers, thread_name_prefix='hr_analytics_sections')
+            return self._executor
+
+    def _acquire_cursors(self, count):
+        """Reserve ``count`` cursors of the budget without waiting
+
+        Returns:
+            int: the number of reserved cursors, 0 when they are not all
+                available
+        """
+        if count < 1:
+            return 0
+        with self._lock:
+            if self._cursors is None:
+                self._cursors = self.max_cursors or max(int(config['db_maxconn']) // 4, 0)
+            if self._cursors < count:
+                return 0
+            self._cursors -= count
+            return count
+
+    def _release_cursors(self, count):
+        with self._lock:
+            self._cursors += count
+
+
+# Shared by all requests of the worker process
+section_executor = SectionExecutor()
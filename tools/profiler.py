@@ -0,0 +1,170 @@
+# -*- coding: utf-8 -*-
+
+import functools
+import logging
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+
+_logger = logging.getLogger(__name__)
+
+_local = threading.local()
+
+
+class StepStats:
+    """Rolling per-step wall times and query counts, per database
+
+    Only the last ``window`` measurements of each step are kept. Figures are
+    local to the worker process.
+    """
+
+    def __init__(self, window=500):
+        self.window = window
+        self._lock = threading.Lock()
+        self._samples = defaultdict(lambda: defaultdict(lambda: deque(maxlen=self.window)))
+
+    def add(self, dbname, step, wall_ms, queries):
+        with self._lock:
+            self._samples[dbname][step].append((wall_ms, queries))
+
+    def summary(self, dbname):
+        """Return {step: {'count', 'p50_ms', 'p95_ms', 'max_ms', 'avg_queries'}}"""
+        with self._lock:
+            samples = {step: list(values) for step, values in self._samples.get(dbname, {}).items()}
+        summary = {}
+        for step, values in sorted(samples.items()):
+            wall_times = sorted(wall_ms for wall_ms, _queries in values)
+            summary[step] = {
+                'count': len(values),
+                'p50_ms': round(_percentile(wall_times, 50), 2),
+                'p95_ms': round(_percentile(wall_times, 95), 2),
+                'max_ms': round(wall_times[-1], 2),
+                'avg_queries': round(sum(queries for _wall_ms, queries in values) / len(values), 1),
+            }
+        return summary
+
+
+def _percentile(sorted_values, percent):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(int(round(percent / 100 * len(sorted_values) + 0.5)) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+class RequestProfile:
+    """Steps measured while serving one request"""
+
+    def __init__(self, cr):
+        self.cr = cr
+        self.steps = []
+        self.depth = 0
+        self.started = time.perf_counter()
+        self.queries_before = cr.sql_log_count
+        # Queries run on the cursors of tasks in other threads
+        self.task_queries = 0
+        self._lock = threading.Lock()
+
+    def add_task(self, profile):
+        """Merge the steps and queries of a task run in another thread"""
+        with self._lock:
+            self.steps.extend(profile.steps)
+            self.task_queries += profile.cr.sql_log_count - profile.queries_before
+
+    def to_dict(self):
+        return {
+            'wall_ms': round((time.perf_counter() - self.started) * 1000, 2),
+            'queries': self.cr.sql_log_count - self.queries_before + self.task_queries,
+            'steps': self.steps,
+        }
+
+
+def current_profile():
+    """Profile of the request served by the current thread, if any"""
+    return getattr(_local, 'profile', None)
+
+
+@contextmanager
+def profile_request(cr):
+    """Collect the steps measured in the current thread until exit"""
+    profile = RequestProfile(cr)
+    _local.profile = profile
+    try:
+        yield profile
+    finally:
+        _local.profile = None
+        totals = profile.to_dict()
+        step_stats.add(cr.dbname, 'total', totals['wall_ms'], totals['queries'])
+
+
+@contextmanager
+def profile_task(cr, parent):
+    """Collect the steps of a task run on ``cr`` in another thread into ``parent``"""
+    if parent is None:
+        yield
+        return
+    profile = RequestProfile(cr)
+    profile.depth = parent.depth
+    _local.profile = profile
+    try:
+        yield
+    finally:
+        _local.profile = None
+        parent.add_task(profile)
+
+
+@contextmanager
+def profile_step(name):
+    """Measure wall time and SQL queries of a step of the current request
+
+    Yields a dict where the step may set ``rows`` to the number of rows it
+    produced. Nested steps are recorded with their depth and their figures
+    include their sub-steps.
+    """
+    profile = current_profile()
+    step = {'rows': None}
+    if profile is None:
+        yield step
+        return
+    started = time.perf_counter()
+    queries_before = profile.cr.sql_log_count
+    profile.depth += 1
+    try:
+        yield step
+    finally:
+        profile.depth -= 1
+        wall_ms = round((time.perf_counter() - started) * 1000, 2)
+        queries = profile.cr.sql_log_count - queries_before
+        profile.steps.append({
+            'step': name,
+            'depth': profile.depth,
+            'wall_ms': wall_ms,
+            'queries': queries,
+            'rows': step['rows'],
+        })
+        step_stats.add(profile.cr.dbname, name, wall_ms, queries)
+        _logger.info(
+            "hr_analytics.step step=%s depth=%s wall_ms=%.2f queries=%s rows=%s",
+            name, profile.depth, wall_ms, queries, step['rows'],
+        )
+
+
+def profiled(name, rows=len):
+    """Decorator measuring a method as a step of the current request
+
+    ``rows`` computes the produced row count from the return value.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with profile_step(name) as step:
+                result = func(*args, **kwargs)
+                step['rows'] = rows(result) if rows else None
+                return result
+        return wrapper
+    return decorator
+
+
+# Shared by all requests of the worker process
+step_stats = StepStats()
@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+
+from contextlib import contextmanager
+from types import SimpleNamespace
+
+from odoo import http
+
+
+@contextmanager
+def request_env(env):
+    """Run dashboard controller helpers on ``env`` outside of its HTTP request
+
+    The helpers read ``request.env`` (and ``request.session.debug``); only
+    those attributes are provided, for the current thread.
+    """
+    http._request_stack.push(SimpleNamespace(env=env, session=SimpleNamespace(debug='')))
+    try:
+        yield
+    finally:
+        http._request_stack.pop()
@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+
+import threading
+import time
+from collections import OrderedDict
+
+
+class ResultCache:
+    """Thread-safe, per-database LRU cache with a time-to-live
+
+    Entries are partitioned by database name so that one worker serving
+    several databases never mixes their results. Each entry keeps the
+    version of the data it was computed from and is only served for that
+    version: ``invalidate`` only reaches the current worker process, so
+    callers read the version from the database to notice changes committed
+    by the other workers.
+    """
+
+    def __init__(self, max_entries=128):
+        self.max_entries = max_entries
+        self._lock = threading.RLock()
+        self._databases = {}
+
+    def get(self, dbname, key, ttl, version=None):
+        """Return the cached value, or None when missing, expired or of another version"""
+        with self._lock:
+            entries = self._databases.get(dbname)
+            if not entries or key not in entries:
+                return None
+            stored_at, stored_version, value = entries[key]
+            if time.monotonic() - stored_at > ttl or stored_version != version:
+                del entries[key]
+                return None
+            entries.move_to_end(key)
+            return value
+
+    def set(self, dbname, key, value, version=None):
+        """Store a value computed from ``version``, evicting the least recently used entries"""
+        with self._lock:
+            entries = self._databases.setdefault(dbname, OrderedDict())
+            entries[key] = (time.monotonic(), version, value)
+            entries.move_to_end(key)
+            while len(entries) > self.max_entries:
+                entries.popitem(last=False)
+
+    def invalidate(self, dbname):
+        """Drop every entry of a database in this worker process"""
+        with self._lock:
+            self._databases.pop(dbname, None)
+
+
+# Shared by all requests of the worker process
+dashboard_cache = ResultCache()